@@ -0,0 +1,108 @@
+"""
+Local stand-in for the Gemini API, for testing the agent transport offline.
+
+    python -m benchmarks.fake_gemini --port 8765 --latency 0.3
+    GEMINI_BASE_URL=http://127.0.0.1:8765 GEMINI_API_KEY=test python main.py
+
+Answers generateContent and streamGenerateContent (SSE) with a decision
+picked by simple keyword rules, split into several streamed chunks.
+"""
+import argparse
+import json
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RULES = [
+    (r"\b(open|launch|start)\s+(\w+)", "open_app", "app"),
+    (r"\b(close|kill|exit)\s+(\w+)", "close_app", "app"),
+    (r"\b(switch to|focus on)\s+(\w+)", "switch_app", "app"),
+    (r"\bsearch( for)?\s+(.+)", "search", "query"),
+    (r"\brunning\b", "list_running", None),
+    (r"\binstalled\b", "list_installed", None),
+]
+
+
+def decide(user_text):
+    steps = []
+    for part in re.split(r",|\band\b|\bthen\b", user_text):
+        for pattern, action, slot in RULES:
+            match = re.search(pattern, part, re.IGNORECASE)
+            if match:
+                step = {"id": len(steps) + 1, "action": action, "app": None,
+                        "name": None, "query": None, "after": []}
+                if slot:
+                    step[slot] = match.group(2).strip()
+                steps.append(step)
+                break
+    return {"steps": steps, "confidence": 0.9 if steps else 0.1}
+
+
+class Handler(BaseHTTPRequestHandler):
+    latency = 0.0
+    chunk_delay = 0.0
+    error_rate = 0.0
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        prompt = "".join(
+            part.get("text", "")
+            for content in body.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        quoted = re.search(r'User input:\s*"(.*?)"\s*\n', prompt, re.S)
+        answer = json.dumps(decide(quoted.group(1) if quoted else prompt))
+
+        time.sleep(self.latency)
+        if random.random() < self.error_rate:
+            self.send_error(503, "Simulated overload")
+            return
+
+        if ":streamGenerateContent" in self.path:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            size = max(1, len(answer) // 4)
+            try:
+                for i in range(0, len(answer), size):
+                    self.wfile.write(b"data: " + json.dumps(_candidate(answer[i:i + size])).encode() + b"\r\n\r\n")
+                    self.wfile.flush()
+                    time.sleep(self.chunk_delay)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client stopped reading (object complete, or a hedge won)
+                pass
+        else:
+            payload = json.dumps(_candidate(answer)).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+
+def _candidate(text):
+    return {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before answering")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="seconds between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 503")
+    args = parser.parse_args()
+
+    Handler.latency = args.latency
+    Handler.chunk_delay = args.chunk_delay
+    Handler.error_rate = args.error_rate
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    print(f"Fake Gemini listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Per-call latency of the intent classifier: the old decision_function +
+predict double call against the single-pass IntentEngine.
+
+Run from the project root:
+    python -m benchmarks.intent_engine
+"""
+import csv
+import time
+
+import joblib
+
+from core.intent_engine import IntentEngine
+
+REPEATS = 5
+
+
+def load_sentences(path="data/commands.csv"):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [row["sentence"] for row in csv.DictReader(f)]
+
+
+def double_call(model, text):
+    scores = model.decision_function([text])
+    confidence = scores.max()
+    intent = model.predict([text])[0]
+    return intent, confidence
+
+
+def time_per_call(fn, sentences):
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        for text in sentences:
+            fn(text)
+    return (time.perf_counter() - started) / (REPEATS * len(sentences)) * 1e6
+
+
+def main():
+    model = joblib.load("core/intent_model.pkl")
+    sentences = load_sentences()
+
+    cold = IntentEngine(model, memo_size=0)
+    warm = IntentEngine(model)
+
+    double_us = time_per_call(lambda t: double_call(model, t), sentences)
+    single_us = time_per_call(cold.predict, sentences)
+    memo_us = time_per_call(warm.predict, sentences)
+
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        cold.predict_batch(sentences)
+    batch_us = (time.perf_counter() - started) / (REPEATS * len(sentences)) * 1e6
+
+    # Both paths must agree before the numbers mean anything
+    for text in sentences:
+        assert cold.predict(text).intent == double_call(model, text)[0], text
+
+    print(f"{len(sentences)} utterances x {REPEATS} repeats (microseconds per utterance)")
+    print(f"  decision_function + predict  {double_us:10.1f}")
+    print(f"  IntentEngine.predict         {single_us:10.1f}  ({double_us / single_us:.1f}x)")
+    print(f"  IntentEngine.predict (memo)  {memo_us:10.1f}  ({double_us / memo_us:.1f}x)")
+    print(f"  IntentEngine.predict_batch   {batch_us:10.1f}  ({double_us / batch_us:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+"""
+End-to-end latency of process_command: replays data/commands.csv (and any
+recorded request logs) through the real router and command engine, with a
+mock Gemini agent and stubbed skills so nothing touches the desktop.
+
+Reports p50/p95/p99 per stage, import/warm-up time and peak memory, and
+compares the run against a stored JSON baseline.
+
+Run from the project root:
+    python -m benchmarks.pipeline                        # compare with the baseline
+    python -m benchmarks.pipeline --save-baseline        # record a new baseline
+    python -m benchmarks.pipeline --log requests.jsonl --agent-latency 0.3 --agent-error-rate 0.1
+
+A request log is JSON lines with the utterance under "text" (or "user",
+as in the memory journal); an "intent" field, if present, is what the mock
+agent answers with.
+
+Exits with status 1 when any metric regresses past --threshold.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+BASELINE_FILE = "benchmarks/baselines/pipeline.json"
+# Relative slowdown that counts as a regression...
+THRESHOLD = 0.25
+# ...as long as it is also larger than this (timer and allocator noise)
+MIN_DELTA_MS = 0.5
+MIN_DELTA_KB = 512
+
+STAGES = ("total", "route", "route.local", "route.agent", "execute")
+
+SKILLS = {
+    "skills.file_control": (
+        "create_file", "delete_file", "create_folder", "delete_folder",
+        "undo_delete", "list_items",
+    ),
+    "skills.application_control": (
+        "open_app", "close_app", "switch_to_app", "list_installed_apps", "list_running_apps",
+    ),
+    "skills.browser_control": ("search_in_browser",),
+}
+
+STARTUP_SCRIPT = """
+import json, sys, time
+trace = sys.argv[1] == "1"
+if trace:
+    import tracemalloc
+    tracemalloc.start()
+started = time.perf_counter()
+import core.command_engine
+imported = time.perf_counter()
+from core.registry import components
+components.get("router")
+warm = time.perf_counter()
+result = {"import_ms": (imported - started) * 1000, "warm_ms": (warm - imported) * 1000}
+if trace:
+    result["peak_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+print(json.dumps(result))
+"""
+
+
+# ---------------- WORKLOAD ----------------
+
+def load_dataset(path="data/commands.csv"):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [(row["sentence"], row["intent"]) for row in csv.DictReader(f)]
+
+
+def load_log(path):
+    """Utterances (and intents, if recorded) from a JSON-lines request log."""
+    workload = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            text = record.get("text") or record.get("user")
+            if isinstance(text, str) and text.strip():
+                workload.append((text, record.get("intent")))
+    return workload
+
+
+# ---------------- MEASUREMENT ----------------
+
+class Recorder:
+    """Collects per-stage wall-clock samples in milliseconds."""
+
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def time(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.samples[stage].append(elapsed)
+
+    def summary(self) -> dict:
+        return {stage: percentiles(values) for stage, values in self.samples.items() if values}
+
+
+def percentiles(values) -> dict:
+    values = sorted(values)
+    summary = {"count": len(values)}
+    for pct in (50, 95, 99):
+        index = min(len(values) - 1, int(len(values) * pct / 100))
+        summary[f"p{pct}_ms"] = round(values[index], 3)
+    return summary
+
+
+class TimedEngine:
+    """IntentEngine proxy that times predict()."""
+
+    def __init__(self, engine, recorder):
+        self._engine = engine
+        self._recorder = recorder
+
+    def predict(self, text):
+        with self._recorder.time("route.local"):
+            return self._engine.predict(text)
+
+    def __getattr__(self, name):
+        return getattr(self._engine, name)
+
+
+class MockAgent:
+    """Stands in for decide_action: answers after `latency` seconds (with
+    jitter) using the recorded intent, and fails at `error_rate`."""
+
+    def __init__(self, intents, latency, jitter, error_rate, seed):
+        from core.router import INTENT_ACTIONS
+
+        self.actions = INTENT_ACTIONS
+        self.intents = intents
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self, text):
+        with self._lock:
+            delay = max(0.0, self._random.gauss(self.latency, self.latency * self.jitter))
+            fail = self._random.random() < self.error_rate
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError("mock agent failure")
+        action = self.actions.get(self.intents.get(text), "none")
+        return {"action": action, "app": None, "name": None, "query": None,
+                "confidence": 0.9 if action != "none" else 0.1}
+
+
+def stub_skills(latency):
+    """Replaces every skill entry point with a recorder that does nothing."""
+    import importlib
+
+    calls = {}
+
+    def stub(qualified):
+        def run(*args, **kwargs):
+            calls[qualified] = calls.get(qualified, 0) + 1
+            if latency:
+                time.sleep(latency)
+            return f"[stub] {qualified}"
+        return run
+
+    for module_name, functions in SKILLS.items():
+        module = importlib.import_module(module_name)
+        for name in functions:
+            setattr(module, name, stub(f"{module_name.split('.')[-1]}.{name}"))
+    return calls
+
+
+# ---------------- RUN ----------------
+
+def measure_startup() -> dict:
+    """Import and router warm-up time in a fresh interpreter; peak memory
+    comes from a second run so tracemalloc does not skew the timings."""
+    timed = _run_startup(trace=False)
+    traced = _run_startup(trace=True)
+    return {
+        "import_ms": round(timed["import_ms"], 1),
+        "warm_ms": round(timed["warm_ms"], 1),
+        "peak_kb": round(traced["peak_kb"]),
+    }
+
+
+def _run_startup(trace):
+    out = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT, "1" if trace else "0"],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def replay(workload, args) -> dict:
+    from core import command_engine
+    from core.agent.memory import Memory
+    from core.intent_engine import IntentEngine
+    from core.registry import components
+    from core.router import CascadeRouter
+    from core.speculation import speculator
+
+    recorder = Recorder()
+    calls = stub_skills(args.skill_latency)
+    agent = MockAgent(
+        {text: intent for text, intent in workload if intent},
+        args.agent_latency, args.agent_jitter, args.agent_error_rate, args.seed,
+    )
+
+    def timed_agent(text):
+        with recorder.time("route.agent"):
+            return agent(text)
+
+    # No memo: with repeats, most route.local samples would be dict lookups, not classification
+    engine = IntentEngine(components.get("intent_model"), memo_size=0)
+    router = CascadeRouter(TimedEngine(engine, recorder), timed_agent)
+    components.register("router", lambda: router)
+
+    route = router.route
+    execute = command_engine.execute
+
+    def timed_route(text):
+        with recorder.time("route"):
+            return route(text)
+
+    def timed_execute(decision, text, on_chunk=None):
+        with recorder.time("execute"):
+            return execute(decision, text, on_chunk)
+
+    router.route = timed_route
+    command_engine.execute = timed_execute
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep the user's conversation memory out of the benchmark
+        original_memory = command_engine.memory
+        command_engine.memory = Memory(os.path.join(tmp, "memory.json"))
+        # Pre-warming would run the real skills in the background
+        predict, speculator.predict = speculator.predict, False
+        tracemalloc.start()
+        try:
+            for _ in range(args.repeats):
+                for text, _ in workload:
+                    with recorder.time("total"):
+                        command_engine.process_command(text)
+            peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+            command_engine.memory.close()
+            command_engine.memory = original_memory
+            command_engine.execute = execute
+            speculator.predict = predict
+
+    return {
+        "stages": recorder.summary(),
+        "replay_peak_kb": round(peak_kb),
+        "routing": router.stats(),
+        "skill_calls": dict(sorted(calls.items())),
+    }
+
+
+# ---------------- BASELINE ----------------
+
+def metrics(report) -> dict:
+    """Flat {name: (value, unit)} view of the numbers that are compared."""
+    flat = {}
+    for stage, summary in report["stages"].items():
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            flat[f"{stage}.{key}"] = (summary[key], "ms")
+    if "startup" in report:
+        flat["startup.import_ms"] = (report["startup"]["import_ms"], "ms")
+        flat["startup.warm_ms"] = (report["startup"]["warm_ms"], "ms")
+        flat["startup.peak_kb"] = (report["startup"]["peak_kb"], "kb")
+    flat["replay_peak_kb"] = (report["replay_peak_kb"], "kb")
+    return flat
+
+
+def compare(report, baseline, threshold) -> list:
+    regressions = []
+    old = metrics(baseline)
+    for name, (value, unit) in metrics(report).items():
+        if name not in old:
+            continue
+        before = old[name][0]
+        min_delta = MIN_DELTA_MS if unit == "ms" else MIN_DELTA_KB
+        if value > before * (1 + threshold) and value - before > min_delta:
+            regressions.append(f"{name}: {before} -> {value} {unit} (+{(value / before - 1) * 100 if before else float('inf'):.0f}%)")
+    return regressions
+
+
+def print_report(report):
+    print(f"{report['utterances']} utterances x {report['repeats']} repeats")
+    print(f"  {'stage':<14}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, s in report["stages"].items():
+        print(f"  {stage:<14}{s['count']:>7}{s['p50_ms']:>10.3f}{s['p95_ms']:>10.3f}{s['p99_ms']:>10.3f}")
+    if "startup" in report:
+        s = report["startup"]
+        print(f"  startup: import {s['import_ms']:.1f} ms, router warm-up {s['warm_ms']:.1f} ms, peak {s['peak_kb']} KB")
+    print(f"  replay peak memory: {report['replay_peak_kb']} KB")
+    print(f"  routing: {report['routing']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end latency benchmark for process_command.")
+    parser.add_argument("--dataset", default="data/commands.csv")
+    parser.add_argument("--log", action="append", default=[], help="JSON-lines request log to replay (repeatable)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--agent-latency", type=float, default=0.05, help="mock agent mean latency in seconds")
+    parser.add_argument("--agent-jitter", type=float, default=0.3, help="relative standard deviation of the latency")
+    parser.add_argument("--agent-error-rate", type=float, default=0.0)
+    parser.add_argument("--skill-latency", type=float, default=0.0, help="seconds each stubbed skill takes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-startup", action="store_true", help="do not measure import/warm-up time")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--output", help="also write this run's report to a JSON file")
+    args = parser.parse_args()
+
+    workload = load_dataset(args.dataset)
+    for path in args.log:
+        workload.extend(load_log(path))
+
+    report = {
+        "utterances": len(workload),
+        "repeats": args.repeats,
+        "config": {
+            "agent_latency": args.agent_latency,
+            "agent_error_rate": args.agent_error_rate,
+            "skill_latency": args.skill_latency,
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+        },
+    }
+    if not args.skip_startup:
+        report["startup"] = measure_startup()
+    report.update(replay(workload, args))
+    print_report(report)
+
+    if args.output:
+        _write_json(args.output, report)
+
+    if args.save_baseline:
+        _write_json(args.baseline, report)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one.")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("config") != report["config"]:
+        print("Note: baseline was recorded with a different configuration.")
+    regressions = compare(report, baseline, args.threshold)
+    if regressions:
+        print(f"Regressions past {args.threshold:.0%}:")
+        for line in regressions:
+            print("  " + line)
+        return 1
+    print(f"No regressions past {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,26 +1,59 @@
 import os
-import json
-import re
 
 from dotenv import load_dotenv
-from google import genai
 
 from core.agent.memory import memory
+from core.agent.decision_cache import decision_cache
+from core.registry import components
+from core.tracing import tracer
 
 # ---------------- LOAD ENV ----------------
 load_dotenv()
 
 # ---------------- GEMINI CLIENT ----------------
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise RuntimeError("GEMINI_API_KEY environment variable not set")
+def _create_client():
+    # Imported here: google-genai is slow to import and only needed on escalation
+    from google import genai
 
-client = genai.Client(api_key=api_key)
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise RuntimeError("GEMINI_API_KEY environment variable not set")
+    # GEMINI_BASE_URL points the client at a local stand-in server for testing
+    base_url = os.getenv("GEMINI_BASE_URL")
+    if base_url:
+        return genai.Client(api_key=api_key, http_options={"base_url": base_url})
+    return genai.Client(api_key=api_key)
+
+
+def _create_transport():
+    from core.agent.transport import GeminiTransport
+    return GeminiTransport(lambda: components.get("gemini_client"))
+
+
+components.register("gemini_client", _create_client)
+components.register("gemini_transport", _create_transport)
+
+# Only decisions at least this confident are remembered
+CACHE_MIN_CONFIDENCE = 0.4
 
 # ---------------- AGENT (DECISION ONLY) ----------------
 def decide_action(user_text: str) -> dict:
-    last_app = memory.get_last_app()
+    with tracer.span("agent") as span:
+        last_app = memory.get_last_app()
+
+        cached = decision_cache.get(user_text, last_app)
+        span["cached"] = cached is not None
+        if cached is not None:
+            return cached
+
+        decision = _ask_gemini(user_text, last_app)
+        if (decision.get("action", "none") != "none"
+                and decision.get("confidence", 0) >= CACHE_MIN_CONFIDENCE):
+            decision_cache.put(user_text, last_app, decision)
+        return decision
+
 
+def _ask_gemini(user_text: str, last_app) -> dict:
     prompt = f"""
 You are a system automation AI agent.
 Understand natural language in English or Indian languages like Telugu and Hindi.
@@ -33,30 +66,50 @@ User input:
 
 Respond ONLY with valid JSON.
 
+The input may ask for several things at once. Return every requested action
+as a step, in the order the user said them. A step lists in "after" the ids
+of earlier steps that must finish first; leave it empty for independent steps.
+
 Valid actions:
-open_app, close_app, list_installed, list_running, switch_app, search, none
+open_app, close_app, list_installed, list_running, switch_app, search,
+create_file, delete_file, create_folder, delete_folder, list_files, undo_delete, none
 
 JSON format:
 {{
-  "action": "open_app | close_app | list_installed | list_running | switch_app | search | none",
-  "app": "string or null",
-  "query": "string or null",
+  "steps": [
+    {{
+      "id": 1,
+      "action": "one of the valid actions",
+      "app": "string or null",
+      "name": "file or folder name, or null",
+      "query": "string or null",
+      "after": []
+    }}
+  ],
   "confidence": 0.0
 }}
 """
 
-    response = client.models.generate_content(
-        model="gemini-1.5-flash",
-        contents=prompt
-    )
-
-    raw_text = response.text.strip()
-
-    match = re.search(r"\{.*\}", raw_text, re.S)
-    if not match:
-        return {"action": "none", "confidence": 0.0}
-
+    transport = components.get("gemini_transport")
     try:
-        return json.loads(match.group())
-    except json.JSONDecodeError:
+        return to_decision(transport.request(prompt))
+    except ValueError as e:
+        print("Gemini returned no usable JSON:", e)
         return {"action": "none", "confidence": 0.0}
+
+
+def to_decision(raw: dict) -> dict:
+    """
+    Flattens a one-step plan into a plain decision; several steps become
+    {"action": "plan", "steps": [...]}.
+    """
+    steps = [s for s in raw.get("steps") or [] if s.get("action", "none") != "none"]
+    if "steps" not in raw:
+        # Already a single-action answer
+        return raw
+    if not steps:
+        return {"action": "none", "confidence": raw.get("confidence", 0.0)}
+    if len(steps) == 1:
+        step = {k: v for k, v in steps[0].items() if k not in ("id", "after")}
+        return dict(step, confidence=raw.get("confidence", 0.0))
+    return {"action": "plan", "steps": steps, "confidence": raw.get("confidence", 0.0)}
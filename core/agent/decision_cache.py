@@ -0,0 +1,149 @@
+import atexit
+import json
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# Words that do not change what the user is asking for.
+FILLER_WORDS = {
+    "please", "kindly", "hey", "ok", "okay", "just", "now", "the",
+}
+FILLER_PHRASES = ("can you ", "could you ", "would you ", "will you ")
+
+
+def normalize_utterance(text: str) -> str:
+    """Lowercases, strips punctuation and filler words so near-identical
+    commands ("Open notepad, please!" / "open the notepad") share a key."""
+    text = unicodedata.normalize("NFC", text or "").lower()
+    # Drop punctuation but keep combining marks used by Telugu/Hindi scripts
+    text = "".join(
+        " " if unicodedata.category(ch).startswith("P") else ch for ch in text
+    )
+    text = " " + " ".join(text.split()) + " "
+    for phrase in FILLER_PHRASES:
+        text = text.replace(" " + phrase, " ")
+    return " ".join(w for w in text.split() if w not in FILLER_WORDS)
+
+
+class DecisionCache:
+    """LRU + TTL cache of agent decisions, persisted as JSON between runs."""
+
+    def __init__(self, cache_file="cache/decision_cache.json",
+                 max_entries=512, ttl=24 * 3600, autosave_every=8):
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.autosave_every = autosave_every
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self.load()
+
+    # ---------------- KEYS ----------------
+
+    @staticmethod
+    def make_key(text: str, last_app=None) -> str:
+        return f"{normalize_utterance(text)}|{(last_app or '').lower()}"
+
+    # ---------------- LOOKUP ----------------
+
+    def get(self, text: str, last_app=None):
+        key = self.make_key(text, last_app)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if now - entry["ts"] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                self._dirty += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry["decision"])
+
+    def put(self, text: str, last_app, decision: dict):
+        key = self.make_key(text, last_app)
+        with self._lock:
+            self._entries[key] = {"ts": time.time(), "decision": dict(decision)}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._dirty += 1
+            should_save = self._dirty >= self.autosave_every
+        if should_save:
+            self.save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty += 1
+        self.save()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    # ---------------- PERSISTENCE ----------------
+
+    def load(self):
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print("Decision cache unreadable, starting empty:", e)
+            return
+
+        now = time.time()
+        with self._lock:
+            # Stored oldest-first, so insertion order restores the LRU order
+            for key, entry in raw.get("entries", []):
+                if now - entry.get("ts", 0) <= self.ttl:
+                    self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {"entries": list(self._entries.items())}
+            self._dirty = 0
+
+        directory = os.path.dirname(self.cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_file = self.cache_file + ".tmp"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            print("Could not save decision cache:", e)
+
+
+# Instantiate the cache object
+decision_cache = DecisionCache()
+atexit.register(decision_cache.save)
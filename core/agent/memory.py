@@ -1,41 +1,190 @@
+import atexit
 import json
 import os
+import threading
+import time
+from collections import deque
+
 
 class Memory:
-    def __init__(self, memory_file='core/agent/memory.json'):
+    """
+    Context memory backed by a JSON snapshot plus an append-only journal.
+    Updates only touch memory; a background thread appends them to the
+    journal in batches and periodically compacts it into the snapshot.
+    """
+
+    def __init__(self, memory_file='core/agent/memory.json', history_size=10,
+                 flush_interval=0.5, compact_every=200):
         self.memory_file = memory_file
-        self.context = self.load_memory()
+        self.journal_file = os.path.splitext(memory_file)[0] + ".journal"
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+
+        self.context = {"last_app": None, "last_action": None}
+        self.history = deque(maxlen=history_size)
+        self._seq = 0
+        self._journal_records = 0
+
+        self._pending = []
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+
+        self.load_memory()
+
+        self._flusher = threading.Thread(target=self._flush_loop, name="memory-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    # ---------------- RECOVERY ----------------
 
     def load_memory(self):
+        snapshot_seq = 0
         if os.path.exists(self.memory_file):
-            with open(self.memory_file, 'r') as f:
-                return json.load(f)
-        return {"last_app": None, "conversation_history": []}
+            try:
+                with open(self.memory_file, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+                self.context["last_app"] = snapshot.get("last_app")
+                self.context["last_action"] = snapshot.get("last_action")
+                self.history.extend(snapshot.get("conversation_history", []))
+                snapshot_seq = snapshot.get("seq", 0)
+            except (OSError, json.JSONDecodeError) as e:
+                print("Memory snapshot unreadable, replaying journal only:", e)
+        self._seq = snapshot_seq
 
-    def save_memory(self):
-        os.makedirs(os.path.dirname(self.memory_file), exist_ok=True)
-        with open(self.memory_file, 'w') as f:
-            json.dump(self.context, f, indent=4)
+        torn = False
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash mid-write leaves at most one partial line
+                        torn = True
+                        break
+                    self._journal_records += 1
+                    # Records already folded into the snapshot are skipped
+                    if record["seq"] > snapshot_seq:
+                        self._apply(record)
+                        self._seq = record["seq"]
+
+        if torn:
+            self.compact()
+
+    def _apply(self, record):
+        if "last_app" in record:
+            self.context["last_app"] = record["last_app"]
+        if "last_action" in record:
+            self.context["last_action"] = record["last_action"]
+        if "history" in record:
+            self.history.append(record["history"])
+
+    # ---------------- UPDATES ----------------
+
+    def update(self, app=None, action=None, user=None, agent=None):
+        """Records context and/or a conversation turn without touching the disk."""
+        record = {}
+        if app is not None:
+            record["last_app"] = app
+        if action is not None:
+            record["last_action"] = action
+        if user is not None or agent is not None:
+            entry = {"user": user, "agent": agent}
+            if action is not None:
+                entry["action"] = action
+            if app is not None:
+                entry["app"] = app
+            record["history"] = entry
+        if not record:
+            return
+
+        with self._lock:
+            self._seq += 1
+            record["seq"] = self._seq
+            record["ts"] = time.time()
+            self._apply(record)
+            self._pending.append(record)
+        self._wakeup.set()
 
     def update_last_app(self, app_name):
-        self.context["last_app"] = app_name
-        self.save_memory()
+        self.update(app=app_name)
+
+    def add_to_history(self, user_input, agent_response):
+        self.update(user=user_input, agent=agent_response)
 
     def get_last_app(self):
         return self.context.get("last_app")
 
-    def add_to_history(self, user_input, agent_response):
-        self.context["conversation_history"].append({
-            "user": user_input,
-            "agent": agent_response
-        })
-        # Keep only last 10 interactions
-        if len(self.context["conversation_history"]) > 10:
-            self.context["conversation_history"] = self.context["conversation_history"][-10:]
-        self.save_memory()
-
     def get_recent_history(self, n=5):
-        return self.context["conversation_history"][-n:]
+        with self._lock:
+            return list(self.history)[-n:]
+
+    # ---------------- PERSISTENCE ----------------
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait()
+            # Let a burst of updates coalesce into one write
+            time.sleep(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Appends pending records to the journal, compacting when it grows."""
+        with self._io_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return
+
+            os.makedirs(os.path.dirname(self.memory_file), exist_ok=True)
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in pending))
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_records += len(pending)
+
+            if self._journal_records >= self.compact_every:
+                self._compact()
+
+    def compact(self):
+        with self._io_lock:
+            self._compact()
+
+    def _compact(self):
+        with self._lock:
+            snapshot = {
+                "seq": self._seq,
+                "last_app": self.context["last_app"],
+                "last_action": self.context["last_action"],
+                "conversation_history": list(self.history),
+            }
+        os.makedirs(os.path.dirname(self.memory_file), exist_ok=True)
+        tmp_file = self.memory_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, indent=4, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.memory_file)
+        # Safe to drop now: every journal record is at or below the snapshot seq
+        open(self.journal_file, 'w').close()
+        self._journal_records = 0
+
+    def save_memory(self):
+        self.flush()
+        self.compact()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self.flush()
+        # Untouched memory is left as it is: importing this module must not rewrite the snapshot
+        with self._io_lock:
+            if self._journal_records:
+                self._compact()
 
 # Instantiate the memory object
 memory = Memory()
@@ -0,0 +1,167 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+# Seconds before an agent request is given up on
+DEADLINE = float(os.getenv("ORBITOS_AGENT_DEADLINE", "6"))
+# Seconds without an answer before a second, hedged request is sent (0 = off)
+HEDGE_AFTER = float(os.getenv("ORBITOS_AGENT_HEDGE_AFTER", "0"))
+
+# Structured output: Gemini must answer with exactly this shape
+RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "steps": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "id": {"type": "INTEGER"},
+                    "action": {"type": "STRING"},
+                    "app": {"type": "STRING", "nullable": True},
+                    "name": {"type": "STRING", "nullable": True},
+                    "query": {"type": "STRING", "nullable": True},
+                    "after": {"type": "ARRAY", "items": {"type": "INTEGER"}},
+                },
+                "required": ["id", "action"],
+            },
+        },
+        "confidence": {"type": "NUMBER"},
+    },
+    "required": ["steps", "confidence"],
+}
+
+
+class JsonObjectScanner:
+    """Finds the first complete top-level JSON object in streamed text."""
+
+    def __init__(self):
+        self.buffer = []
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, text):
+        """Returns the object's text once its closing brace arrives, else None."""
+        for ch in text:
+            if not self.started:
+                if ch != "{":
+                    continue
+                self.started = True
+            self.buffer.append(ch)
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == "{":
+                self.depth += 1
+            elif ch == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    return "".join(self.buffer)
+        return None
+
+
+class GeminiTransport:
+    """
+    Streams schema-constrained JSON from one shared client, returns as soon
+    as the object is complete, enforces a deadline and can hedge a slow call
+    with a second request.
+    """
+
+    def __init__(self, get_client, model=MODEL, deadline=DEADLINE, hedge_after=HEDGE_AFTER):
+        self.get_client = get_client
+        self.model = model
+        self.deadline = deadline
+        self.hedge_after = hedge_after
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gemini")
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "hedged": 0, "hedge_wins": 0, "timeouts": 0, "errors": 0}
+
+    def request(self, prompt: str) -> dict:
+        with self._lock:
+            self.counters["requests"] += 1
+        cancel = threading.Event()
+        started = time.monotonic()
+        expires = started + self.deadline
+        attempts = {self._pool.submit(self._attempt, prompt, cancel, expires): "primary"}
+        hedged = False
+
+        try:
+            while True:
+                remaining = self.deadline - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._count("timeouts")
+                    raise TimeoutError(f"Gemini did not answer within {self.deadline:.1f}s")
+
+                # At most one hedge per request, even after an attempt has failed
+                hedge_due = self.hedge_after > 0 and not hedged and len(attempts) == 1
+                timeout = min(remaining, max(self.hedge_after - (time.monotonic() - started), 0)) \
+                    if hedge_due else remaining
+                done, _ = wait(attempts, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    label = attempts.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception:
+                        self._count("errors")
+                        if not attempts:
+                            raise
+                        continue
+                    if label == "hedge":
+                        self._count("hedge_wins")
+                    return result
+
+                if not done and hedge_due and time.monotonic() - started >= self.hedge_after:
+                    self._count("hedged")
+                    hedged = True
+                    attempts[self._pool.submit(self._attempt, prompt, cancel, expires)] = "hedge"
+        finally:
+            # Whichever attempt lost stops reading its stream
+            cancel.set()
+
+    def _attempt(self, prompt, cancel, expires) -> dict:
+        client = self.get_client()
+        # The HTTP timeout ends a stalled stream too: cancel is only seen between chunks
+        timeout_ms = max(1, int((expires - time.monotonic()) * 1000))
+        stream = client.models.generate_content_stream(
+            model=self.model,
+            contents=prompt,
+            config={
+                "response_mime_type": "application/json",
+                "response_schema": RESPONSE_SCHEMA,
+                "http_options": {"timeout": timeout_ms},
+            },
+        )
+        scanner = JsonObjectScanner()
+        try:
+            for chunk in stream:
+                if cancel.is_set():
+                    break
+                complete = scanner.feed(chunk.text or "")
+                if complete is not None:
+                    return json.loads(complete)
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+        raise ValueError("Gemini stream ended without a complete JSON object")
+
+    def _count(self, key):
+        with self._lock:
+            self.counters[key] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
@@ -0,0 +1,186 @@
+"""
+Thin client for the headless server (core/server.py).
+
+    python -m core.client "open notepad" "list files"
+    python -m core.client --stats
+    python -m core.client --repeat 500 --concurrency 8 "list running apps"
+
+The last form sends the commands from several connections at once and
+prints throughput and latency percentiles.
+"""
+import argparse
+import itertools
+import json
+import os
+import secrets
+import socket
+import sys
+import threading
+import time
+
+# Unix socket path, or host:port for TCP (the default where there are no Unix sockets)
+DEFAULT_ADDRESS = "cache/orbitos.sock" if hasattr(socket, "AF_UNIX") else "127.0.0.1:8766"
+ADDRESS = os.getenv("ORBITOS_SERVER", DEFAULT_ADDRESS)
+# TCP connections must send this file's token first; only its owner can read it
+TOKEN_FILE = os.getenv("ORBITOS_SERVER_TOKEN", "cache/orbitos.token")
+
+
+def parse_address(address):
+    """("tcp", (host, port)) for host:port, else ("unix", path)."""
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        return "tcp", (host, int(port))
+    return "unix", address
+
+
+def read_token(path=TOKEN_FILE, create=False):
+    """The shared secret for TCP connections; the server creates it (mode 0600)."""
+    if create and not os.path.exists(path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+    with open(path, encoding="utf-8") as f:
+        return f.read().strip()
+
+
+class Client:
+    """One connection; requests are sent and answered one at a time."""
+
+    def __init__(self, address=ADDRESS, timeout=None, token_file=TOKEN_FILE):
+        kind, where = parse_address(address)
+        if kind == "tcp":
+            self._sock = socket.create_connection(where, timeout=timeout)
+        else:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(where)
+        self._file = self._sock.makefile("rb")
+        self._ids = itertools.count(1)
+        if kind == "tcp":
+            answer = self.request({"op": "auth", "token": read_token(token_file)})
+            if "error" in answer:
+                self.close()
+                raise ConnectionError(answer["error"])
+
+    def request(self, message, on_chunk=None) -> dict:
+        message = dict(message, id=next(self._ids))
+        self._sock.sendall(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+        while True:
+            line = self._file.readline()
+            if not line:
+                raise ConnectionError("Server closed the connection.")
+            answer = json.loads(line)
+            if "chunk" in answer:
+                if on_chunk is not None:
+                    on_chunk(answer["chunk"])
+                continue
+            return answer
+
+    def command(self, text, on_chunk=None) -> dict:
+        return self.request({"text": text, "stream": on_chunk is not None}, on_chunk)
+
+    def stats(self) -> dict:
+        return self.request({"op": "stats"})["stats"]
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---------------- THROUGHPUT ----------------
+
+def load(address, texts, repeat, concurrency) -> dict:
+    """Sends `repeat` commands (cycling through texts) from `concurrency` connections."""
+    todo = iter(itertools.islice(itertools.cycle(texts), repeat))
+    lock = threading.Lock()
+    latencies, states = [], {}
+
+    def worker():
+        with Client(address) as client:
+            while True:
+                with lock:
+                    text = next(todo, None)
+                if text is None:
+                    return
+                sent = time.perf_counter()
+                answer = client.command(text)
+                ms = (time.perf_counter() - sent) * 1000
+                with lock:
+                    latencies.append(ms)
+                    state = answer.get("state", "error")
+                    states[state] = states.get(state, 0) + 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    report = {"requests": len(latencies), "seconds": round(elapsed, 3),
+              "per_second": round(len(latencies) / elapsed, 1) if elapsed else 0.0, "states": states}
+    for pct in (50, 95, 99):
+        index = min(len(latencies) - 1, int(len(latencies) * pct / 100))
+        report[f"p{pct}_ms"] = round(latencies[index], 2) if latencies else 0.0
+    return report
+
+
+# ---------------- ENTRY POINT ----------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Send commands to a running OrbitOS server.")
+    parser.add_argument("texts", nargs="*", help="commands to run")
+    parser.add_argument("--address", default=ADDRESS)
+    parser.add_argument("--stats", action="store_true", help="print the server's metrics")
+    parser.add_argument("--repeat", type=int, default=0, help="send this many commands and report throughput")
+    parser.add_argument("--concurrency", type=int, default=4, help="connections used with --repeat")
+    parser.add_argument("--json", action="store_true", help="print raw replies")
+    args = parser.parse_args()
+
+    try:
+        if args.repeat:
+            if not args.texts:
+                parser.error("--repeat needs at least one command")
+            print(json.dumps(load(args.address, args.texts, args.repeat, args.concurrency), indent=2))
+            return 0
+
+        with Client(args.address) as client:
+            for text in args.texts:
+                chunks = []
+
+                def on_chunk(chunk):
+                    chunks.append(chunk)
+                    print(chunk, flush=True)
+
+                answer = client.command(text, None if args.json else on_chunk)
+                if args.json:
+                    print(json.dumps(answer, ensure_ascii=False))
+                elif "error" in answer:
+                    print("Error:", answer["error"])
+                else:
+                    # A streamed reply was already printed chunk by chunk
+                    result = answer["spoken"] if chunks else answer["result"]
+                    print(f"[{answer['state']} in {answer['timing']['total_ms']:.1f} ms] {result}")
+            if args.stats:
+                print(json.dumps(client.stats(), indent=2))
+    except (ConnectionError, FileNotFoundError, OSError) as e:
+        print(f"Cannot reach the OrbitOS server at {args.address}: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
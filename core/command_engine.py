@@ -1,126 +1,309 @@
+import contextvars
 import re
-import joblib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
-from skills import file_control, application_control
+from skills import file_control, application_control, browser_control
+from skills.app_catalog import catalog
+from skills.process_table import table
 
-# ---------------- GEMINI AGENT (PRIMARY) ----------------
+# ---------------- GEMINI AGENT (ESCALATION) ----------------
 from core.agent.agent import decide_action
 from core.agent.memory import memory
+from core.router import CascadeRouter, ACTION_INTENTS
+from core import online_learning, skill_pool
+from core.registry import components
+from core.tracing import tracer
+from core.entities import extractor, names_pronoun
+from core.multilingual import normalize
+from core.streaming import drain
+from core.speculation import speculator
 
 
-# ---------------- ML INTENT MODEL (FALLBACK) ----------------
-model = joblib.load("core/intent_model.pkl")
+# ---------------- ML INTENT MODEL (FIRST PASS) ----------------
+def _load_intent_model():
+    from core import intent_artifact
 
+    # The memory-mapped artifact opens in milliseconds; the pickle is the fallback
+    if intent_artifact.has_artifact():
+        try:
+            return intent_artifact.load_artifact()
+        except (OSError, ValueError, KeyError, intent_artifact.ArtifactError) as e:
+            print("Intent artifact unusable, loading the pickle:", e)
+    import joblib
+    return joblib.load("core/intent_model.pkl")
 
-def normalize_name(text: str) -> str:
-    """Extracts a filename or folder name from the command."""
-    text = text.lower()
 
-    replacements = {
-        " dot ": ".",
-        " underscore ": "_",
-        " dash ": "-",
-        " space ": ""
-    }
-    for k, v in replacements.items():
-        text = text.replace(k, v)
+def _create_intent_engine():
+    from core.intent_engine import IntentEngine
+    return IntentEngine(components.get("intent_model"))
 
-    text = re.sub(
-        r"\b(named|called|as|file|folder|directory|a|the|please|can you|could you|"
-        r"create|delete|make|remove)\b",
-        "",
-        text
-    )
 
-    text = re.sub(r"\s+", " ", text).strip()
-    parts = text.split()
-    return parts[-1] if parts else ""
+components.register("intent_model", _load_intent_model)
+components.register("intent_engine", _create_intent_engine)
 
+# ---------------- APPLICATION CATALOG ----------------
+components.register("app_catalog", catalog.load)
+components.register("process_table", table.start)
 
-def process_command(text: str) -> str:
-    """
-    Processes a command using:
-    1) Gemini agent (primary)
-    2) ML intent classifier (fallback)
-    """
-
-    # ================= GEMINI PATH =================
-    try:
-        decision = decide_action(text)
+# ---------------- CASCADE ROUTER ----------------
+components.register(
+    "router", lambda: CascadeRouter(components.get("intent_engine"), decide_action)
+)
 
-        if decision and decision.get("confidence", 0) >= 0.4:
-            action = decision.get("action")
-            app = decision.get("app") or memory.get_last_app()
-            query = decision.get("query")
 
-            if action == "open_app":
-                memory.update(app=app, action=action)
-                return application_control.open_app(app)
+# ---------------- ONLINE LEARNING (OPT-IN) ----------------
+def _install_intent_pipeline(pipeline, thresholds):
+    """Hot-swaps the classifier: new commands use it, running ones finish on the old one.
+    `thresholds` are the router's margin and floor on the new model's score scale."""
+    from core.intent_engine import IntentEngine
 
-            elif action == "close_app":
-                return application_control.close_app(app)
+    engine = IntentEngine(pipeline)
+    components.replace("intent_engine", engine)
+    router = components.get("router")
+    router.local_margin = thresholds["local_margin"]
+    router.local_floor = thresholds["local_floor"]
+    router.engine = engine
 
-            elif action == "switch_app":
-                memory.update(app=app, action=action)
-                return application_control.switch_to_app(app)
 
-            elif action == "list_installed":
-                return application_control.list_installed_apps()
+def _router_thresholds():
+    router = components.get("router")
+    return {"local_margin": router.local_margin, "local_floor": router.local_floor}
 
-            elif action == "list_running":
-                return application_control.list_running_apps()
 
-            elif action == "search":
-                return application_control.search_web(query)
+def _create_learner():
+    return online_learning.OnlineLearner(
+        _install_intent_pipeline, lambda: components.get("intent_engine"), _router_thresholds
+    ).start()
 
-    except Exception as e:
-        print("Gemini failed, falling back to ML:", e)
 
-    # ================= ML FALLBACK PATH =================
-    scores = model.decision_function([text])
-    confidence = scores.max()
-
-    if confidence < 0.4:
-        return "I'm not quite sure what you mean. Could you please rephrase that?"
-
-    intent = model.predict([text])[0]
+if online_learning.ENABLED:
+    components.register("learner", _create_learner)
+
+
+# ---------------- SKILL PROCESSES (OPT-IN) ----------------
+if skill_pool.ENABLED:
+    components.register("skill_pool", lambda: skill_pool.SkillPool().start())
+
+
+def _call(skill, *args, **kwargs):
+    """Runs a skill function, in a worker process when isolation is on."""
+    if skill_pool.ENABLED and skill_pool.isolated(skill):
+        return components.get("skill_pool").call(skill, *args, **kwargs)
+    return skill(*args, **kwargs)
+
+
+def learn_from(text: str, decision):
+    """Feeds confident Gemini decisions back to the classifier as labels."""
+    if not online_learning.ENABLED or not decision or decision.get("source") != "agent":
+        return
+    intent = ACTION_INTENTS.get(decision.get("action"))
+    if intent is not None:
+        # Learned in the form the router classifies: Telugu/Hindi normalized to English
+        components.get("learner").learn(normalize(text), intent, source="agent")
+
+
+def correct(text: str, intent: str):
+    """Records the intent a command should have had."""
+    if online_learning.ENABLED:
+        components.get("learner").learn(normalize(text), intent, source="user")
+
+
+def resource_key(text: str):
+    """What a command touches (app, file or folder name), used to order
+    commands on the same resource; None lets it run alongside anything."""
+    slots = extractor.extract(normalize(text))
+    key = slots.entry or (slots.app if slots.known_app else slots.name)
+    return key.lower() if key else None
+
+
+# ---------------- PLAN EXECUTOR ----------------
+_plan_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="plan")
+
+# Skills report most failures in their reply rather than by raising
+_failure = re.compile(
+    r"^(could not|couldn't|i could not|failed|sorry|i'm sorry|an (unexpected )?error|error:|please specify"
+    r"|no application window|no search query)|\b(not found|not currently running|is not a folder|not supported)\b",
+    re.IGNORECASE,
+)
+
+
+def failed_result(result) -> bool:
+    return bool(_failure.search(str(result)))
+
+
+def _plan_steps(steps) -> list:
+    """Steps with unique ids: a repeated or missing id gets a fresh one, and
+    "after" references to a repeated id mean its first step."""
+    seen, planned = set(), []
+    for i, step in enumerate(steps, 1):
+        sid = step.get("id", i)
+        if sid is None or sid in seen:
+            sid = ("step", i)
+        seen.add(sid)
+        planned.append(dict(step, id=sid, source="agent"))
+    return planned
+
+
+def _plan_dependencies(steps) -> dict:
+    """Declared "after" ids, plus an implicit edge between steps touching the
+    same app, file or folder so they keep the order the user said them in."""
+    ids = {step["id"] for step in steps}
+    deps = {}
+    last_by_target = {}
+    for step in steps:
+        needs = {d for d in step.get("after") or [] if d in ids and d != step["id"]}
+        target = (step.get("app") or step.get("name") or "").lower()
+        if target:
+            if target in last_by_target:
+                needs.add(last_by_target[target])
+            last_by_target[target] = step["id"]
+        deps[step["id"]] = needs
+    return deps
+
+
+def execute_plan(steps: list, text: str) -> str:
+    """Runs independent steps concurrently and dependent ones in order."""
+    steps = _plan_steps(steps)
+    deps = _plan_dependencies(steps)
+    results, failed = {}, set()
+    remaining = {step["id"]: step for step in steps}
+    running = {}
+
+    while remaining or running:
+        ready = [sid for sid in remaining if deps[sid] <= set(results)]
+        if not ready and not running:
+            # A dependency cycle: fall back to the order the steps were given
+            ready = [next(iter(remaining))]
+
+        for sid in ready:
+            step = remaining.pop(sid)
+            if deps[sid] & failed:
+                results[sid] = f"Skipped {step['action']} because an earlier step failed."
+                failed.add(sid)
+                continue
+            # Steps run on the plan pool but stay in the command's trace
+            running[_plan_pool.submit(contextvars.copy_context().run, execute, step, text)] = sid
+        if not running:
+            continue
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            sid = running.pop(future)
+            try:
+                results[sid] = future.result()
+                if failed_result(results[sid]):
+                    failed.add(sid)
+            except Exception as e:
+                results[sid] = f"Error: {e}"
+                failed.add(sid)
+
+    return "\n".join(f"{n}. {results[step['id']]}" for n, step in enumerate(steps, 1))
+
+
+def execute(decision: dict, text: str, on_chunk=None) -> str:
+    """Runs the skill behind a routed decision. Streaming skills are drained
+    here, their chunks passed to on_chunk as they arrive."""
+    action = decision.get("action")
+    if action == "plan":
+        return execute_plan(decision.get("steps", []), text)
+    with tracer.span(f"skill.{action}"):
+        return drain(_run_skill(action, decision, text), on_chunk)
+
+
+def _run_skill(action: str, decision: dict, text: str) -> str:
+    app = decision.get("app")
+    if not app and (decision.get("source") == "agent" or names_pronoun(text)):
+        # Follow-ups like "close it" refer to the last app used, also when
+        # Gemini was unavailable and the local model decided
+        app = memory.get_last_app()
+    # Local decisions leave it to the skill to parse the app from the text
+    app = app or text
+    query = decision.get("query") or text
 
     # -------- FILE OPERATIONS --------
-    if intent in {"CREATE_FILE", "DELETE_FILE", "CREATE_FOLDER", "DELETE_FOLDER"}:
-        name = normalize_name(text)
+    if action in {"create_file", "delete_file", "create_folder", "delete_folder"}:
+        name = decision.get("name")
+        if not name:
+            slots = extractor.extract(text)
+            # Deleting takes the existing entry of the right kind, creating the spoken name
+            kind = {"delete_file": "file", "delete_folder": "folder"}.get(action)
+            name = slots.entry if kind and slots.entry_kind == kind else slots.name
         if not name:
             return "Please specify a name for the file or folder."
 
-        if intent == "CREATE_FILE":
-            return file_control.create_file(name)
+        if action == "create_file":
+            return _call(file_control.create_file, name)
 
-        elif intent == "DELETE_FILE":
-            return file_control.delete_file(name)
+        elif action == "delete_file":
+            return _call(file_control.delete_file, name)
 
-        elif intent == "CREATE_FOLDER":
-            return file_control.create_folder(name)
+        elif action == "create_folder":
+            return _call(file_control.create_folder, name)
 
-        elif intent == "DELETE_FOLDER":
-            return file_control.delete_folder(name)
+        elif action == "delete_folder":
+            return _call(file_control.delete_folder, name)
 
-    elif intent == "LIST_FILES":
-        return file_control.list_items()
+    elif action == "undo_delete":
+        return file_control.undo_delete(decision.get("name"))
+
+    elif action == "list_files":
+        return _call(
+            file_control.list_items,
+            page=decision.get("page") or 1,
+            sort=decision.get("sort") or "name",
+            kind=decision.get("kind"),
+            pattern=decision.get("pattern"),
+        )
 
     # -------- APPLICATION CONTROL --------
-    elif intent == "OPEN_APPLICATION":
-        return application_control.open_app(text)
+    elif action == "open_app":
+        if decision.get("app"):
+            memory.update(app=app, action=action)
+        return _call(application_control.open_app, app)
+
+    elif action == "close_app":
+        return _call(application_control.close_app, app)
 
-    elif intent == "CLOSE_APPLICATION":
-        return application_control.close_app(text)
+    elif action == "switch_app":
+        if decision.get("app"):
+            memory.update(app=app, action=action)
+        return _call(application_control.switch_to_app, app)
 
-    elif intent == "SWITCH_APPLICATION":
-        return application_control.switch_to_app(text)
+    elif action == "list_installed":
+        return _call(application_control.list_installed_apps)
 
-    elif intent == "LIST_INSTALLED_APPLICATIONS":
-        return application_control.list_installed_apps()
+    elif action == "list_running":
+        return _call(application_control.list_running_apps)
 
-    elif intent == "LIST_RUNNING_APPLICATIONS":
-        return application_control.list_running_apps()
+    elif action == "search":
+        return _call(browser_control.search_in_browser, query)
 
     # -------- FINAL FALLBACK --------
     return "I'm sorry, I don't know how to do that yet."
+
+
+def process_command(text: str, on_chunk=None) -> str:
+    """
+    Processes a command through the cascade router:
+    1) ML intent classifier when it is clearly confident
+    2) Gemini agent for ambiguous input
+    3) ML intent classifier as a fallback
+    Partial results of streaming skills go to on_chunk(text) as they arrive.
+    """
+    with tracer.span("route") as span:
+        # Routed already while the user was still speaking?
+        speculated, decision = speculator.take(text)
+        if not speculated:
+            decision = components.get("router").route(text)
+        span["source"] = decision and decision.get("source")
+        span["speculated"] = speculated
+    if decision is None:
+        result = "I'm not quite sure what you mean. Could you please rephrase that?"
+    else:
+        # Skills parse names from the English form of Telugu/Hindi commands
+        result = execute(decision, normalize(text), on_chunk)
+        learn_from(text, decision)
+
+    memory.update(user=text, agent=result, action=decision and decision.get("action"))
+    speculator.observe(decision)
+    return result
@@ -0,0 +1,251 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+from skills import file_control
+from skills.app_catalog import catalog, normalize
+
+# Spoken punctuation glued into the surrounding word: "report dot txt" -> "report.txt"
+SPOKEN_PUNCTUATION = {"dot": ".", "underscore": "_", "dash": "-", "hyphen": "-", "space": ""}
+# Words after which the rest of the utterance is the name
+NAME_MARKERS = {"named", "called", "titled"}
+# Command and filler words that are never part of a slot at its edges
+COMMAND_WORDS = {
+    "open", "close", "run", "launch", "start", "terminate", "kill", "exit", "quit",
+    "switch", "focus", "move", "activate", "bring", "go", "create", "make", "add",
+    "new", "delete", "remove", "erase", "please", "can", "could", "would", "will",
+    "you", "me", "for", "to", "on", "up", "a", "an", "the", "my", "this", "that",
+    "app", "application", "program", "file", "folder", "directory", "as", "now", "with",
+}
+FOLDER_WORDS = {"folder", "directory"}
+# Targets that refer back to something said earlier: "close it", "switch to that"
+PRONOUNS = {"it", "this", "that", "them", "those", "these", "there"}
+MEMO_SIZE = 256
+
+_token = re.compile(r"[\w][\w.\-]*")
+
+
+class Slots(NamedTuple):
+    app: str | None             # known app name when one was said, else the spoken words
+    name: str | None            # spoken file or folder name, punctuation applied
+    entry: str | None           # existing entry of the working directory the whole name refers to
+    kind: str | None            # "file", "folder" or None
+    entry_kind: str | None      # "file" or "folder" when entry is set
+    known_app: bool             # app came from the gazetteer
+
+
+def tokenize(text: str) -> list:
+    """Words with spoken punctuation glued in, in one pass."""
+    tokens, glue = [], False
+    for token in _token.findall(text):
+        token = token.rstrip(".")
+        if not token:
+            continue
+        mark = SPOKEN_PUNCTUATION.get(token.lower())
+        if mark is not None and tokens:
+            tokens[-1] += mark
+            glue = True
+            continue
+        if glue:
+            tokens[-1] += token
+            glue = False
+        else:
+            tokens.append(token)
+    return tokens
+
+
+# ---------------- GAZETTEER ---------------- #
+
+class Gazetteer:
+    """Aho-Corasick automaton over word tokens: finds every known phrase in
+    an utterance in one pass, however many phrases there are."""
+
+    def __init__(self, phrases):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]      # (phrase length, value) ending at each state
+        for words, value in phrases:
+            if words:
+                self._add(words, value)
+        self._link()
+
+    def _add(self, words, value):
+        state = 0
+        for word in words:
+            nxt = self._goto[state].get(word)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][word] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(words), value))
+
+    def _link(self):
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for word, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(word, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt].extend(self._out[self._fail[nxt]])
+
+    def step(self, state, word) -> int:
+        while state and word not in self._goto[state]:
+            state = self._fail[state]
+        return self._goto[state].get(word, 0)
+
+    def matches(self, state) -> list:
+        return self._out[state]
+
+
+def _longest(matches):
+    """Leftmost-longest match, or None."""
+    return min(matches, key=lambda m: (-(m[1] - m[0]), m[0]), default=None)
+
+
+# ---------------- EXTRACTOR ---------------- #
+
+class EntityExtractor:
+    """
+    App, file and folder slots from an utterance. Known app names (catalog
+    and aliases) and the working directory's entries are matched with two
+    gazetteers stepped together over the tokens; whatever is left after the
+    command words is the slot when nothing known matches.
+    """
+
+    def __init__(self, memo_size=MEMO_SIZE):
+        self.memo_size = memo_size
+        self._apps = None
+        self._apps_version = None
+        self._entries = None
+        self._entries_version = None
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---------------- GAZETTEERS ----------------
+
+    def _app_gazetteer(self):
+        version, phrases = catalog.phrases()
+        if version != self._apps_version:
+            self._apps = Gazetteer(
+                (tuple(phrase.split()), phrase)
+                for phrase in phrases
+                # "make", "file", "kill"... are PATH executables but mean nothing here
+                if phrase not in COMMAND_WORDS
+            )
+            self._apps_version = version
+        return self._apps, version
+
+    def _entry_gazetteer(self):
+        try:
+            version = file_control.entry_names()
+        except OSError:
+            return None, None
+        path, mtime, names, folders = version
+        if (path, mtime) != self._entries_version:
+            stems = {}
+            for name in names:
+                stem, ext = name.rsplit(".", 1) if "." in name[1:] else (name, "")
+                if ext:
+                    stems.setdefault(stem.lower(), []).append(name)
+            kinds = {name: "folder" if name in folders else "file" for name in names}
+            phrases = [(tuple(t.lower() for t in tokenize(name)), (name, kinds[name])) for name in names]
+            # "delete the report" finds report.txt when no other file is called report
+            phrases += [
+                (tuple(stem.split()), (found[0], "file")) for stem, found in stems.items()
+                if len(found) == 1 and stem not in {n.lower() for n in names}
+            ]
+            self._entries = Gazetteer(phrases)
+            self._entries_version = (path, mtime)
+        return self._entries, self._entries_version
+
+    # ---------------- EXTRACTION ----------------
+
+    def extract(self, text: str) -> Slots:
+        with self._lock:
+            apps, app_version = self._app_gazetteer()
+            entries, entry_version = self._entry_gazetteer()
+            key = (text, app_version, entry_version)
+            cached = self._memo.get(key)
+            if cached is not None:
+                self._memo.move_to_end(key)
+                return cached
+
+        tokens = tokenize(text)
+        lowered = [t.lower() for t in tokens]
+
+        app_matches, entry_matches = [], []
+        app_state = entry_state = 0
+        app_words = 0
+        for i, word in enumerate(lowered):
+            # Catalog names are normalized: "gnome-terminal" is "gnome terminal"
+            for part in normalize(word).split():
+                app_state = apps.step(app_state, part)
+                app_words += 1
+                for length, value in apps.matches(app_state):
+                    app_matches.append((app_words - length, app_words, value))
+            if entries is not None:
+                entry_state = entries.step(entry_state, word)
+                for length, value in entries.matches(entry_state):
+                    entry_matches.append((i + 1 - length, i + 1, value))
+
+        start, end = self._free_span(lowered)
+        free = " ".join(tokens[start:end]) or None
+        kind = "folder" if FOLDER_WORDS & set(lowered) else "file" if "file" in lowered else None
+        app = _longest(app_matches)
+        # Only an entry spanning the whole spoken name, and of the kind that was said:
+        # "delete folder notes backup" must not fall back to the folder "notes"
+        entry, entry_kind = next((value for first, last, value in entry_matches
+                                  if (first, last) == (start, end) and kind in (None, value[1])), (None, None))
+        slots = Slots(
+            app=app[2] if app else free,
+            name=free,
+            entry=entry,
+            kind=kind,
+            entry_kind=entry_kind,
+            known_app=app is not None,
+        )
+
+        with self._lock:
+            self._memo[key] = slots
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return slots
+
+    @staticmethod
+    def _free_span(lowered):
+        """(start, end) of the words after the last "named"/"called", else of
+        those left once the command words are trimmed from both ends."""
+        start = 0
+        for i, word in enumerate(lowered):
+            if word in NAME_MARKERS:
+                start = i + 1
+        end = len(lowered)
+        while start < end and lowered[start] in COMMAND_WORDS:
+            start += 1
+        while end > start and lowered[end - 1] in COMMAND_WORDS:
+            end -= 1
+        return start, end
+
+    def app(self, text: str):
+        return self.extract(text).app
+
+
+def names_pronoun(text: str) -> bool:
+    """True when the only target in an utterance is a pronoun; found without looking anything up."""
+    lowered = [t.lower() for t in tokenize(text)]
+    start, end = EntityExtractor._free_span(lowered)
+    if start < end:
+        return " ".join(lowered[start:end]) in PRONOUNS
+    # "this" and "that" are trimmed as filler, so "close that" has no slot left
+    return bool(lowered) and lowered[-1] in PRONOUNS
+
+
+# Instantiate the shared extractor
+extractor = EntityExtractor()
@@ -0,0 +1,263 @@
+"""
+Compact, pickle-free intent model: the fitted TF-IDF vocabulary, idf vector
+and LinearSVC coefficients stored as .npy arrays next to a JSON manifest.
+Arrays are memory-mapped, so loading takes milliseconds and needs neither
+scikit-learn nor unpickling.
+
+Check that the committed artifact scores like the pickle (read-only), or
+re-export it from the pickle first:
+    python -m core.intent_artifact
+    python -m core.intent_artifact --export
+"""
+import json
+import math
+import os
+import re
+import time
+
+import numpy as np
+
+ARTIFACT_DIR = "core/intent_model"
+FORMAT = "orbitos-intent-tfidf-linear"
+FORMAT_VERSION = 1
+FILES = {"vocab": "vocab.npy", "idf": "idf.npy", "coef": "coef.npy", "intercept": "intercept.npy"}
+# Largest score difference from the pickle that still counts as identical
+PARITY_TOLERANCE = 1e-9
+
+
+class ArtifactError(Exception):
+    pass
+
+
+# ---------------- EXPORT ----------------
+
+def export_artifact(pipeline, directory=ARTIFACT_DIR) -> dict:
+    """Writes the fitted TF-IDF + linear pipeline as a compact artifact."""
+    vectorizer, classifier = pipeline[0], pipeline[-1]
+    params = vectorizer.get_params()
+    if params["analyzer"] != "word" or params["tokenizer"] is not None or params["preprocessor"] is not None \
+            or params["strip_accents"] is not None or params["binary"]:
+        raise ArtifactError("Only word analyzers with the default tokenizer can be exported")
+
+    # sklearn numbers features in sorted term order, so the column is the position
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    stop_words = vectorizer.get_stop_words()
+    arrays = {
+        "vocab": np.array(terms, dtype=str),
+        "idf": np.asarray(vectorizer.idf_, dtype=np.float64),
+        # One row per feature: scoring gathers the rows of the terms present
+        "coef": np.ascontiguousarray(np.asarray(classifier.coef_, dtype=np.float64).T),
+        "intercept": np.asarray(classifier.intercept_, dtype=np.float64),
+    }
+    if list(arrays["vocab"]) != sorted(terms):
+        raise ArtifactError("Vocabulary columns are not in sorted term order")
+
+    import sklearn
+
+    manifest = {
+        "format": FORMAT,
+        "version": FORMAT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "sklearn_version": sklearn.__version__,
+        "classes": [str(c) for c in classifier.classes_],
+        "n_features": len(terms),
+        "lowercase": params["lowercase"],
+        "token_pattern": params["token_pattern"],
+        "ngram_range": list(params["ngram_range"]),
+        "stop_words": sorted(stop_words) if stop_words else [],
+        "sublinear_tf": params["sublinear_tf"],
+        "use_idf": params["use_idf"],
+        "norm": params["norm"],
+        "files": FILES,
+    }
+
+    os.makedirs(directory, exist_ok=True)
+    for name, filename in FILES.items():
+        path = os.path.join(directory, filename)
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, arrays[name], allow_pickle=False)
+        os.replace(path + ".tmp", path)
+    # Manifest last: a half-written export is never picked up
+    path = os.path.join(directory, "manifest.json")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+    return manifest
+
+
+# ---------------- LOAD ----------------
+
+def has_artifact(directory=ARTIFACT_DIR) -> bool:
+    return os.path.exists(os.path.join(directory, "manifest.json"))
+
+
+def load_artifact(directory=ARTIFACT_DIR):
+    with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT or manifest.get("version") != FORMAT_VERSION:
+        raise ArtifactError(f"Unsupported intent artifact {manifest.get('format')} v{manifest.get('version')}")
+
+    arrays = {
+        name: np.load(os.path.join(directory, filename), mmap_mode="r", allow_pickle=False)
+        for name, filename in manifest["files"].items()
+    }
+    n_features, n_classes = manifest["n_features"], len(manifest["classes"])
+    if arrays["vocab"].shape != (n_features,) or arrays["coef"].shape != (n_features, n_classes) \
+            or arrays["idf"].shape != (n_features,) or arrays["intercept"].shape != (n_classes,):
+        raise ArtifactError("Intent artifact arrays do not match the manifest")
+    return CompactIntentModel(manifest, arrays)
+
+
+class CompactVectorizer:
+    """Re-implements TfidfVectorizer.transform for the exported settings.
+    Rows are (feature indices, weights) pairs instead of a sparse matrix."""
+
+    def __init__(self, manifest, vocab, idf):
+        self.vocab = vocab
+        self.idf = idf
+        self.lowercase = manifest["lowercase"]
+        self.token_pattern = re.compile(manifest["token_pattern"])
+        self.min_n, self.max_n = manifest["ngram_range"]
+        self.stop_words = frozenset(manifest["stop_words"])
+        self.sublinear_tf = manifest["sublinear_tf"]
+        self.use_idf = manifest["use_idf"]
+        self.norm = manifest["norm"]
+
+    def analyze(self, text: str) -> list:
+        if self.lowercase:
+            text = text.lower()
+        tokens = [t for t in self.token_pattern.findall(text) if t not in self.stop_words]
+        grams = []
+        for n in range(self.min_n, min(self.max_n, len(tokens)) + 1):
+            grams.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return grams
+
+    def transform(self, texts) -> list:
+        rows = []
+        for text in texts:
+            counts = {}
+            grams = self.analyze(text)
+            if grams:
+                positions = np.searchsorted(self.vocab, grams)
+                for gram, pos in zip(grams, positions):
+                    if pos < len(self.vocab) and self.vocab[pos] == gram:
+                        counts[int(pos)] = counts.get(int(pos), 0) + 1
+
+            indices = np.fromiter(sorted(counts), dtype=np.intp, count=len(counts))
+            weights = np.array([counts[i] for i in indices], dtype=np.float64)
+            if self.sublinear_tf:
+                weights = np.log(weights) + 1 if len(weights) else weights
+            if self.use_idf:
+                weights = weights * self.idf[indices]
+            if self.norm == "l2":
+                length = math.sqrt(float(weights @ weights)) if len(weights) else 0.0
+                if length > 0:
+                    weights = weights / length
+            elif self.norm == "l1":
+                length = float(np.abs(weights).sum())
+                if length > 0:
+                    weights = weights / length
+            rows.append((indices, weights))
+        return rows
+
+
+class CompactClassifier:
+    """decision_function of a linear model over CompactVectorizer rows."""
+
+    def __init__(self, classes, coef, intercept):
+        self.classes_ = classes
+        self.coef = coef
+        self.intercept = np.asarray(intercept)
+
+    def decision_function(self, rows) -> np.ndarray:
+        scores = np.empty((len(rows), len(self.classes_)))
+        for i, (indices, weights) in enumerate(rows):
+            scores[i] = weights @ self.coef[indices] + self.intercept
+        return scores
+
+    def predict(self, rows) -> np.ndarray:
+        return self.classes_[self.decision_function(rows).argmax(axis=1)]
+
+
+class CompactIntentModel:
+    """Loaded artifact; IntentEngine uses .vectorizer and .classifier."""
+
+    def __init__(self, manifest, arrays):
+        self.manifest = manifest
+        self.vectorizer = CompactVectorizer(manifest, arrays["vocab"], arrays["idf"])
+        self.classifier = CompactClassifier(np.array(manifest["classes"]), arrays["coef"], arrays["intercept"])
+
+    @property
+    def classes_(self):
+        return self.classifier.classes_
+
+    def decision_function(self, texts) -> np.ndarray:
+        return self.classifier.decision_function(self.vectorizer.transform(texts))
+
+    def predict(self, texts) -> np.ndarray:
+        return self.classifier.predict(self.vectorizer.transform(texts))
+
+
+# ---------------- PARITY ----------------
+
+def check_parity(pipeline, model, texts) -> dict:
+    """Compares the artifact with the pipeline it came from on every text."""
+    texts = list(texts)
+    expected = pipeline.decision_function(texts)
+    actual = model.decision_function(texts)
+    mismatched = [
+        text for text, e, a in zip(texts, expected.argmax(axis=1), actual.argmax(axis=1)) if e != a
+    ]
+    max_diff = float(np.abs(expected - actual).max()) if texts else 0.0
+    return {
+        "texts": len(texts),
+        "mismatched": mismatched,
+        "max_score_diff": max_diff,
+        "ok": not mismatched and max_diff <= PARITY_TOLERANCE,
+    }
+
+
+def dataset_sentences() -> list:
+    """Every sentence the shipped model is trained on: English, plus Telugu/Hindi
+    in the normalized form the app classifies."""
+    import csv
+
+    from core.multilingual import normalize
+
+    with open("data/commands.csv", newline="", encoding="utf-8") as f:
+        sentences = [row["sentence"] for row in csv.DictReader(f)]
+    with open("data/commands_multilingual.csv", newline="", encoding="utf-8") as f:
+        sentences += [normalize(row["sentence"]) for row in csv.DictReader(f)]
+    return sentences
+
+
+def main(argv=None):
+    import argparse
+
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Check the intent artifact against the pickle.")
+    parser.add_argument("--export", action="store_true", help="re-export the artifact from the pickle first")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    pipeline = joblib.load("core/intent_model.pkl")
+    pickle_ms = (time.perf_counter() - started) * 1000
+
+    if args.export:
+        manifest = export_artifact(pipeline)
+        print(f"Exported {manifest['n_features']} features x {len(manifest['classes'])} classes to {ARTIFACT_DIR}")
+    started = time.perf_counter()
+    model = load_artifact()
+    artifact_ms = (time.perf_counter() - started) * 1000
+
+    parity = check_parity(pipeline, model, dataset_sentences())
+    print(f"Load time: pickle {pickle_ms:.1f} ms (sklearn import included), artifact {artifact_ms:.1f} ms")
+    print(f"Parity over {parity['texts']} sentences: {len(parity['mismatched'])} mismatched, "
+          f"max score difference {parity['max_score_diff']:.2e}")
+    if not parity["ok"]:
+        raise SystemExit("Artifact does not match the pickle")
+
+
+if __name__ == "__main__":
+    main()
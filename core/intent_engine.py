@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+
+
+class IntentResult(NamedTuple):
+    intent: str
+    score: float
+    margin: float
+    runner_up: str
+    runner_up_score: float
+
+
+class IntentEngine:
+    """
+    Single-pass inference around the trained TF-IDF + LinearSVC pipeline
+    (an sklearn Pipeline or the compact artifact from core.intent_artifact).
+    Each utterance is vectorized once and scored once; intent, margin and
+    runner-up all come from the same score row.
+    """
+
+    def __init__(self, pipeline, memo_size=256):
+        self.pipeline = pipeline
+        self.memo_size = memo_size
+        if hasattr(pipeline, "vectorizer"):
+            self._vectorizer = pipeline.vectorizer
+            self._classifier = pipeline.classifier
+        else:
+            self._vectorizer = pipeline[:-1]
+            self._classifier = pipeline[-1]
+        self._classes = np.asarray(self._classifier.classes_)
+
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def classes_(self):
+        return self._classes
+
+    @staticmethod
+    def _key(text: str) -> str:
+        # The vectorizer lowercases and tokenizes on words, so neither case
+        # nor extra whitespace can change the scores
+        return " ".join(text.lower().split())
+
+    # ---------------- INFERENCE ----------------
+
+    def scores(self, texts) -> np.ndarray:
+        """Raw decision scores, one row per text and one column per class."""
+        return self._classifier.decision_function(self._vectorizer.transform(texts))
+
+    def predict(self, text: str) -> IntentResult:
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts) -> list:
+        """Scores many utterances with one vectorizer and one classifier call."""
+        keys = [self._key(t) for t in texts]
+        results = [None] * len(keys)
+        todo = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._memo.get(key)
+                if cached is not None:
+                    self._memo.move_to_end(key)
+                    self.hits += 1
+                    results[i] = cached
+                else:
+                    todo.setdefault(key, []).append(i)
+            self.misses += sum(len(v) for v in todo.values())
+
+        if todo:
+            fresh = self._rank(self.scores(list(todo)))
+            with self._lock:
+                for (key, positions), result in zip(todo.items(), fresh):
+                    for i in positions:
+                        results[i] = result
+                    self._remember(key, result)
+        return results
+
+    def _rank(self, scores: np.ndarray) -> list:
+        order = np.argsort(-scores, axis=1)
+        rows = np.arange(scores.shape[0])
+        best, second = order[:, 0], order[:, 1]
+        best_scores, second_scores = scores[rows, best], scores[rows, second]
+
+        return [
+            IntentResult(
+                intent=str(self._classes[b]),
+                score=float(bs),
+                margin=float(bs - ss),
+                runner_up=str(self._classes[s]),
+                runner_up_score=float(ss),
+            )
+            for b, s, bs, ss in zip(best, second, best_scores, second_scores)
+        ]
+
+    # ---------------- MEMO ----------------
+
+    def _remember(self, key, result):
+        if self.memo_size <= 0:
+            return
+        self._memo[key] = result
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+
+    def clear_memo(self):
+        with self._lock:
+            self._memo.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"memo_entries": len(self._memo), "hits": self.hits, "misses": self.misses}
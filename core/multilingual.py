@@ -0,0 +1,306 @@
+"""
+Local normalization of Telugu and Hindi commands into the English the intent
+classifier and entity extractor were built for: a verb/noun lexicon (native
+script and romanized), subject-object-verb clauses reordered verb first, and
+the remaining native-script words (app, file and folder names) transliterated.
+
+    "notepad తెరవండి"            -> "open notepad"
+    "report नाम की फ़ाइल बनाओ"    -> "create file called report"
+    "chrome band karo"           -> "close chrome"
+
+English input comes back unchanged. Gemini still receives the original text.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+# Scripts handled here (Unicode blocks)
+DEVANAGARI = (0x0900, 0x097F)
+TELUGU = (0x0C00, 0x0C7F)
+MEMO_SIZE = 1024
+
+# Lexicon entries are (English word, role). Verbs move to the front of their
+# clause, markers ("named") put the name after the noun, particles are dropped.
+VERB, NOUN, MODIFIER, MARKER, PARTICLE, CONJUNCTION = "verb", "noun", "modifier", "marker", "particle", "conjunction"
+
+_LEXICON = {
+    # ---- verbs ----
+    "open": VERB, "close": VERB, "create": VERB, "delete": VERB,
+    "show": VERB, "switch to": VERB, "search": VERB,
+    # ---- nouns ----
+    "file": NOUN, "files": NOUN, "folder": NOUN, "folders": NOUN,
+    "app": NOUN, "apps": NOUN, "applications": NOUN, "program": NOUN,
+    # ---- modifiers ----
+    "running": MODIFIER, "installed": MODIFIER, "all": MODIFIER, "new": MODIFIER,
+    # ---- the rest ----
+    "called": MARKER, "": PARTICLE, "and": CONJUNCTION, "then": CONJUNCTION,
+}
+
+# Spoken form -> English word. Multi-word forms are matched longest first.
+WORDS = {
+    "open": [
+        # Hindi
+        "खोलो", "खोलें", "खोलिए", "खोलिये", "खोल", "ओपन", "चलाओ", "चलाएं",
+        "kholo", "kholiye", "khol", "khol do", "chalao", "chala do",
+        # Telugu
+        "తెరువు", "తెరవు", "తెరవండి", "తెరువండి", "తెరిచి", "ఓపెన్", "ప్రారంభించు", "ప్రారంభించండి",
+        "teruvu", "teravu", "teravandi", "teruvandi",
+    ],
+    "close": [
+        "बंद", "band karo", "band kar", "band kijiye", "band do",
+        "మూసివేయి", "మూసివేయండి", "మూసేయి", "మూసేయండి", "మూయి", "మూయండి", "క్లోజ్",
+        "moosiveyi", "musiveyi", "moosiveyandi", "mooseyi", "museyi",
+    ],
+    "create": [
+        "बनाओ", "बनाएं", "बनाएँ", "बनाइए", "बनाइये", "बना", "क्रिएट",
+        "banao", "banaiye", "banaye", "bana do",
+        "సృష్టించు", "సృష్టించండి", "తయారుచేయి", "తయారు చేయి", "తయారు చేయండి", "క్రియేట్",
+        "srushtinchu", "srushtinchandi", "tayaru cheyi",
+    ],
+    "delete": [
+        "हटाओ", "हटाएं", "हटाइए", "हटा", "मिटाओ", "मिटाएं", "मिटा", "डिलीट",
+        "hatao", "hataiye", "hata do", "mitao", "mita do",
+        "తొలగించు", "తొలగించండి", "డిలీట్",
+        "tolaginchu", "tolaginchandi",
+    ],
+    "show": [
+        "दिखाओ", "दिखाएं", "दिखाइए", "दिखा", "बताओ", "बताएं", "सूची",
+        "dikhao", "dikhaiye", "dikha do", "batao",
+        "చూపించు", "చూపించండి", "చూపు", "చూపండి", "జాబితా",
+        "chupinchu", "choopinchu", "chupinchandi", "chupu",
+    ],
+    "switch to": [
+        "switch", "स्विच", "बदलो", "जाओ", "जाएं",
+        "badlo", "jao",
+        "మారు", "మారండి", "మార్చు", "స్విచ్", "వెళ్ళు", "వెళ్లు",
+        "maaru", "maru", "marandi", "vellu",
+    ],
+    "search": [
+        "खोजो", "खोजें", "ढूंढो", "ढूँढो", "सर्च",
+        "khojo", "dhundo", "dhoondo",
+        "వెతుకు", "వెతకండి", "సెర్చ్",
+        "vetuku", "vetakandi",
+    ],
+    "file": ["फ़ाइल", "फाइल", "ఫైల్", "ఫైలు"],
+    "files": [
+        "फ़ाइलें", "फ़ाइलों", "फाइलें", "फाइलों", "फ़ाइल्स",
+        "ఫైల్స్", "ఫైళ్ళు", "ఫైళ్లు", "ఫైళ్ళ", "ఫైల్‌లు", "ఫైల్లు",
+    ],
+    "folder": ["फ़ोल्डर", "फोल्डर", "ఫోల్డర్", "ఫోల్డరు"],
+    "folders": ["फ़ोल्डरों", "फ़ोल्डर्स", "ఫోల్డర్లు", "ఫోల్డర్‌లు"],
+    "app": ["ऐप", "एप", "యాప్"],
+    "apps": ["ऐप्स", "एप्स", "ऐप्लिकेशन", "एप्लिकेशन", "యాప్స్", "యాప్‌లు", "యాప్లు", "అప్లికేషన్", "అప్లికేషన్లు"],
+    "program": ["प्रोग्राम", "ప్రోగ్రామ్"],
+    "running": [
+        "चल", "चालू", "chal", "chalu", "chal rahe", "chal rahi",
+        "నడుస్తున్న", "రన్ అవుతున్న", "నడుస్తున్నవి", "nadustunna",
+    ],
+    "installed": [
+        "इंस्टॉल", "इंस्टाल", "इंस्टॉल्ड",
+        "ఇన్‌స్టాల్", "ఇన్స్టాల్", "install chesina",
+    ],
+    "all": ["सभी", "सारी", "सारे", "सब", "sabhi", "saari", "saare", "అన్ని", "అన్నీ", "anni"],
+    "new": ["नई", "नया", "नए", "nayi", "naya", "కొత్త", "kotta", "kottha"],
+    "called": ["नाम", "नामक", "naam", "naam ki", "naam ka", "naam se", "అనే", "పేరుతో", "ane", "perutho"],
+    "and": ["और", "aur", "మరియు", "mariyu"],
+    "then": ["फिर", "उसके बाद", "phir", "fir", "తర్వాత", "తరువాత", "tarvata"],
+    "": [
+        # Hindi postpositions, light verbs and politeness
+        "की", "का", "के", "को", "में", "पर", "से", "एक", "यह", "इस", "इन", "करो", "करें", "करिए",
+        "कीजिए", "कर", "दो", "दें", "दीजिए", "रहे", "रही", "रहा", "हुए", "किए", "गए", "गई", "गया",
+        "है", "हैं", "कृपया", "ज़रा", "वाले", "वाली", "कौन", "कौनसे", "अभी",
+        "karo", "karen", "kijiye", "kar", "ki", "ka", "ke", "ko", "mein", "par", "pe", "se",
+        "rahe", "rahi", "hai", "hain", "kripya", "zara", "abhi",
+        # Telugu case endings, light verbs and politeness
+        "కి", "కు", "ని", "ను", "లో", "ఈ", "ఆ", "ఒక", "చేయి", "చేయండి", "చెయ్యి", "చేసిన", "అయిన",
+        "అవుతున్న", "దయచేసి", "ఉన్న", "ఏ", "ఇప్పుడు",
+        "cheyi", "cheyandi", "cheyyi", "chesina", "ayina", "lo", "ku", "daya chesi", "dayachesi",
+    ],
+}
+
+# Common app names as they are written in the two scripts
+APP_NAMES = {
+    "chrome": ["क्रोम", "క్రోమ్"],
+    "firefox": ["फ़ायरफ़ॉक्स", "फायरफॉक्स", "ఫైర్‌ఫాక్స్", "ఫైర్ఫాక్స్"],
+    "notepad": ["नोटपैड", "నోట్‌ప్యాడ్", "నోట్ప్యాడ్"],
+    "calculator": ["कैलकुलेटर", "కాలిక్యులేటర్", "క్యాలిక్యులేటర్"],
+    "terminal": ["टर्मिनल", "టెర్మినల్"],
+    "spotify": ["स्पॉटिफाई", "స్పాటిఫై"],
+    "vs code": ["वीएस कोड", "వీఎస్ కోడ్"],
+    "word": ["वर्ड", "వర్డ్"],
+    "excel": ["एक्सेल", "ఎక్సెల్"],
+    "whatsapp": ["व्हाट्सएप", "వాట్సాప్"],
+    "telegram": ["टेलीग्राम", "టెలిగ్రామ్"],
+    "settings": ["सेटिंग्स", "సెట్టింగ్స్"],
+    "explorer": ["एक्सप्लोरर", "ఎక్స్‌ప్లోరర్"],
+}
+
+# ---------------- TRANSLITERATION ----------------
+
+_CONSONANTS = {
+    # Devanagari
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n", "च": "ch", "छ": "chh", "ज": "j", "झ": "jh",
+    "ञ": "n", "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n", "त": "t", "थ": "th", "द": "d",
+    "ध": "dh", "न": "n", "प": "p", "फ": "ph", "ब": "b", "भ": "bh", "म": "m", "य": "y", "र": "r",
+    "ल": "l", "ळ": "l", "व": "v", "श": "sh", "ष": "sh", "स": "s", "ह": "h",
+    # Telugu
+    "క": "k", "ఖ": "kh", "గ": "g", "ఘ": "gh", "ఙ": "n", "చ": "ch", "ఛ": "chh", "జ": "j", "ఝ": "jh",
+    "ఞ": "n", "ట": "t", "ఠ": "th", "డ": "d", "ఢ": "dh", "ణ": "n", "త": "t", "థ": "th", "ద": "d",
+    "ధ": "dh", "న": "n", "ప": "p", "ఫ": "f", "బ": "b", "భ": "bh", "మ": "m", "య": "y", "ర": "r",
+    "ఱ": "r", "ల": "l", "ళ": "l", "వ": "v", "శ": "sh", "ష": "sh", "స": "s", "హ": "h",
+}
+# Devanagari nukta forms: फ़ -> f, ज़ -> z...
+_NUKTA = {"क": "q", "ख": "kh", "ग": "g", "ज": "z", "ड": "r", "ढ": "rh", "फ": "f"}
+_VOWELS = {
+    "अ": "a", "आ": "a", "इ": "i", "ई": "i", "उ": "u", "ऊ": "u", "ऋ": "ri", "ए": "e", "ऐ": "ai",
+    "ओ": "o", "औ": "au", "ऑ": "o",
+    "అ": "a", "ఆ": "a", "ఇ": "i", "ఈ": "i", "ఉ": "u", "ఊ": "u", "ఋ": "ru", "ఎ": "e", "ఏ": "e",
+    "ఐ": "ai", "ఒ": "o", "ఓ": "o", "ఔ": "au",
+}
+_VOWEL_SIGNS = {
+    "ा": "a", "ि": "i", "ी": "i", "ु": "u", "ू": "u", "ृ": "ri", "े": "e", "ै": "ai", "ो": "o",
+    "ौ": "au", "ॉ": "o", "ॅ": "e",
+    "ా": "a", "ి": "i", "ీ": "i", "ు": "u", "ూ": "u", "ృ": "ru", "ె": "e", "ే": "e", "ై": "ai",
+    "ొ": "o", "ో": "o", "ౌ": "au",
+}
+_VIRAMA = {"्", "్"}
+_NUKTA_SIGN = "़"
+_NASALS = {"ं": "n", "ँ": "n", "ం": "m", "ఁ": "n"}
+_JOINERS = dict.fromkeys(map(ord, "‌‍"))
+
+_word = re.compile(r"[\wऀ-ॿఀ-౿‌‍][\w.\-ऀ-ॿఀ-౿‌‍]*")
+
+
+def script_of(text: str):
+    """"telugu", "devanagari" or None for the first Indic letter in the text."""
+    for ch in text:
+        code = ord(ch)
+        if TELUGU[0] <= code <= TELUGU[1]:
+            return "telugu"
+        if DEVANAGARI[0] <= code <= DEVANAGARI[1]:
+            return "devanagari"
+    return None
+
+
+def transliterate(word: str) -> str:
+    """Latin spelling of a Devanagari or Telugu word (inherent vowels included,
+    except Hindi's silent final one); other characters pass through."""
+    out = []
+    pending = False        # last consonant still carries its inherent "a"
+    consonant = None
+    hindi = script_of(word) == "devanagari"
+    for ch in unicodedata.normalize("NFC", word):
+        if ch in _CONSONANTS:
+            if pending:
+                out.append("a")
+            out.append(_CONSONANTS[ch])
+            pending, consonant = True, ch
+        elif ch == _NUKTA_SIGN:
+            if consonant in _NUKTA:
+                out[-1] = _NUKTA[consonant]
+        elif ch in _VOWEL_SIGNS:
+            out.append(_VOWEL_SIGNS[ch])
+            pending = False
+        elif ch in _VIRAMA:
+            pending = False
+        else:
+            if pending:
+                out.append("a")
+                pending = False
+            out.append(_NASALS.get(ch) or _VOWELS.get(ch) or ch)
+    if pending and not hindi:
+        out.append("a")
+    return "".join(out).translate(_JOINERS)
+
+
+# ---------------- LEXICON ----------------
+
+def _key(word: str) -> str:
+    """Lookup form: NFC, lowercase, no zero-width joiners or nukta (फ़ाइल == फाइल)."""
+    return unicodedata.normalize("NFC", word).lower().translate(_JOINERS).replace(_NUKTA_SIGN, "")
+
+
+def _build():
+    # English words stand for themselves in mixed commands ("report.txt file डिलीट करो")
+    entries = {tuple(english.split()): (english, role) for english, role in _LEXICON.items() if english}
+    for english, spoken in WORDS.items():
+        for phrase in spoken:
+            entries[tuple(_key(w) for w in phrase.split())] = (english, _LEXICON[english])
+    for app, spoken in APP_NAMES.items():
+        for phrase in spoken:
+            entries[tuple(_key(w) for w in phrase.split())] = (app, None)
+    return entries, max(len(words) for words in entries)
+
+
+_entries, _longest_entry = _build()
+# First words of the romanized verbs, which mark Latin text as Hindi/Telugu
+_english = {word for phrase in _LEXICON for word in phrase.split()}
+_romanized_starts = {
+    words[0] for words, (_, role) in _entries.items()
+    if role == VERB and words[0] not in _english and not script_of(words[0])
+}
+
+
+def _lookup(keys, i):
+    """Longest lexicon phrase starting at keys[i]: (english, role, length) or None."""
+    for length in range(min(_longest_entry, len(keys) - i), 0, -1):
+        found = _entries.get(tuple(keys[i:i + length]))
+        if found is not None:
+            return found[0], found[1], length
+    return None
+
+
+def _clause(words) -> str:
+    """English order for one clause: verb, modifiers, nouns, then the name
+    ("called <name>" when the speaker marked it)."""
+    verb, modifiers, nouns, names, marked = None, [], [], [], False
+    for english, role in words:
+        if role == VERB:
+            # SOV: the last verb is the main one ("run hone wale apps dikhao")
+            verb = english
+        elif role == MODIFIER:
+            modifiers.append(english)
+        elif role == NOUN:
+            nouns.append(english)
+        elif role == MARKER:
+            marked = True
+        elif role != PARTICLE:
+            names.append(english)
+    parts = ([verb] if verb else []) + modifiers + nouns
+    if names:
+        parts += (["called"] if marked and nouns else []) + names
+    return " ".join(parts)
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def normalize(text: str) -> str:
+    """English rendering of a Telugu/Hindi (or romanized) command; any other
+    text is returned as is."""
+    tokens = _word.findall(text or "")
+    keys = [_key(t) for t in tokens]
+    indic = script_of(text or "") is not None
+    # Romanized Hindi/Telugu only counts when one of its verbs is there,
+    # so English like "show files" is never rewritten
+    if not indic and not any(
+        key in _romanized_starts and (_lookup(keys, i) or (None, None))[1] == VERB
+        for i, key in enumerate(keys)
+    ):
+        return text
+
+    clauses, words, i = [], [], 0
+    while i < len(tokens):
+        found = _lookup(keys, i)
+        if found is None:
+            word, length = tokens[i], 1
+            words.append((transliterate(word) if script_of(word) else word, None))
+        else:
+            english, role, length = found
+            if role == CONJUNCTION:
+                clauses.append(_clause(words))
+                clauses.append(english)
+                words = []
+            else:
+                words.append((english, role))
+        i += length
+    clauses.append(_clause(words))
+    return " ".join(c for c in clauses if c)
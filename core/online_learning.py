@@ -0,0 +1,255 @@
+import copy
+import json
+import os
+import queue
+import threading
+import time
+
+# Opt-in: ORBITOS_ONLINE_LEARNING=1 lets corrections and Gemini labels retrain the classifier
+ENABLED = os.getenv("ORBITOS_ONLINE_LEARNING", "0") == "1"
+DATASET = "data/commands.csv"
+# Telugu/Hindi commands, learned in the English form the router classifies them in
+MULTILINGUAL_DATASET = "data/commands_multilingual.csv"
+CORRECTIONS_FILE = "cache/intent_corrections.jsonl"
+# Same split as train_intent_model.py, so neither model has seen the holdout
+HOLDOUT = 0.2
+SPLIT_SEED = 42
+# An update may cost at most this much holdout accuracy against the shipped model
+TOLERANCE = 0.02
+# Seconds to wait for more examples before updating, and the largest batch
+UPDATE_DELAY = 2.0
+MAX_BATCH = 32
+# Original training examples replayed with each update so old intents are not forgotten
+REHEARSAL = 4
+
+
+def _key(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _top_two(scores):
+    """Best score and its margin over the runner-up, per row of decision scores."""
+    import numpy as np
+
+    ranked = -np.sort(-scores, axis=1)
+    return ranked[:, 0], ranked[:, 0] - ranked[:, 1]
+
+
+def build_pipeline():
+    """Stateless hashing features + a linear model that supports partial_fit."""
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.pipeline import Pipeline
+
+    return Pipeline([
+        ("hash", HashingVectorizer(ngram_range=(1, 3), alternate_sign=False, n_features=2 ** 18)),
+        ("clf", SGDClassifier(loss="hinge", alpha=1e-4, max_iter=50, tol=None, random_state=0)),
+    ])
+
+
+class OnlineLearner:
+    """
+    Keeps an incrementally trained copy of the intent classifier. Labelled
+    utterances are batched on a background thread; each update is scored on
+    a holdout and only installed (through `install(pipeline, thresholds)`)
+    when it stays within TOLERANCE of the shipped model's accuracy.
+
+    The SGD scores are on a different scale from the shipped LinearSVC's, so
+    the router's thresholds (`thresholds()` -> {"local_margin", "local_floor"})
+    are recalibrated with each install: on the holdout, the new model keeps
+    the same share of commands above each threshold as the shipped one.
+    """
+
+    def __init__(self, install, live_engine, thresholds, dataset=DATASET, corrections_file=CORRECTIONS_FILE,
+                 tolerance=TOLERANCE, update_delay=UPDATE_DELAY, multilingual_dataset=MULTILINGUAL_DATASET):
+        self.install = install
+        self.live_engine = live_engine
+        self.thresholds = thresholds
+        self.dataset = dataset
+        self.multilingual_dataset = multilingual_dataset
+        self.corrections_file = corrections_file
+        self.tolerance = tolerance
+        self.update_delay = update_delay
+
+        self.pipeline = None
+        self.classes = None
+        self.floor = None
+        self.accuracy = None
+        self.installed = False
+        self.calibrated = None
+        self._below = {}        # threshold name -> holdout share under it with the shipped model
+        self._learned = {}      # normalized text -> intent
+        self._queue = queue.Queue()
+        self._random = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self.counters = {"received": 0, "updates": 0, "accepted": 0, "rejected": 0, "skipped": 0}
+
+    # ---------------- PUBLIC API ----------------
+
+    def start(self):
+        """Bootstraps on a daemon thread and keeps absorbing examples; returns self."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="online-learning", daemon=True)
+            self._thread.start()
+        return self
+
+    def learn(self, text: str, intent: str, source="user"):
+        """Queues a labelled utterance (a user correction or a Gemini decision)."""
+        if text and intent:
+            self._count("received")
+            self._queue.put((text, intent, source))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters, holdout_accuracy=self.accuracy, floor=self.floor,
+                        installed=self.installed, thresholds=self.calibrated, examples=len(self._learned))
+
+    # ---------------- TRAINING ----------------
+
+    def _run(self):
+        try:
+            self._bootstrap()
+        except Exception as e:
+            print("Online learning disabled, bootstrap failed:", e)
+            return
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.update_delay
+            while len(batch) < MAX_BATCH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._update(batch)
+            except Exception as e:
+                print("Online learning update failed:", e)
+
+    def _bootstrap(self):
+        # Imported here: the module is loaded at startup even with learning off
+        import numpy as np
+        import pandas as pd
+        from sklearn.model_selection import train_test_split
+        from core.multilingual import normalize
+
+        # Each dataset split on its own, as train_intent_model.py does
+        sets = [pd.read_csv(self.dataset)]
+        if self.multilingual_dataset and os.path.exists(self.multilingual_dataset):
+            multilingual = pd.read_csv(self.multilingual_dataset)
+            multilingual["sentence"] = multilingual["sentence"].map(normalize)
+            sets.append(multilingual)
+        self.x_train, self.y_train, self.x_test, y_test = [], [], [], []
+        for data in sets:
+            x_train, x_test, y_train, y_test_part = train_test_split(
+                data["sentence"], data["intent"], test_size=HOLDOUT,
+                random_state=SPLIT_SEED, stratify=data["intent"]
+            )
+            self.x_train += list(x_train)
+            self.y_train += list(y_train)
+            self.x_test += list(x_test)
+            y_test += list(y_test_part)
+        self.y_test = np.asarray(y_test)
+        self.classes = np.unique(self.y_train)
+        self._random = np.random.default_rng(SPLIT_SEED)
+
+        # The shipped model sets the bar every update is held to
+        live = self.live_engine()
+        live_accuracy = np.mean([r.intent == y for r, y in zip(live.predict_batch(self.x_test), self.y_test)])
+        self.floor = float(live_accuracy) - self.tolerance
+        best, margin = _top_two(live.scores(self.x_test))
+        shipped = self.thresholds()
+        self._below = {"local_floor": float(np.mean(best < shipped["local_floor"])),
+                       "local_margin": float(np.mean(margin < shipped["local_margin"]))}
+
+        for text, intent in self._load_corrections():
+            self._learned[_key(text)] = intent
+
+        pipeline = build_pipeline()
+        pipeline.fit(self.x_train + list(self._learned), self.y_train + list(self._learned.values()))
+        self._consider(pipeline, "bootstrap")
+
+    def _update(self, batch):
+        examples = {}
+        for text, intent, source in batch:
+            key = _key(text)
+            if intent not in self.classes or self._learned.get(key) == intent:
+                self._count("skipped")
+                continue
+            examples[key] = (text, intent, source)
+        if not examples:
+            return
+
+        self._count("updates")
+        picks = self._random.choice(len(self.x_train), size=REHEARSAL * len(examples))
+        texts = [t for t, _, _ in examples.values()] + [self.x_train[i] for i in picks]
+        labels = [i for _, i, _ in examples.values()] + [self.y_train[i] for i in picks]
+
+        candidate = copy.deepcopy(self.pipeline)
+        # Hashing features are stateless, so only the linear model moves
+        candidate[-1].partial_fit(candidate[:-1].transform(texts), labels, classes=self.classes)
+        if self._consider(candidate, "update"):
+            for key, (text, intent, source) in examples.items():
+                self._learned[key] = intent
+            self._save_corrections(examples.values())
+
+    def _consider(self, pipeline, reason) -> bool:
+        """Keeps `pipeline` if it clears the holdout floor; installs it when it does."""
+        accuracy = float((pipeline.predict(self.x_test) == self.y_test).mean())
+        if reason != "bootstrap" and accuracy < self.floor:
+            self._count("rejected")
+            print(f"Online learning: rejected update (holdout {accuracy:.3f} < {self.floor:.3f})")
+            return False
+
+        with self._lock:
+            self.pipeline = pipeline
+            self.accuracy = accuracy
+            if reason != "bootstrap":
+                self.counters["accepted"] += 1
+        if accuracy >= self.floor:
+            thresholds = self._calibrate(pipeline)
+            self.install(pipeline, thresholds)
+            with self._lock:
+                self.installed = True
+                self.calibrated = thresholds
+            print(f"Online learning: installed {reason} model (holdout {accuracy:.3f}, "
+                  f"margin {thresholds['local_margin']:.3f}, floor {thresholds['local_floor']:.3f})")
+        return True
+
+    def _calibrate(self, pipeline) -> dict:
+        """Router thresholds for `pipeline` that pass the same holdout share as the shipped ones."""
+        import numpy as np
+
+        best, margin = _top_two(pipeline.decision_function(self.x_test))
+        values = {"local_floor": best, "local_margin": margin}
+        return {name: round(float(np.quantile(values[name], share)), 4)
+                for name, share in self._below.items()}
+
+    # ---------------- PERSISTENCE ----------------
+
+    def _load_corrections(self):
+        if not os.path.exists(self.corrections_file):
+            return []
+        examples = []
+        with open(self.corrections_file, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    examples.append((record["text"], record["intent"]))
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue
+        return examples
+
+    def _save_corrections(self, examples):
+        os.makedirs(os.path.dirname(self.corrections_file) or ".", exist_ok=True)
+        with open(self.corrections_file, "a", encoding="utf-8") as f:
+            for text, intent, source in examples:
+                f.write(json.dumps({"text": text, "intent": intent, "source": source,
+                                    "at": time.time()}, ensure_ascii=False) + "\n")
+
+    def _count(self, key):
+        with self._lock:
+            self.counters[key] += 1
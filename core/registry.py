@@ -0,0 +1,123 @@
+import threading
+import time
+
+
+class Component:
+    """A lazily built engine (model, client, TTS...) and its load timings."""
+
+    def __init__(self, name, factory, warm=True):
+        self.name = name
+        self.factory = factory
+        self.warm = warm
+        self.value = None
+        self.error = None
+        self.load_ms = None
+        self.loaded_by = None
+        self.wait_ms = 0.0
+        self.ready = threading.Event()
+        self.lock = threading.Lock()
+
+    def result(self):
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class Registry:
+    """
+    Builds heavy components on first use or on a background warm-up thread.
+    Callers block only on the component they ask for, and only until it is built.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._components = {}
+        self._listeners = []
+        self._marks = []
+
+    # ---------------- REGISTRATION ----------------
+
+    def register(self, name, factory, warm=True):
+        """warm=False keeps a component out of the background warm-up."""
+        self._components[name] = Component(name, factory, warm)
+
+    def add_listener(self, callback):
+        """callback(name, ok) runs on the thread that finished building."""
+        self._listeners.append(callback)
+
+    # ---------------- ACCESS ----------------
+
+    def get(self, name):
+        component = self._components[name]
+        if not component.ready.is_set():
+            waited = time.perf_counter()
+            self._build(component)
+            component.wait_ms += (time.perf_counter() - waited) * 1000
+        return component.result()
+
+    def replace(self, name, value):
+        """Swaps in a new value, e.g. a retrained model; later get() calls return it."""
+        component = self._components[name]
+        with component.lock:
+            component.value = value
+            component.error = None
+            component.ready.set()
+
+    def is_ready(self, name) -> bool:
+        return self._components[name].ready.is_set()
+
+    def _build(self, component):
+        with component.lock:
+            if component.ready.is_set():
+                return
+            started = time.perf_counter()
+            try:
+                component.value = component.factory()
+            except Exception as e:
+                component.error = e
+            component.load_ms = (time.perf_counter() - started) * 1000
+            component.loaded_by = threading.current_thread().name
+            component.ready.set()
+
+        for callback in self._listeners:
+            callback(component.name, component.error is None)
+
+    # ---------------- WARM-UP ----------------
+
+    def warm_up(self, names=None):
+        """Builds components in the given order on a daemon thread."""
+        if names is None:
+            names = [n for n, c in self._components.items() if c.warm]
+
+        def run():
+            for name in names:
+                self._build(self._components[name])
+            self.mark("warm-up done")
+
+        thread = threading.Thread(target=run, name="warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    # ---------------- STARTUP REPORT ----------------
+
+    def mark(self, label):
+        self._marks.append((label, (time.perf_counter() - self.started) * 1000))
+
+    def report(self) -> str:
+        lines = ["Startup report (ms since core import):"]
+        for label, at in self._marks:
+            lines.append(f"  {label:<24}{at:>9.1f}")
+        lines.append("Components (load / waited by callers / thread):")
+        for c in self._components.values():
+            if not c.ready.is_set():
+                lines.append(f"  {c.name:<24}{'pending':>9}")
+                continue
+            status = "" if c.error is None else f"  FAILED: {c.error}"
+            lines.append(
+                f"  {c.name:<24}{c.load_ms:>9.1f}{c.wait_ms:>9.1f}  {c.loaded_by}{status}"
+            )
+        return "\n".join(lines)
+
+
+# Instantiate the shared registry
+components = Registry()
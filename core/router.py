@@ -0,0 +1,192 @@
+import contextvars
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from core.entities import names_pronoun
+from core.multilingual import normalize
+from core.tracing import tracer
+
+# ---------------- CONFIG ----------------
+# Local answers whose margin over the runner-up clears this skip Gemini
+LOCAL_MARGIN = float(os.getenv("ORBITOS_LOCAL_MARGIN", "0.5"))
+# Minimum local score still usable when Gemini fails or is unsure
+LOCAL_FLOOR = float(os.getenv("ORBITOS_LOCAL_FLOOR", "0.4"))
+# Minimum Gemini confidence for its decision to be trusted
+AGENT_THRESHOLD = float(os.getenv("ORBITOS_AGENT_THRESHOLD", "0.4"))
+# Race mode asks Gemini in parallel and waits at most this long (seconds)
+RACE = os.getenv("ORBITOS_ROUTER_RACE", "0") == "1"
+LATENCY_BUDGET = float(os.getenv("ORBITOS_LATENCY_BUDGET", "1.5"))
+# Longest race-mode wait for Gemini when the local answer is unusable (the transport's deadline)
+AGENT_DEADLINE = float(os.getenv("ORBITOS_AGENT_DEADLINE", "6"))
+
+# "open notepad and search for x": one label cannot cover it, Gemini plans it
+_compound = re.compile(r",|;|\b(and|then|also|after that)\b", re.IGNORECASE)
+# Requests the classifier has no label for, so its best guess is always wrong
+_unlabelled = re.compile(r"\b(search|google|look up|browse)\b", re.IGNORECASE)
+
+# Intent classifier labels -> agent action names
+INTENT_ACTIONS = {
+    "CREATE_FILE": "create_file",
+    "DELETE_FILE": "delete_file",
+    "CREATE_FOLDER": "create_folder",
+    "DELETE_FOLDER": "delete_folder",
+    "LIST_FILES": "list_files",
+    "OPEN_APPLICATION": "open_app",
+    "CLOSE_APPLICATION": "close_app",
+    "SWITCH_APPLICATION": "switch_app",
+    "LIST_INSTALLED_APPLICATIONS": "list_installed",
+    "LIST_RUNNING_APPLICATIONS": "list_running",
+}
+# Agent actions -> classifier labels, for learning from Gemini's decisions
+ACTION_INTENTS = {action: intent for intent, action in INTENT_ACTIONS.items()}
+
+
+class CascadeRouter:
+    """
+    Decides what a command means, cheapest path first:
+    1) local intent model, used directly when its margin is clear
+    2) Gemini agent for ambiguous input
+    3) local model again as a fallback when Gemini fails or is unsure
+    """
+
+    def __init__(self, engine, agent, local_margin=LOCAL_MARGIN,
+                 local_floor=LOCAL_FLOOR, agent_threshold=AGENT_THRESHOLD,
+                 race=RACE, latency_budget=LATENCY_BUDGET, agent_deadline=AGENT_DEADLINE):
+        self.engine = engine
+        self.agent = agent
+        self.local_margin = local_margin
+        self.local_floor = local_floor
+        self.agent_threshold = agent_threshold
+        self.race = race
+        self.latency_budget = latency_budget
+        self.agent_deadline = agent_deadline
+
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="router")
+        self._lock = threading.Lock()
+        self.counters = {
+            "local": 0,
+            "agent": 0,
+            "fallback": 0,
+            "unresolved": 0,
+            "agent_errors": 0,
+            "agent_timeouts": 0,
+        }
+
+    # ---------------- LOCAL MODEL ----------------
+
+    def classify_local(self, text: str) -> dict:
+        """Scores the text once and returns a decision with its margin.
+        Telugu/Hindi are scored in their normalized English form."""
+        with tracer.span("route.local"):
+            text = normalize(text)
+            result = self.engine.predict(text)
+        return {
+            "action": INTENT_ACTIONS.get(result.intent, "none"),
+            "intent": result.intent,
+            "confidence": result.score,
+            "margin": result.margin,
+            "runner_up": result.runner_up,
+            "compound": bool(_compound.search(text)),
+            "refers_back": self._refers_back(text, result.intent),
+            "unlabelled": bool(_unlabelled.search(text)),
+            "source": "local",
+        }
+
+    @staticmethod
+    def _refers_back(text: str, intent: str) -> bool:
+        """True when an action's target is only a pronoun ("close it", "close that")."""
+        if intent.startswith("LIST_"):
+            return False
+        # The last app used, which Gemini resolves from memory
+        return names_pronoun(text)
+
+    def _local_trusted(self, local) -> bool:
+        return not (local["compound"] or local["refers_back"] or local["unlabelled"]) \
+            and local["confidence"] >= self.local_floor and local["margin"] >= self.local_margin
+
+    def _agent_trusted(self, decision) -> bool:
+        return bool(decision) and decision.get("action", "none") != "none" \
+            and decision.get("confidence", 0) >= self.agent_threshold
+
+    def _ask_agent(self, text: str):
+        try:
+            decision = self.agent(text)
+        except Exception as e:
+            print("Gemini failed, falling back to ML:", e)
+            self._count("agent_errors")
+            return None
+        if decision is not None:
+            decision = dict(decision, source="agent")
+        return decision
+
+    # ---------------- ROUTING ----------------
+
+    def route(self, text: str):
+        """Returns a decision dict, or None when nothing is confident enough."""
+        if self.race:
+            return self._route_race(text)
+
+        local = self.classify_local(text)
+        if self._local_trusted(local):
+            return self._finish("local", local)
+
+        decision = self._ask_agent(text)
+        if self._agent_trusted(decision):
+            return self._finish("agent", decision)
+
+        return self._fallback(local)
+
+    def _route_race(self, text: str):
+        started = time.perf_counter()
+        # The agent's spans belong to this command's trace
+        pending = self._executor.submit(contextvars.copy_context().run, self._ask_agent, text)
+
+        local = self.classify_local(text)
+        if self._local_trusted(local):
+            # Gemini keeps running in the background and warms its cache
+            return self._finish("local", local)
+
+        remaining = self.latency_budget - (time.perf_counter() - started)
+        try:
+            decision = pending.result(timeout=max(remaining, 0))
+        except FutureTimeout:
+            self._count("agent_timeouts")
+            if local["confidence"] >= self.local_floor:
+                return self._finish("fallback", dict(local, source="fallback"))
+            # Nothing confident locally, so the agent is still the best bet, within its deadline
+            remaining = self.agent_deadline - (time.perf_counter() - started)
+            try:
+                decision = pending.result(timeout=max(remaining, 0))
+            except FutureTimeout:
+                # Still below the floor: ask the user to rephrase rather than guess
+                return self._fallback(local)
+
+        if self._agent_trusted(decision):
+            return self._finish("agent", decision)
+        return self._fallback(local)
+
+    def _fallback(self, local):
+        if local["confidence"] >= self.local_floor:
+            return self._finish("fallback", dict(local, source="fallback"))
+        self._count("unresolved")
+        return None
+
+    def _finish(self, path, decision):
+        self._count(path)
+        return decision
+
+    # ---------------- METRICS ----------------
+
+    def _count(self, key):
+        with self._lock:
+            self.counters[key] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        routed = counters["local"] + counters["agent"] + counters["fallback"] + counters["unresolved"]
+        counters["local_share"] = counters["local"] / routed if routed else 0.0
+        return counters
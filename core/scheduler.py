@@ -0,0 +1,209 @@
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from core.tracing import tracer
+
+MAX_WORKERS = 4
+# Seconds before a running command is reported as timed out
+COMMAND_TIMEOUT = 30.0
+LATENCY_SAMPLES = 500
+
+
+class Ticket:
+    """One submitted command and what happened to it."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, text, key, on_done, trace, on_chunk=None):
+        self.id = next(self._ids)
+        self.text = text
+        self.key = key
+        self.on_done = on_done
+        self.on_chunk = on_chunk
+        self.trace = trace
+        self.state = "queued"   # queued -> running -> done | failed | timed_out, or cancelled
+        self.result = None
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.finished = None
+        self.cancelled = threading.Event()
+
+    @property
+    def wait_ms(self):
+        return ((self.started or self.finished or time.perf_counter()) - self.submitted) * 1000
+
+    @property
+    def run_ms(self):
+        if self.started is None:
+            return 0.0
+        return ((self.finished or time.perf_counter()) - self.started) * 1000
+
+
+class CommandScheduler:
+    """
+    Runs commands on a bounded worker pool. Commands with the same resource
+    key (the app, file or folder they touch) run one after another in
+    submission order; commands on different resources run in parallel.
+    """
+
+    def __init__(self, run, key_fn=None, max_workers=MAX_WORKERS, timeout=COMMAND_TIMEOUT):
+        self.run = run
+        self.key_fn = key_fn
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="command")
+        # key_fn may read the disk, so it runs here rather than on the caller's (GUI
+        # or event loop) thread; one thread keeps commands in submission order
+        self._keying = ThreadPoolExecutor(max_workers=1, thread_name_prefix="command-key")
+        self._lock = threading.Lock()
+        self._lanes = {}        # key -> deque of tickets waiting behind the running one
+        self._busy_keys = set()
+        self._queued = 0
+        self._running = 0
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.counters = {"submitted": 0, "done": 0, "failed": 0, "cancelled": 0, "timed_out": 0}
+
+    # ---------------- SUBMIT / CANCEL ----------------
+
+    def submit(self, text, on_done=None, key=None, trace=None, on_chunk=None) -> Ticket:
+        """Queues a command; on_done(ticket) runs on a worker thread when it settles.
+        `trace` continues one started earlier, e.g. by speech recognition.
+        on_chunk(ticket, text) receives partial results of streaming skills."""
+        if trace is None:
+            trace = tracer.new_trace()
+        trace.text = text
+        trace.mark_started()
+        ticket = Ticket(text, key, on_done, trace, on_chunk)
+
+        with self._lock:
+            self.counters["submitted"] += 1
+            self._queued += 1
+        if self.key_fn is None:
+            self._enqueue(ticket)
+        else:
+            self._keying.submit(self._enqueue, ticket, key is None)
+        return ticket
+
+    def _enqueue(self, ticket, find_key=False):
+        """Starts the ticket, or puts it behind the command running on its key."""
+        if find_key:
+            try:
+                ticket.key = self.key_fn(ticket.text)
+            except Exception as e:
+                print("Could not find what the command touches:", e)
+        key = ticket.key
+        with self._lock:
+            if ticket.cancelled.is_set():
+                self._queued -= 1
+                return
+            if key is not None and key in self._busy_keys:
+                self._lanes.setdefault(key, deque()).append(ticket)
+                return
+            if key is not None:
+                self._busy_keys.add(key)
+        self._pool.submit(self._execute, ticket)
+
+    def cancel(self, ticket) -> bool:
+        """Drops a queued command, or abandons a running one (its result is discarded)."""
+        with self._lock:
+            if ticket.state not in ("queued", "running"):
+                return False
+            lane = self._lanes.get(ticket.key)
+            if ticket.state == "queued" and lane is not None and ticket in lane:
+                lane.remove(ticket)
+                self._queued -= 1
+        ticket.cancelled.set()
+        self._settle(ticket, "cancelled", "Command cancelled.")
+        return True
+
+    # ---------------- EXECUTION ----------------
+
+    def _execute(self, ticket):
+        with self._lock:
+            self._queued -= 1
+            if ticket.cancelled.is_set():
+                self._release(ticket.key)
+                return
+            self._running += 1
+            ticket.state = "running"
+            ticket.started = time.perf_counter()
+
+        timer = threading.Timer(self.timeout, self._on_timeout, args=(ticket,))
+        timer.daemon = True
+        timer.start()
+        tracer.record("queue", ticket.wait_ms, trace=ticket.trace)
+        try:
+            with tracer.use(ticket.trace):
+                if ticket.on_chunk is None:
+                    result = self.run(ticket.text)
+                else:
+                    result = self.run(ticket.text, on_chunk=lambda chunk: self._forward(ticket, chunk))
+            state = "done"
+        except Exception as e:
+            result, state = f"Error: {e}", "failed"
+        finally:
+            timer.cancel()
+
+        self._settle(ticket, state, result)
+        # Only now is the resource free: a timed-out or abandoned command kept
+        # its lane and its running slot until its worker actually returned
+        with self._lock:
+            self._running -= 1
+            self._release(ticket.key)
+
+    def _forward(self, ticket, chunk):
+        # Chunks of a cancelled or timed-out command are dropped with its result
+        if ticket.state == "running":
+            try:
+                ticket.on_chunk(ticket, chunk)
+            except Exception as e:
+                print("Chunk callback failed:", e)
+
+    def _on_timeout(self, ticket):
+        self._settle(ticket, "timed_out", f"'{ticket.text}' is taking too long, so I stopped waiting for it.")
+
+    def _settle(self, ticket, state, result):
+        """Finishes a ticket once; later outcomes (e.g. after a timeout) are dropped."""
+        with self._lock:
+            if ticket.state not in ("queued", "running"):
+                return
+            ticket.state = state
+            ticket.result = result
+            ticket.finished = time.perf_counter()
+            self.counters[state] += 1
+            if ticket.started is not None:
+                self._latencies.append((ticket.wait_ms, ticket.run_ms))
+
+        tracer.finish(ticket.trace, state)
+        if ticket.on_done is not None:
+            try:
+                ticket.on_done(ticket)
+            except Exception as e:
+                print("Command callback failed:", e)
+
+    def _release(self, key):
+        """Starts the next command waiting on `key` (caller holds the lock)."""
+        if key is None:
+            return
+        lane = self._lanes.get(key)
+        if lane:
+            self._pool.submit(self._execute, lane.popleft())
+        else:
+            self._lanes.pop(key, None)
+            self._busy_keys.discard(key)
+
+    # ---------------- METRICS ----------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = list(self._latencies)
+            stats = dict(self.counters, queued=self._queued, running=self._running)
+
+        for name, values in (("wait", [w for w, _ in samples]), ("run", [r for _, r in samples])):
+            values.sort()
+            for pct in (50, 95):
+                index = min(len(values) - 1, int(len(values) * pct / 100))
+                stats[f"{name}_p{pct}_ms"] = round(values[index], 1) if values else 0.0
+        return stats
@@ -0,0 +1,255 @@
+"""
+Headless OrbitOS: process_command served over a local socket, no Qt.
+
+    python main.py --headless                  # or: python -m core.server
+    python -m core.client "open notepad"
+
+The protocol is one JSON object per line in each direction. Requests:
+
+    {"id": 1, "text": "open notepad", "stream": false}
+    {"id": 2, "op": "stats"}
+
+Many requests may be in flight on one connection; replies carry the
+request's id and arrive as commands finish:
+
+    {"id": 1, "state": "done", "result": "...", "spoken": "...",
+     "timing": {"total_ms": ..., "wait_ms": ..., "run_ms": ..., "stages": {...}}}
+
+With "stream": true, chunks of streaming skills come first as
+{"id": 1, "chunk": "..."}. Commands go through the same CommandScheduler
+as the GUI, so commands on one app, file or folder still run in order.
+
+Only the user running the server may send commands: the Unix socket is
+mode 0600, and a TCP connection must first send {"op": "auth", "token": ...}
+with the token from TOKEN_FILE (created mode 0600 on first start).
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import signal
+import sys
+import time
+
+from core.client import ADDRESS, TOKEN_FILE, parse_address, read_token
+from core.command_engine import process_command, resource_key
+from core.online_learning import ENABLED as ONLINE_LEARNING
+from core.skill_pool import ENABLED as SKILL_PROCESSES
+from core.registry import components
+from core.scheduler import CommandScheduler, MAX_WORKERS
+from core.streaming import spoken
+from core.tracing import tracer
+from skills.file_control import set_base_dir
+
+# Longest request line accepted
+MAX_LINE = 64 * 1024
+
+# The GUI's warm-up minus text-to-speech: replies are returned, not spoken
+WARM_UP_ORDER = ["intent_model", "intent_engine", "router", "app_catalog", "process_table",
+                 "gemini_client", "gemini_transport"]
+if ONLINE_LEARNING:
+    WARM_UP_ORDER.append("learner")
+if SKILL_PROCESSES:
+    WARM_UP_ORDER.append("skill_pool")
+
+
+# ---------------- SERVER ----------------
+
+class CommandServer:
+    """Serves process_command to any number of local clients, engines kept warm."""
+
+    def __init__(self, address=ADDRESS, max_workers=MAX_WORKERS, token_file=TOKEN_FILE):
+        self.address = address
+        self.token_file = token_file
+        self.token = None
+        self.scheduler = CommandScheduler(process_command, key_fn=resource_key, max_workers=max_workers)
+        self.started = time.monotonic()
+        self.connections = 0
+        self.loop = None
+        self._server = None
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        kind, where = parse_address(self.address)
+        if kind == "tcp":
+            self.token = read_token(self.token_file, create=True)
+            self._server = await asyncio.start_server(self._serve, *where, limit=MAX_LINE)
+        else:
+            os.makedirs(os.path.dirname(where) or ".", exist_ok=True)
+            if os.path.exists(where):
+                # Left behind by a daemon that did not shut down cleanly
+                os.unlink(where)
+            self._server = await asyncio.start_unix_server(self._serve, where, limit=MAX_LINE)
+            # Other local users must not be able to run commands as this one
+            os.chmod(where, 0o600)
+        components.warm_up(WARM_UP_ORDER)
+        return self
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        kind, where = parse_address(self.address)
+        if kind == "unix" and os.path.exists(where):
+            os.unlink(where)
+
+    # ---------------- CONNECTIONS ----------------
+
+    async def _serve(self, reader, writer):
+        self.connections += 1
+        pending = set()
+        # Unix socket peers passed the file permissions; TCP peers must send the token
+        authenticated = self.token is None
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    self._send(writer, {"error": f"Request longer than {MAX_LINE} bytes."})
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("expected an object")
+                except ValueError as e:
+                    self._send(writer, {"error": f"Bad request: {e}"})
+                    continue
+                if not authenticated:
+                    token = str(request.get("token", "")).encode("utf-8")
+                    if request.get("op") != "auth" or not hmac.compare_digest(token, self.token.encode("utf-8")):
+                        self._send(writer, {"id": request.get("id"), "error": "Not authorized."})
+                        break
+                    authenticated = True
+                    self._send(writer, {"id": request.get("id"), "ok": True})
+                    continue
+                task = asyncio.ensure_future(self._handle(request, writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            # Replies to requests still running have nowhere to go
+            for task in pending:
+                task.cancel()
+            writer.close()
+
+    async def _handle(self, request, writer):
+        rid = request.get("id")
+        op = request.get("op", "command")
+        if op == "stats":
+            self._send(writer, {"id": rid, "stats": self.stats()})
+        elif op == "ping":
+            self._send(writer, {"id": rid, "pong": True})
+        elif op == "command" and isinstance(request.get("text"), str) and request["text"].strip():
+            self._send(writer, await self.run(request["text"].strip(), rid, writer if request.get("stream") else None))
+        else:
+            self._send(writer, {"id": rid, "error": "Expected a command text or a known op."})
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def run(self, text, rid=None, writer=None) -> dict:
+        """Runs one command on the scheduler; the reply once it settles."""
+        done = self.loop.create_future()
+        on_chunk = None
+        if writer is not None:
+            def on_chunk(ticket, chunk):
+                self.loop.call_soon_threadsafe(self._send, writer, {"id": rid, "chunk": chunk})
+
+        ticket = self.scheduler.submit(
+            text,
+            on_done=lambda ticket: self.loop.call_soon_threadsafe(_resolve, done, ticket),
+            on_chunk=on_chunk,
+        )
+        try:
+            await done
+        except asyncio.CancelledError:
+            self.scheduler.cancel(ticket)
+            raise
+        return reply(ticket, rid)
+
+    @staticmethod
+    def _send(writer, message):
+        if writer.is_closing():
+            return
+        writer.write(json.dumps(message, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+
+    # ---------------- METRICS ----------------
+
+    def stats(self) -> dict:
+        return {
+            "uptime_s": round(time.monotonic() - self.started, 1),
+            "connections": self.connections,
+            "scheduler": self.scheduler.stats(),
+            "routing": components.get("router").stats() if components.is_ready("router") else None,
+            "stages": tracer.histograms(),
+            "skills": components.get("skill_pool").stats() if SKILL_PROCESSES and components.is_ready("skill_pool") else None,
+        }
+
+
+def _resolve(future, ticket):
+    if not future.done():
+        future.set_result(ticket)
+
+
+def reply(ticket, rid=None) -> dict:
+    """The JSON reply for a settled ticket."""
+    trace = ticket.trace
+    return {
+        "id": rid,
+        "state": ticket.state,
+        "result": str(ticket.result),
+        "spoken": str(spoken(ticket.result)),
+        "timing": {
+            "total_ms": round((ticket.finished - ticket.submitted) * 1000, 2),
+            "wait_ms": round(ticket.wait_ms, 2),
+            "run_ms": round(ticket.run_ms, 2),
+            "stages": {name: round(ms, 2) for name, ms in trace.stages().items()},
+        },
+    }
+
+
+# ---------------- ENTRY POINT ----------------
+
+async def _main(address, max_workers):
+    server = await CommandServer(address, max_workers).start()
+    try:
+        # Stopped by a service manager: close the socket like Ctrl+C does
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except (NotImplementedError, AttributeError):
+        pass
+    print(f"OrbitOS listening on {address}", flush=True)
+    try:
+        await server.serve_forever()
+    finally:
+        server.close()
+
+
+def serve(argv=None):
+    parser = argparse.ArgumentParser(description="Headless OrbitOS command server.")
+    parser.add_argument("--address", default=ADDRESS, help="Unix socket path or host:port")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="commands run at once")
+    parser.add_argument("--dir", help="working directory for file commands")
+    args, _ = parser.parse_known_args(argv)
+
+    if args.dir:
+        set_base_dir(args.dir)
+    try:
+        asyncio.run(_main(args.address, args.workers))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    print(components.report())
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1:])
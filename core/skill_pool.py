@@ -0,0 +1,311 @@
+import importlib
+import itertools
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+
+from core.streaming import Reply, Spoken, drain, is_stream, spoken
+
+# Opt-in: ORBITOS_SKILL_PROCESSES=1 runs skills in worker processes that can be killed
+ENABLED = os.getenv("ORBITOS_SKILL_PROCESSES", "0") == "1"
+POOL_SIZE = int(os.getenv("ORBITOS_SKILL_WORKERS", "3"))
+# Seconds a skill may take, waiting for a free worker included
+SKILL_TIMEOUT = float(os.getenv("ORBITOS_SKILL_TIMEOUT", "10"))
+# Seconds a new worker has to import the skills and load the app catalog
+START_TIMEOUT = 30.0
+
+# Skills run in a worker, and how many of each module may run at once. The
+# folder trash and its undo window live in this process, so delete_folder
+# and undo_delete stay here (the rename they do is instant anyway).
+ISOLATED = {
+    "skills.application_control": {"open_app", "close_app", "switch_to_app", "list_running_apps",
+                                   "list_installed_apps"},
+    "skills.browser_control": {"search_in_browser", "open_browser"},
+    "skills.file_control": {"create_file", "delete_file", "create_folder", "list_items"},
+}
+CONCURRENCY = {
+    "skills.application_control": 2,
+    "skills.browser_control": 1,
+    "skills.file_control": 2,
+}
+
+
+class SkillError(Exception):
+    """A skill failed in its worker, or the worker died."""
+
+
+class SkillTimeout(SkillError):
+    """A skill overran its deadline; its worker was killed."""
+
+
+def isolated(function) -> bool:
+    return function.__name__ in ISOLATED.get(function.__module__, ())
+
+
+# ---------------- WORKER PROCESS ----------------
+
+def _serve(conn):
+    """Worker main loop: imports the skills and loads what they need once,
+    then runs calls until told to stop."""
+    # Ctrl+C is for the main process, which stops the workers itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for module in ISOLATED:
+        importlib.import_module(module)
+    from skills import file_control
+    from skills.app_catalog import catalog
+    from skills.process_table import table
+
+    # Built here rather than inside the first call's deadline
+    catalog.load()
+    table.start()
+
+    conn.send(("ready", os.getpid()))
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+        module, function, args, kwargs, base_dir = message
+        try:
+            # The working directory is chosen in the main process
+            file_control.set_base_dir(base_dir)
+            result = getattr(importlib.import_module(module), function)(*args, **kwargs)
+            if is_stream(result):
+                conn.send(("stream",))
+                reply = drain(result, lambda chunk: conn.send(("chunk", str(chunk))))
+                conn.send(("done", str(reply), reply.spoken))
+            else:
+                conn.send(("result", str(result), str(spoken(result))))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class Worker:
+    """One skill process and the parent's end of its pipe."""
+
+    def __init__(self, context, index):
+        self.index = index
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child,), name=f"skill-worker-{index}", daemon=True)
+        self.process.start()
+        child.close()
+        self.calls = 0
+
+    def wait_ready(self, timeout=START_TIMEOUT):
+        if not self.conn.poll(timeout):
+            raise SkillError(f"Skill worker {self.index} did not start in {timeout:.0f} seconds.")
+        try:
+            self.conn.recv()
+        except (EOFError, OSError):
+            raise SkillError(f"Skill worker {self.index} exited while starting.")
+
+    def receive(self, deadline):
+        """The worker's next message, or SkillTimeout once the deadline passes."""
+        if not self.conn.poll(max(0.0, deadline - time.monotonic())):
+            raise SkillTimeout()
+        try:
+            return self.conn.recv()
+        except (EOFError, OSError):
+            raise SkillError("The skill worker exited unexpectedly.")
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(1.0)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(1.0)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join(1.0)
+        self.conn.close()
+
+
+# ---------------- POOL ----------------
+
+class SkillPool:
+    """
+    Pre-started worker processes for skills that may hang: a call that
+    overruns its deadline has its worker killed and replaced in the
+    background, and the command fails instead of stalling the assistant.
+    Each skill module may use at most CONCURRENCY workers at once.
+    """
+
+    def __init__(self, size=POOL_SIZE, timeout=SKILL_TIMEOUT, concurrency=None):
+        self.size = size
+        self.timeout = timeout
+        # spawn everywhere: forking a process that runs Qt and worker threads is unsafe
+        self._context = multiprocessing.get_context("spawn")
+        self._idle = queue.Queue()
+        self._limits = {module: threading.BoundedSemaphore(limit)
+                        for module, limit in (concurrency or CONCURRENCY).items()}
+        self._lock = threading.Lock()
+        self._indexes = itertools.count(1)
+        self._workers = set()
+        self._closed = False
+        self.started = None
+        self._busy_s = 0.0
+        self._running = {module: 0 for module in ISOLATED}
+        self.counters = {"calls": 0, "errors": 0, "timeouts": 0, "respawns": 0}
+
+    def start(self):
+        """Starts every worker and waits until they have loaded the skills; returns self."""
+        workers = [self._spawn() for _ in range(self.size)]
+        for worker in workers:
+            worker.wait_ready()
+            self._idle.put(worker)
+        self.started = time.monotonic()
+        return self
+
+    def _spawn(self):
+        worker = Worker(self._context, next(self._indexes))
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _respawn(self):
+        def run():
+            try:
+                worker = self._spawn()
+                worker.wait_ready()
+            except Exception as e:
+                print("Could not replace a skill worker:", e)
+                return
+            self._count("respawns")
+            self._idle.put(worker)
+
+        threading.Thread(target=run, name="skill-respawn", daemon=True).start()
+
+    def _discard(self, worker):
+        with self._lock:
+            self._workers.discard(worker)
+        worker.kill()
+        if not self._closed:
+            self._respawn()
+
+    # ---------------- CALLS ----------------
+
+    def call(self, function, *args, **kwargs):
+        """Runs a skill function in a worker; returns what it returns (a stream
+        is passed on chunk by chunk). Raises SkillTimeout or SkillError."""
+        from skills import file_control
+
+        module, name = function.__module__, function.__name__
+        deadline = time.monotonic() + self.timeout
+        limit = self._limits.get(module)
+        if limit is not None and not limit.acquire(timeout=self.timeout):
+            self._count("timeouts")
+            raise SkillTimeout(f"Too many {name} calls are still running, so I gave up waiting.")
+        try:
+            worker = self._idle.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            if limit is not None:
+                limit.release()
+            self._count("timeouts")
+            raise SkillTimeout(f"No skill worker became free for {name}.")
+
+        started = time.monotonic()
+        self._begin(module)
+        try:
+            worker.conn.send((module, name, args, kwargs, file_control.BASE_DIR))
+            message = worker.receive(deadline)
+        except BaseException as e:
+            self._end(worker, module, limit, started, failed=e)
+            raise self._error(e, name) from None
+        if message[0] == "stream":
+            return self._stream(worker, module, limit, started, deadline, name)
+        self._end(worker, module, limit, started)
+        return self._unpack(message, name)
+
+    def _stream(self, worker, module, limit, started, deadline, name):
+        """Chunks of a streaming skill as the worker sends them."""
+        # Abandoned mid-stream, the worker is still sending and cannot be reused
+        failed = GeneratorExit()
+        try:
+            while True:
+                try:
+                    message = worker.receive(deadline)
+                except SkillError as e:
+                    failed = e
+                    raise self._error(e, name) from None
+                if message[0] != "chunk":
+                    break
+                yield message[1]
+            failed = None
+        finally:
+            self._end(worker, module, limit, started, failed)
+        if message[0] == "done" and message[2] != message[1]:
+            yield Spoken(message[2])
+        return self._unpack(message, name)
+
+    def _unpack(self, message, name):
+        kind, text = message[0], message[1]
+        if kind == "error":
+            self._count("errors")
+            raise SkillError(f"{name} failed: {text}")
+        if kind == "result" and message[2] != text:
+            return Reply(text, message[2])
+        return text
+
+    # ---------------- BOOKKEEPING ----------------
+
+    def _begin(self, module):
+        with self._lock:
+            self.counters["calls"] += 1
+            self._running[module] = self._running.get(module, 0) + 1
+
+    def _end(self, worker, module, limit, started, failed=None):
+        with self._lock:
+            self._running[module] -= 1
+            self._busy_s += time.monotonic() - started
+        if limit is not None:
+            limit.release()
+        if failed is None:
+            worker.calls += 1
+            self._idle.put(worker)
+        else:
+            # A worker that timed out, died or stopped mid-reply is not reused
+            self._discard(worker)
+
+    def _error(self, e, name):
+        """The exception to raise for a call whose worker was lost."""
+        if isinstance(e, SkillTimeout):
+            self._count("timeouts")
+            return SkillTimeout(f"{name} took longer than {self.timeout:g} seconds, so I stopped it.")
+        if isinstance(e, SkillError):
+            self._count("errors")
+        return e
+
+    def _count(self, key):
+        with self._lock:
+            self.counters[key] += 1
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
+
+    # ---------------- METRICS ----------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            uptime = time.monotonic() - self.started if self.started else 0.0
+            busy = sum(self._running.values())
+            stats = dict(self.counters, workers=len(self._workers), busy=busy,
+                         idle=self._idle.qsize(), running=dict(self._running))
+            capacity = uptime * max(1, self.size)
+            stats["utilization"] = round(self._busy_s / capacity, 3) if capacity else 0.0
+        return stats
@@ -0,0 +1,183 @@
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from core.agent.decision_cache import normalize_utterance
+from core.registry import components
+
+# Opt-in: ORBITOS_SPECULATE=1 routes stable partial transcripts before speech ends
+# (costs extra recognizer and Gemini calls)
+SPECULATE = os.getenv("ORBITOS_SPECULATE", "0") == "1"
+# Pre-warming for the predicted next command is on unless ORBITOS_PREDICT=0
+PREDICT = os.getenv("ORBITOS_PREDICT", "1") == "1"
+# Seconds a speculative decision stays usable
+SPECULATION_TTL = 10.0
+# Predictions below this probability are not pre-warmed
+PREDICT_THRESHOLD = 0.2
+PREDICTIONS = 2
+
+
+# ---------------- NEXT-COMMAND PREDICTION ----------------
+
+class NextCommandPredictor:
+    """
+    First-order Markov chain over actions, learned from the conversation
+    history in core.agent.memory and from every command since: counts of
+    which action follows which, and of the app or name each action used.
+    """
+
+    def __init__(self):
+        self._follows = defaultdict(Counter)    # action -> Counter of next actions
+        self._targets = defaultdict(Counter)    # action -> Counter of apps / names
+        self._last = None
+        self._lock = threading.Lock()
+
+    def bootstrap(self, history):
+        for entry in history:
+            if entry.get("action"):
+                self.observe(entry["action"], entry.get("app"))
+
+    def observe(self, action, target=None):
+        if not action or action == "none":
+            return
+        with self._lock:
+            if self._last is not None:
+                self._follows[self._last][action] += 1
+            if target:
+                self._targets[action][target.lower()] += 1
+            self._last = action
+
+    def predict(self, k=PREDICTIONS) -> list:
+        """[(action, likeliest target or None, probability)] for the next command."""
+        with self._lock:
+            follows = self._follows.get(self._last)
+            if not follows:
+                return []
+            total = sum(follows.values())
+            predictions = []
+            for action, count in follows.most_common(k):
+                targets = self._targets.get(action)
+                target = targets.most_common(1)[0][0] if targets else None
+                predictions.append((action, target, count / total))
+        return predictions
+
+
+def prewarm(action, target=None):
+    """Loads what a predicted action will need: listings, catalog, process table."""
+    if action in {"list_files", "create_file", "delete_file", "create_folder", "delete_folder"}:
+        from skills import file_control
+        file_control.entry_names()
+    elif action in {"open_app", "list_installed"}:
+        from skills.app_catalog import catalog
+        catalog.load()
+        if target:
+            # A guess must not rescan PATH and the desktop folders on a miss
+            catalog.resolve(target, rescan=False)
+    elif action in {"close_app", "switch_app", "list_running"}:
+        from skills.process_table import table
+        table.refresh()
+
+
+# ---------------- SPECULATION ----------------
+
+class Speculator:
+    """
+    Runs the read-only routing step ahead of time: on partial transcripts
+    while the user is still speaking, and pre-warming for the command the
+    predictor expects next. A speculative decision is only used when the
+    final transcript normalizes to the same text; otherwise it is dropped.
+    """
+
+    def __init__(self, route=None, speculate=SPECULATE, predict=PREDICT, ttl=SPECULATION_TTL):
+        self.route = route or (lambda text: components.get("router").route(text))
+        self.enabled = speculate
+        self.predict = predict
+        self.ttl = ttl
+        self.predictor = NextCommandPredictor()
+        self._bootstrapped = False
+        self._pending = {}      # normalized text -> (future, started)
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="speculate")
+        self._lock = threading.Lock()
+        self.counters = {"speculated": 0, "hits": 0, "misses": 0, "prewarmed": 0}
+
+    # ---------------- PARTIAL TRANSCRIPTS ----------------
+
+    def speculate(self, text: str):
+        """Starts routing a partial transcript in the background."""
+        key = normalize_utterance(text)
+        if not self.enabled or not key:
+            return
+        with self._lock:
+            self._expire()
+            if key in self._pending:
+                return
+            self._pending[key] = (self._executor.submit(self.route, text), time.monotonic())
+            self.counters["speculated"] += 1
+
+    def take(self, text: str):
+        """(True, decision) when the final text was speculated on, else (False, None).
+        Speculations for other texts stay (another queued command may take them)
+        until they outlive the ttl."""
+        key = normalize_utterance(text)
+        with self._lock:
+            if not self._pending:
+                return False, None
+            found = self._pending.pop(key, None)
+            self._expire()
+        if found is None or time.monotonic() - found[1] > self.ttl:
+            self._count("misses")
+            return False, None
+        try:
+            decision = found[0].result()
+        except Exception as e:
+            print("Speculative routing failed:", e)
+            self._count("misses")
+            return False, None
+        self._count("hits")
+        return True, decision
+
+    def _expire(self):
+        """Drops speculations older than the ttl (caller holds the lock)."""
+        now = time.monotonic()
+        for key in [k for k, (_, started) in self._pending.items() if now - started > self.ttl]:
+            self._pending.pop(key)[0].cancel()
+
+    # ---------------- PREDICTION ----------------
+
+    def observe(self, decision):
+        """Records the command just run and pre-warms for the likely next one."""
+        if not self.predict:
+            return
+        if not self._bootstrapped:
+            from core.agent.memory import memory
+
+            self._bootstrapped = True
+            self.predictor.bootstrap(memory.get_recent_history(n=memory.history.maxlen or 10)[:-1])
+        if decision:
+            self.predictor.observe(decision.get("action"), decision.get("app") or decision.get("name"))
+        for action, target, probability in self.predictor.predict():
+            if probability >= PREDICT_THRESHOLD:
+                self._executor.submit(self._prewarm, action, target)
+
+    def _prewarm(self, action, target):
+        try:
+            prewarm(action, target)
+            self._count("prewarmed")
+        except Exception as e:
+            print("Pre-warming failed:", e)
+
+    # ---------------- METRICS ----------------
+
+    def _count(self, key):
+        with self._lock:
+            self.counters[key] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters, pending=len(self._pending))
+
+
+# Instantiate the shared speculator
+speculator = Speculator()
@@ -1,14 +1,257 @@
-import pyttsx3
+import hashlib
+import os
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import wave
+from collections import OrderedDict
 
-_engine = pyttsx3.init()
-_engine.setProperty("rate", 175)
-_engine.setProperty("volume", 1.0)
-voices = _engine.getProperty("voices")
-if isinstance(voices, list) and len(voices) > 1:
-    _engine.setProperty("voice", voices[1].id)
+from core.registry import components
+from core.tracing import tracer
 
-def speak(text: str):
+RATE = 175
+VOLUME = 1.0
+
+# Sentences requested this many times are synthesized once (while the worker is
+# idle, so no reply waits for it) and replayed from disk afterwards
+CACHE_AFTER = 2
+CACHE_DIR = "cache/tts"
+CACHE_MAX_FILES = 200
+CACHE_MAX_CHARS = 200
+# Distinct sentences whose request counts are remembered (least recent dropped first)
+REQUEST_MEMORY = 500
+
+_sentence_split = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def split_sentences(text: str) -> list:
+    """Splits a reply so the first sentence can be spoken right away."""
+    return [part.strip() for part in _sentence_split.split(text) if part.strip()]
+
+
+def _create_engine():
+    import pyttsx3
+
+    engine = pyttsx3.init()
+    engine.setProperty("rate", RATE)
+    engine.setProperty("volume", VOLUME)
+    voices = engine.getProperty("voices")
+    if isinstance(voices, list) and len(voices) > 1:
+        engine.setProperty("voice", voices[1].id)
+    return engine
+
+
+def _find_player():
+    if sys.platform == "win32":
+        return "winsound"
+    for player in ("aplay", "paplay", "afplay"):
+        if shutil.which(player):
+            return player
+    return None
+
+
+# ---------------- SPEECH WORKER ---------------- #
+
+class SpeechWorker(threading.Thread):
+    """
+    Owns the pyttsx3 engine on its own thread and speaks queued sentences.
+    cancel() drops everything queued and interrupts the sentence in progress.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, cache_after=CACHE_AFTER):
+        super().__init__(name="speech", daemon=True)
+        self.cache_dir = cache_dir
+        self.cache_after = cache_after
+        self.ready = threading.Event()
+        self.error = None
+
+        self._queue = queue.Queue()
+        self._generation = 0
+        self._speaking = None
+        self._requests = OrderedDict()     # sentence -> times requested, LRU order
+        self._to_cache = OrderedDict()     # sentence -> cache path, written when idle
+        self._player = _find_player()
+        self._voice_key = ""
+
+    # ---------------- PUBLIC API ----------------
+
+    def speak(self, text: str, trace=None):
+        generation = self._generation
+        queued = time.perf_counter()
+        for i, chunk in enumerate(split_sentences(text)):
+            # Only the first sentence is timed: it is what the user waits for
+            self._queue.put((generation, chunk, trace if i == 0 else None, queued))
+
+    def is_speaking(self) -> bool:
+        """True while a sentence plays or more are queued."""
+        return self._speaking is not None or not self._queue.empty()
+
+    def cancel(self):
+        self._generation += 1
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+    # ---------------- WORKER LOOP ----------------
+
+    def run(self):
+        try:
+            self.engine = _create_engine()
+            # Interrupting from the engine's own callback is the thread-safe way
+            self.engine.connect("started-word", self._on_word)
+            self._voice_key = f"{self.engine.getProperty('voice')}|{RATE}"
+        except Exception as e:
+            self.error = e
+            self.ready.set()
+            return
+        self.ready.set()
+
+        while True:
+            if self._to_cache and self._queue.empty():
+                self._synthesize(*self._to_cache.popitem(last=False))
+                continue
+            generation, chunk, trace, queued = self._queue.get()
+            if generation != self._generation:
+                continue
+            self._speaking = generation
+            started = time.perf_counter()
+            try:
+                self._say(chunk, generation)
+            except Exception as e:
+                print("Speech failed:", e)
+            self._speaking = None
+            if trace is not None:
+                tracer.record("speech.wait", (started - queued) * 1000, trace=trace, ended=started)
+                tracer.record("speech.say", (time.perf_counter() - started) * 1000, trace=trace)
+
+    def _cancelled(self, generation) -> bool:
+        return generation != self._generation
+
+    def _on_word(self, name, location, length):
+        if self._speaking is not None and self._cancelled(self._speaking):
+            self.engine.stop()
+
+    def _say(self, chunk, generation):
+        if self._player and len(chunk) <= CACHE_MAX_CHARS:
+            path = self._cache_path(chunk)
+            if os.path.exists(path):
+                try:
+                    self._play(path, generation)
+                    return
+                except (OSError, wave.Error) as e:
+                    print("Cached speech unplayable, speaking it instead:", e)
+            elif self._count_request(chunk) >= self.cache_after and len(self._to_cache) < CACHE_MAX_FILES:
+                self._to_cache[chunk] = path
+
+        self.engine.say(chunk)
+        self.engine.runAndWait()
+
+    # ---------------- AUDIO CACHE ----------------
+
+    def _count_request(self, chunk) -> int:
+        count = self._requests.pop(chunk, 0) + 1
+        self._requests[chunk] = count
+        while len(self._requests) > REQUEST_MEMORY:
+            self._requests.popitem(last=False)
+        return count
+
+    def _cache_path(self, chunk) -> str:
+        digest = hashlib.sha1(f"{self._voice_key}|{chunk}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.wav")
+
+    def _synthesize(self, chunk, path):
+        """Writes a sentence's audio to the cache; some drivers write nothing,
+        and then the sentence keeps being spoken live."""
+        tmp_path = path[:-len(".wav")] + ".tmp.wav"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.engine.save_to_file(chunk, tmp_path)
+            self.engine.runAndWait()
+            if os.path.exists(tmp_path) and os.path.getsize(tmp_path) > 0:
+                os.replace(tmp_path, path)
+                self._prune_cache()
+            else:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                print("This speech driver cannot save audio; replies are always spoken live.")
+                self._player = None
+                self._to_cache.clear()
+        except Exception as e:
+            print("Could not cache speech:", e)
+
+    def _prune_cache(self):
+        files = [os.path.join(self.cache_dir, f) for f in os.listdir(self.cache_dir)]
+        if len(files) <= CACHE_MAX_FILES:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - CACHE_MAX_FILES]:
+            os.remove(path)
+
+    def _play(self, path, generation):
+        os.utime(path)  # keeps frequently used replies out of pruning
+        if self._player == "winsound":
+            import winsound
+
+            with wave.open(path, "rb") as w:
+                duration = w.getnframes() / float(w.getframerate())
+            winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC)
+            ends = time.monotonic() + duration
+            while time.monotonic() < ends:
+                if self._cancelled(generation):
+                    winsound.PlaySound(None, 0)
+                    return
+                time.sleep(0.05)
+            return
+
+        args = [self._player, "-q", path] if self._player == "aplay" else [self._player, path]
+        process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        while process.poll() is None:
+            if self._cancelled(generation):
+                process.terminate()
+                return
+            time.sleep(0.05)
+
+
+def _start_worker():
+    worker = SpeechWorker()
+    worker.start()
+    worker.ready.wait()
+    if worker.error is not None:
+        raise worker.error
+    return worker
+
+
+components.register("speech", _start_worker)
+
+
+def speak(text: str, trace=None):
+    """Queues text to be spoken and returns immediately; `trace` is the
+    command the reply belongs to, for the latency breakdown."""
     if not text:
         return
-    _engine.say(text)
-    _engine.runAndWait()
\ No newline at end of file
+    components.get("speech").speak(text, trace)
+
+
+def cancel():
+    """Barge-in: stops the current reply when a new command arrives."""
+    if components.is_ready("speech"):
+        try:
+            components.get("speech").cancel()
+        except Exception:
+            pass
+
+
+def is_speaking() -> bool:
+    """Whether a reply is playing; the microphone ignores audio meanwhile."""
+    if not components.is_ready("speech"):
+        return False
+    try:
+        return components.get("speech").is_speaking()
+    except Exception:
+        return False
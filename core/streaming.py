@@ -0,0 +1,110 @@
+"""
+Streaming skill results. A skill may return a plain string, or a generator
+(or async iterator) of text chunks that reach the UI as they are produced:
+
+    def list_things():
+        for batch in batches:
+            yield "\n".join(batch)                          # shown at once
+        yield Spoken(summarize(total, "things", first))     # said instead of the list
+        return final_text                                   # optional, replaces the chunks
+
+drain() runs the stream and returns a Reply: the full text, plus the
+short version speech should use.
+"""
+# Items named in a spoken summary
+SUMMARY_ITEMS = 5
+# Chunk size for skills that stream a list they already hold
+STREAM_BATCH = 25
+
+_NUMBERS = ["no", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten"]
+
+
+class Spoken(str):
+    """Yielded by a streaming skill: what to say instead of reading the result."""
+
+
+class Reply(str):
+    """A skill result whose spoken version differs from the text shown."""
+
+    def __new__(cls, text, spoken=None):
+        reply = super().__new__(cls, text)
+        reply.spoken = spoken or str(text)
+        return reply
+
+
+def spoken(result) -> str:
+    """The text to speak for any result."""
+    return getattr(result, "spoken", result)
+
+
+def summarize(count: int, noun: str, first) -> str:
+    """'412 files, here are the first five: a, b, c, d and e.'"""
+    first = [str(item) for item in first][:SUMMARY_ITEMS]
+    if not count:
+        return f"No {noun}."
+    if not first:
+        return f"{count} {noun}."
+    listed = first[0] if len(first) == 1 else ", ".join(first[:-1]) + " and " + first[-1]
+    if count <= len(first):
+        return f"{count} {noun}: {listed}."
+    number = _NUMBERS[len(first)] if len(first) < len(_NUMBERS) else str(len(first))
+    return f"{count} {noun}, here are the first {number}: {listed}."
+
+
+def batched(lines, size=STREAM_BATCH):
+    """Joins lines into chunks of `size`."""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) == size:
+            yield "\n".join(batch)
+            batch = []
+    if batch:
+        yield "\n".join(batch)
+
+
+def is_stream(result) -> bool:
+    return hasattr(result, "__aiter__") or (hasattr(result, "__next__") and not isinstance(result, str))
+
+
+def drain(result, on_chunk=None):
+    """Runs a streamed result to the end, passing each chunk to on_chunk;
+    strings are returned as they are."""
+    if not is_stream(result):
+        return result
+    if hasattr(result, "__aiter__"):
+        result = _iterate(result)
+
+    chunks, said = [], None
+    while True:
+        try:
+            chunk = next(result)
+        except StopIteration as stop:
+            final = stop.value
+            break
+        if isinstance(chunk, Spoken):
+            said = str(chunk)
+            continue
+        chunks.append(chunk)
+        if on_chunk is not None:
+            on_chunk(chunk)
+    text = final if final is not None else "\n".join(chunks)
+    return Reply(text, said)
+
+
+def _iterate(stream):
+    """An async iterator driven from this (worker) thread on its own loop."""
+    # asyncio costs ~30 ms to import and only async skills need it
+    import asyncio
+
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(stream.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        if hasattr(stream, "aclose"):
+            loop.run_until_complete(stream.aclose())
+        loop.close()
@@ -0,0 +1,219 @@
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# ORBITOS_TRACE=1 appends spans to cache/traces.jsonl, any other value is a path
+TRACE_EXPORT = os.getenv("ORBITOS_TRACE", "0")
+DEFAULT_EXPORT_FILE = "cache/traces.jsonl"
+# Finished commands kept for the latency panel
+RECENT_TRACES = 20
+HISTOGRAM_SAMPLES = 1000
+
+# Latency panel columns and the span names (by prefix) summed into each
+STAGE_COLUMNS = (
+    ("voice", ("voice.",)),
+    ("queue", ("queue",)),
+    ("local", ("route.local",)),
+    ("agent", ("agent",)),
+    ("skill", ("skill.",)),
+    ("tts", ("speech.",)),
+)
+
+_current = contextvars.ContextVar("orbitos_trace", default=None)
+
+
+class Trace:
+    """The spans of one command, from speech recognition to the spoken reply."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, text=""):
+        self.id = next(self._ids)
+        self.text = text
+        self.state = None
+        self.started = None     # perf_counter of the first span, or of submission
+        self.total_ms = None    # set when the command's result is ready
+        self.spans = []         # (name, offset_ms, ms, thread, attrs)
+        self._lock = threading.Lock()
+
+    def mark_started(self, at=None):
+        with self._lock:
+            if self.started is None:
+                self.started = at if at is not None else time.perf_counter()
+
+    def add(self, name, started, ms, attrs=None):
+        self.mark_started(started)
+        span = (name, (started - self.started) * 1000, ms, threading.current_thread().name, attrs or {})
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def stages(self) -> dict:
+        """Total milliseconds per span name, in first-seen order."""
+        totals = {}
+        with self._lock:
+            for name, _, ms, _, _ in self.spans:
+                totals[name] = totals.get(name, 0.0) + ms
+        return totals
+
+
+def breakdown(trace) -> dict:
+    """Milliseconds per STAGE_COLUMNS column (None where the stage did not run)."""
+    stages = trace.stages()
+    columns = {}
+    for column, prefixes in STAGE_COLUMNS:
+        times = [ms for name, ms in stages.items() if name.startswith(prefixes)]
+        columns[column] = sum(times) if times else None
+    return columns
+
+
+class Histogram:
+    """Count and total of every sample, percentiles over the most recent ones."""
+
+    def __init__(self, size=HISTOGRAM_SAMPLES):
+        self.count = 0
+        self.total_ms = 0.0
+        self.samples = deque(maxlen=size)
+
+    def add(self, ms):
+        self.count += 1
+        self.total_ms += ms
+        self.samples.append(ms)
+
+    def summary(self) -> dict:
+        values = sorted(self.samples)
+        summary = {"count": self.count, "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0}
+        for pct in (50, 95, 99):
+            index = min(len(values) - 1, int(len(values) * pct / 100))
+            summary[f"p{pct}_ms"] = round(values[index], 2) if values else 0.0
+        return summary
+
+
+class Tracer:
+    """
+    Times pipeline stages. Spans land in the trace current on the calling
+    thread (if any) and always in a per-stage histogram; finished traces
+    are kept for the UI and optionally appended to a JSONL file.
+    """
+
+    def __init__(self, export=TRACE_EXPORT, recent=RECENT_TRACES):
+        self.export_file = None
+        if export not in ("", "0"):
+            self.export_file = DEFAULT_EXPORT_FILE if export == "1" else export
+        self.recent = deque(maxlen=recent)
+        self._histograms = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+        self._export_handle = None
+
+    def add_listener(self, callback):
+        """callback(trace) runs when a trace finishes or gets a late span (e.g. TTS)."""
+        self._listeners.append(callback)
+
+    # ---------------- TRACES ----------------
+
+    def new_trace(self, text="") -> Trace:
+        return Trace(text)
+
+    def start(self, text="") -> Trace:
+        """Creates a trace and makes it current on this thread."""
+        trace = Trace(text)
+        _current.set(trace)
+        return trace
+
+    def current(self):
+        return _current.get()
+
+    @contextmanager
+    def use(self, trace):
+        """Makes `trace` current for the block."""
+        token = _current.set(trace)
+        try:
+            yield trace
+        finally:
+            _current.reset(token)
+
+    def finish(self, trace, state="done"):
+        trace.state = state
+        if trace.started is not None:
+            trace.total_ms = (time.perf_counter() - trace.started) * 1000
+        with self._lock:
+            self.recent.append(trace)
+        self._export({"trace": trace.id, "text": trace.text, "state": state,
+                      "total_ms": round(trace.total_ms or 0.0, 3), "at": time.time()})
+        self._notify(trace)
+
+    # ---------------- SPANS ----------------
+
+    @contextmanager
+    def span(self, name, trace=None, **attrs):
+        """Times the block as stage `name`; attrs may be filled in inside it."""
+        started = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            self._record(name, started, (time.perf_counter() - started) * 1000, trace, attrs)
+
+    def record(self, name, ms, trace=None, ended=None, **attrs):
+        """Adds a stage measured elsewhere that ended at `ended` (default: now)."""
+        ended = time.perf_counter() if ended is None else ended
+        self._record(name, ended - ms / 1000, ms, trace, attrs)
+
+    def _record(self, name, started, ms, trace, attrs):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.add(ms)
+
+        trace = trace if trace is not None else _current.get()
+        if trace is None:
+            return
+        span_name, offset, ms, thread, attrs = trace.add(name, started, ms, attrs)
+        self._export({"trace": trace.id, "span": span_name, "offset_ms": round(offset, 3),
+                      "ms": round(ms, 3), "thread": thread, **attrs})
+        # Spans arriving after the result (speech) refresh whoever shows the trace
+        if trace.state is not None:
+            self._notify(trace)
+
+    # ---------------- OUTPUT ----------------
+
+    def histograms(self) -> dict:
+        with self._lock:
+            return {name: h.summary() for name, h in self._histograms.items()}
+
+    def recent_traces(self) -> list:
+        with self._lock:
+            return list(self.recent)
+
+    def _notify(self, trace):
+        for callback in self._listeners:
+            try:
+                callback(trace)
+            except Exception as e:
+                print("Trace listener failed:", e)
+
+    def _export(self, record):
+        if self.export_file is None:
+            return
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._export_lock:
+            try:
+                if self._export_handle is None:
+                    os.makedirs(os.path.dirname(self.export_file) or ".", exist_ok=True)
+                    # Line-buffered so a crash loses at most the line being written
+                    self._export_handle = open(self.export_file, "a", encoding="utf-8", buffering=1)
+                self._export_handle.write(line + "\n")
+            except OSError as e:
+                print("Trace export failed, disabling it:", e)
+                self.export_file = None
+
+
+# Instantiate the shared tracer
+tracer = Tracer()
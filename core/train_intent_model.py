@@ -1,3 +1,6 @@
+import os
+import sys
+
 import pandas as pd
 from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.pipeline import Pipeline
@@ -6,8 +9,15 @@ from sklearn.svm import LinearSVC
 from sklearn.metrics import accuracy_score, classification_report
 import joblib
 
+# Run as a script from the project root: make the core package importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.intent_artifact import ARTIFACT_DIR, export_artifact, load_artifact, check_parity
+from core.multilingual import normalize
 
 data = pd.read_csv("data/commands.csv")
+# Telugu/Hindi commands, trained on in the English form the app classifies them in
+multilingual = pd.read_csv("data/commands_multilingual.csv")
+multilingual["sentence"] = multilingual["sentence"].map(normalize)
 
 X = data["sentence"]
 y = data["intent"]
@@ -16,6 +26,12 @@ y = data["intent"]
 X_train, X_test, y_train, y_test = train_test_split(
     X, y, test_size=0.2, random_state=42, stratify=y
 )
+# Split the same way so the English holdout matches the online learner's
+M_train, M_test, my_train, my_test = train_test_split(
+    multilingual["sentence"], multilingual["intent"], test_size=0.2, random_state=42,
+    stratify=multilingual["intent"]
+)
+X_train, y_train = pd.concat([X_train, M_train]), pd.concat([y_train, my_train])
 
 pipeline = Pipeline([
     ("tfidf", TfidfVectorizer(
@@ -48,6 +64,16 @@ acc = accuracy_score(y_test, pred)
 print("Best Parameters:", grid.best_params_)
 print("Model Accuracy:", acc)
 print("\nClassification Report:\n", classification_report(y_test, pred))
+print("Telugu/Hindi Accuracy:", accuracy_score(my_test, best_model.predict(M_test)))
 
 joblib.dump(best_model, "core/intent_model.pkl")
 print("Model saved as core/intent_model.pkl")
+
+# Compact artifact the app loads, checked against the pipeline on the whole dataset
+export_artifact(best_model, ARTIFACT_DIR)
+parity = check_parity(best_model, load_artifact(ARTIFACT_DIR), pd.concat([X, multilingual["sentence"]]))
+print(f"Artifact parity over {parity['texts']} sentences: {len(parity['mismatched'])} mismatched, "
+      f"max score difference {parity['max_score_diff']:.2e}")
+if not parity["ok"]:
+    raise SystemExit("Exported artifact does not match the trained model")
+print(f"Artifact saved in {ARTIFACT_DIR}")
@@ -1,18 +1,351 @@
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import speech_recognition as sr
 
+from core.registry import components
+from core.speech_engine import is_speaking
+from core.speculation import speculator
+from core.tracing import tracer
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2           # 16-bit PCM
+FRAME_MS = 30
+FRAMES_PER_READ = 3        # VAD runs on ~90 ms blocks
+# Audio is still dropped this long after a spoken reply ends (room echo, player lag)
+ECHO_TAIL_MS = 300
+
+
+# ---------------- AUDIO SOURCES ---------------- #
+
+class MicrophoneSource:
+    """One long-lived microphone stream instead of a new one per command."""
+
+    def __init__(self, sample_rate=SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self._mic = None
+
+    def open(self):
+        self._mic = sr.Microphone(sample_rate=self.sample_rate)
+        self._mic.__enter__()
+
+    def read(self, n_samples):
+        data = self._mic.stream.read(n_samples)
+        return np.frombuffer(data, dtype=np.int16)
+
+    def flush(self):
+        """Drops audio buffered while nobody was listening."""
+        stream = self._mic.stream.pyaudio_stream
+        available = stream.get_read_available()
+        if available:
+            stream.read(available, exception_on_overflow=False)
+
+    def close(self):
+        if self._mic is not None:
+            self._mic.__exit__(None, None, None)
+            self._mic = None
+
+
+class WavSource:
+    """Plays a 16-bit mono WAV file through the pipeline (for tests)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.sample_rate = SAMPLE_RATE
+        self._wav = None
+
+    def open(self):
+        self._wav = wave.open(self.path, "rb")
+        if self._wav.getsampwidth() != SAMPLE_WIDTH or self._wav.getnchannels() != 1:
+            raise ValueError(f"{self.path} must be 16-bit mono PCM")
+        self.sample_rate = self._wav.getframerate()
+
+    def read(self, n_samples):
+        data = self._wav.readframes(n_samples)
+        if not data:
+            return None
+        return np.frombuffer(data, dtype=np.int16)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+# ---------------- RECOGNIZER BACKENDS ---------------- #
+
+class GoogleBackend:
+    """Google Web Speech through speech_recognition."""
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def recognize(self, pcm: bytes, sample_rate: int):
+        audio = sr.AudioData(pcm, sample_rate, SAMPLE_WIDTH)
+        try:
+            return self.recognizer.recognize_google(audio)  #type: ignore
+        except sr.UnknownValueError:
+            print("Could not understand audio")
+            return None
+        except sr.RequestError as e:
+            print(f"Error with Google Speech Recognition service: {e}")
+            return None
+
+
+# ---------------- VOICE ACTIVITY DETECTION ---------------- #
+
+class RingBuffer:
+    """Fixed-size sample history, used as pre-roll and for recalibration."""
+
+    def __init__(self, size):
+        self._data = np.zeros(size, dtype=np.int16)
+        self._pos = 0
+        self._filled = 0
+
+    def write(self, samples):
+        samples = samples[-len(self._data):]
+        end = self._pos + len(samples)
+        if end <= len(self._data):
+            self._data[self._pos:end] = samples
+        else:
+            split = len(self._data) - self._pos
+            self._data[self._pos:] = samples[:split]
+            self._data[:end - len(self._data)] = samples[split:]
+        self._pos = end % len(self._data)
+        self._filled = min(self._filled + len(samples), len(self._data))
+
+    def read(self):
+        if self._filled < len(self._data):
+            return self._data[:self._filled].copy()
+        return np.concatenate((self._data[self._pos:], self._data[:self._pos]))
+
+    def clear(self):
+        self._pos = 0
+        self._filled = 0
+
+
+class VoiceActivityDetector:
+    """Energy VAD: a frame is speech when its RMS clears the noise floor by `ratio`."""
+
+    def __init__(self, frame_len, ratio=3.0, min_threshold=300.0):
+        self.frame_len = frame_len
+        self.ratio = ratio
+        self.min_threshold = min_threshold
+        self.noise_rms = min_threshold / ratio
+
+    @property
+    def threshold(self):
+        return max(self.noise_rms * self.ratio, self.min_threshold)
+
+    def frame_rms(self, samples):
+        n = len(samples) // self.frame_len
+        frames = samples[:n * self.frame_len].reshape(n, self.frame_len).astype(np.float32)
+        return np.sqrt(np.mean(frames * frames, axis=1))
+
+    def calibrate(self, samples):
+        rms = self.frame_rms(samples)
+        if len(rms):
+            self.noise_rms = float(np.median(rms))
+
+    def classify(self, samples):
+        """Returns (rms, is_speech) arrays, one entry per frame."""
+        rms = self.frame_rms(samples)
+        return rms, rms > self.threshold
+
+
+# ---------------- PIPELINE ---------------- #
+
+class VoicePipeline:
+    """
+    Long-lived capture -> VAD -> recognizer. Noise is calibrated once when the
+    stream opens and refreshed from idle audio, and only speech segments are
+    sent to the recognizer backend. With `on_partial`, the speech so far is
+    also recognized in the background at each short pause (partial_ms) and
+    the text handed to on_partial(text) before the utterance ends.
+    While is_muted() is true (the assistant is speaking) captured audio is
+    dropped, so replies are never transcribed as commands.
+    """
+
+    def __init__(self, source, backend, calibrate_s=0.5, recalibrate_every_s=60.0,
+                 preroll_ms=300, start_ms=90, silence_ms=800, max_phrase_s=15.0,
+                 on_partial=None, partial_ms=300, is_muted=None, echo_tail_ms=ECHO_TAIL_MS):
+        self.source = source
+        self.backend = backend
+        self.is_muted = is_muted
+        self.echo_tail_s = echo_tail_ms / 1000
+        self._muted_until = 0.0
+        self.on_partial = on_partial
+        self.partial_frames = max(1, partial_ms // FRAME_MS)
+        self._partials = None
+        self.calibrate_s = calibrate_s
+        self.recalibrate_every_s = recalibrate_every_s
+        self.preroll_ms = preroll_ms
+        self.start_frames = max(1, start_ms // FRAME_MS)
+        self.silence_frames = max(1, silence_ms // FRAME_MS)
+        self.max_phrase_s = max_phrase_s
+
+        self.vad = None
+        self._history = None
+        self._calibrated_at = 0.0
+        self._lock = threading.Lock()
+        self._opened = False
+        self.exhausted = False
+
+    def open(self):
+        if self._opened:
+            return
+        self.source.open()
+        rate = self.source.sample_rate
+        self.frame_len = rate * FRAME_MS // 1000
+        self.vad = VoiceActivityDetector(self.frame_len)
+        self._history = RingBuffer(rate * 2)
+        self._preroll = RingBuffer(rate * self.preroll_ms // 1000)
+
+        calibration = self.source.read(int(rate * self.calibrate_s))
+        if calibration is not None:
+            self.vad.calibrate(calibration)
+        self._calibrated_at = time.monotonic()
+        self._opened = True
+
+    def close(self):
+        self.source.close()
+        self._opened = False
+
+    def _maybe_recalibrate(self):
+        if time.monotonic() - self._calibrated_at >= self.recalibrate_every_s:
+            self.vad.calibrate(self._history.read())
+            self._calibrated_at = time.monotonic()
+
+    def next_segment(self, timeout=None, stop_event=None):
+        """Blocks until one utterance is captured; returns its PCM bytes or None."""
+        self.open()
+        block = self.frame_len * FRAMES_PER_READ
+        deadline = None if timeout is None else time.monotonic() + timeout
+        max_frames = int(self.max_phrase_s * 1000 / FRAME_MS)
+
+        speech, voiced_run, silent_run = None, 0, 0
+        partial_sent = False
+        self._preroll.clear()
+
+        while stop_event is None or not stop_event.is_set():
+            samples = self.source.read(block)
+            if samples is None or not len(samples):
+                self.exhausted = True
+                break
+            if self._muted():
+                # Our own reply: forget any utterance and pre-roll it started
+                speech, voiced_run, silent_run = None, 0, 0
+                partial_sent = False
+                self._preroll.clear()
+                if deadline is not None and time.monotonic() > deadline:
+                    return None
+                continue
+            rms, voiced = self.vad.classify(samples)
+
+            if speech is None:
+                self._history.write(samples)
+                for i, is_voiced in enumerate(voiced):
+                    voiced_run = voiced_run + 1 if is_voiced else 0
+                    if voiced_run >= self.start_frames:
+                        speech = [self._preroll.read(), samples[: (i + 1) * self.frame_len]]
+                        rest = samples[(i + 1) * self.frame_len:]
+                        if len(rest):
+                            speech.append(rest)
+                        break
+                else:
+                    self._preroll.write(samples)
+                    # Track slow changes in background noise while idle
+                    quiet = rms[~voiced]
+                    if len(quiet):
+                        self.vad.noise_rms = 0.95 * self.vad.noise_rms + 0.05 * float(quiet.mean())
+                    self._maybe_recalibrate()
+                    if deadline is not None and time.monotonic() > deadline:
+                        return None
+                continue
+
+            speech.append(samples)
+            for is_voiced in voiced:
+                silent_run = 0 if is_voiced else silent_run + 1
+                if is_voiced:
+                    partial_sent = False
+            if silent_run >= self.silence_frames or \
+                    sum(len(s) for s in speech) >= max_frames * self.frame_len:
+                break
+            if self.on_partial is not None and not partial_sent and silent_run >= self.partial_frames:
+                # A short pause: what was said so far is likely the whole command
+                partial_sent = True
+                self._recognize_partial(np.concatenate(speech).astype(np.int16).tobytes())
+
+        if not speech:
+            return None
+        return np.concatenate(speech).astype(np.int16).tobytes()
+
+    def _muted(self) -> bool:
+        if self.is_muted is not None and self.is_muted():
+            self._muted_until = time.monotonic() + self.echo_tail_s
+            return True
+        return time.monotonic() < self._muted_until
+
+    def listen(self, timeout=None):
+        with self._lock:
+            self.open()
+            self.source.flush()
+            print("Listening...")
+            pcm = self.next_segment(timeout)
+        if pcm is None:
+            return None
+        return self._recognize(pcm)
+
+    def _recognize(self, pcm):
+        with tracer.span("voice.recognize") as span:
+            span["audio_ms"] = round(len(pcm) / SAMPLE_WIDTH / self.source.sample_rate * 1000)
+            return self.backend.recognize(pcm, self.source.sample_rate)
+
+    def _recognize_partial(self, pcm):
+        if self._partials is None:
+            self._partials = ThreadPoolExecutor(max_workers=1, thread_name_prefix="voice-partial")
+
+        def recognize():
+            try:
+                text = self.backend.recognize(pcm, self.source.sample_rate)
+                if text:
+                    self.on_partial(text)
+            except Exception as e:
+                print("Partial recognition failed:", e)
+
+        self._partials.submit(recognize)
+
+    def run_hands_free(self, on_text, stop_event):
+        """Transcribes utterances until stop_event is set; idles on blocking reads."""
+        with self._lock:
+            self.open()
+            self.source.flush()
+            while not stop_event.is_set():
+                pcm = self.next_segment(stop_event=stop_event)
+                if pcm is None:
+                    if stop_event.is_set() or self.exhausted:
+                        break
+                    continue
+                text = self._recognize(pcm)
+                if text:
+                    on_text(text)
+
+
+def _create_pipeline():
+    # Partial transcripts only matter when they are speculated on
+    on_partial = speculator.speculate if speculator.enabled else None
+    return VoicePipeline(MicrophoneSource(), GoogleBackend(), on_partial=on_partial, is_muted=is_speaking)
+
+
+# Not warmed at startup so the microphone only opens once voice is used
+components.register("voice", _create_pipeline, warm=False)
+
+
 def listen_once():
-    r = sr.Recognizer()
-    with sr.Microphone() as source:
-        print("Listening...")
-        r.adjust_for_ambient_noise(source, duration=0.5)
-        audio = r.listen(source)
-
-    try:
-        text = r.recognize_google(audio)  #type: ignore
-        return text
-    except sr.UnknownValueError:
-        print("Could not understand audio")
-        return None
-    except sr.RequestError as e:
-        print(f"Error with Google Speech Recognition service: {e}")
-        return None
+    return components.get("voice").listen()
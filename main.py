@@ -1,4 +1,14 @@
-from ui.frontend import launch_ui
+import sys
+
+from core.registry import components
 
 if __name__ == "__main__":
-    launch_ui()
+    # --headless serves commands over a local socket without loading Qt
+    if "--headless" in sys.argv[1:]:
+        from core.server import serve
+        components.mark("imports done")
+        serve(sys.argv[1:])
+    else:
+        from ui.frontend import launch_ui
+        components.mark("imports done")
+        launch_ui()
@@ -0,0 +1,347 @@
+import bisect
+import difflib
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import threading
+import time
+
+CATALOG_VERSION = 1
+# Directory mtimes are re-checked at most this often when resolving names
+REFRESH_INTERVAL = 30.0
+MAX_DEPTH = 3
+
+# Entries from these sources are listed as installed apps; PATH executables
+# are only used to resolve names, there are thousands of them on Linux
+LISTED_KINDS = {"desktop", "shortcut", "bundle"}
+
+# Launchers whose name says nothing about the app they start
+WRAPPERS = {"env", "sh", "bash", "flatpak", "snap", "gtk-launch"}
+
+# Spoken nicknames -> catalog names
+ALIASES = {
+    "vs code": "visual studio code",
+    "vscode": "visual studio code",
+    "chrome": "google chrome",
+    "word": "microsoft word",
+    "excel": "microsoft excel",
+}
+
+_field_code = re.compile(r"%[a-zA-Z]")
+
+
+def normalize(name: str) -> str:
+    name = name.lower()
+    if name.endswith(".exe"):
+        name = name[:-4]
+    return " ".join(re.sub(r"[^\w\s]", " ", name).split())
+
+
+# ---------------- SOURCES ---------------- #
+
+def _default_sources():
+    """(directory, kind) roots to scan for the current platform."""
+    home = os.path.expanduser("~")
+    sources = []
+
+    if sys.platform == "win32":
+        for base in (os.getenv("ProgramData"), os.getenv("APPDATA")):
+            if base:
+                sources.append((os.path.join(base, "Microsoft", "Windows", "Start Menu", "Programs"), "shortcut"))
+    elif sys.platform == "darwin":
+        sources += [("/Applications", "bundle"), ("/System/Applications", "bundle"),
+                    (os.path.join(home, "Applications"), "bundle")]
+    else:
+        data_home = os.getenv("XDG_DATA_HOME") or os.path.join(home, ".local", "share")
+        data_dirs = (os.getenv("XDG_DATA_DIRS") or "/usr/local/share:/usr/share").split(":")
+        for base in [data_home] + data_dirs:
+            sources.append((os.path.join(base, "applications"), "desktop"))
+        sources += [
+            ("/var/lib/flatpak/exports/share/applications", "desktop"),
+            (os.path.join(data_home, "flatpak", "exports", "share", "applications"), "desktop"),
+            ("/var/lib/snapd/desktop/applications", "desktop"),
+        ]
+
+    for directory in os.getenv("PATH", "").split(os.pathsep):
+        if directory:
+            sources.append((directory, "exe"))
+    return sources
+
+
+def _parse_desktop_file(path):
+    """Returns (name, exec) for a launchable .desktop file, else None."""
+    values = {}
+    in_entry = False
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("["):
+                    in_entry = line == "[Desktop Entry]"
+                    continue
+                if in_entry and "=" in line:
+                    key, value = line.split("=", 1)
+                    values.setdefault(key.strip(), value.strip())
+    except OSError:
+        return None
+
+    if values.get("Type", "Application") != "Application":
+        return None
+    if values.get("NoDisplay") == "true" or values.get("Hidden") == "true":
+        return None
+    if not values.get("Name") or not values.get("Exec"):
+        return None
+    command = _field_code.sub("", values["Exec"].replace("%%", "\0")).replace("\0", "%")
+    return values["Name"], command.strip()
+
+
+def _scan_dir(path, kind):
+    """Scans one directory (not recursive); returns (entries, subdirectories)."""
+    entries, subdirs = [], []
+    path_exts = (os.getenv("PATHEXT") or ".EXE").lower().split(";")
+
+    try:
+        with os.scandir(path) as it:
+            for item in it:
+                try:
+                    is_dir = item.is_dir()
+                except OSError:
+                    continue
+                lower = item.name.lower()
+
+                if kind == "bundle" and lower.endswith(".app"):
+                    entries.append({"name": item.name[:-4], "target": item.path, "kind": kind})
+                elif is_dir:
+                    if kind != "exe":
+                        subdirs.append(item.path)
+                elif kind == "desktop" and lower.endswith(".desktop"):
+                    parsed = _parse_desktop_file(item.path)
+                    if parsed:
+                        name, command = parsed
+                        entries.append({"name": name, "target": command, "kind": kind})
+                elif kind == "shortcut" and lower.endswith((".lnk", ".url")):
+                    entries.append({"name": os.path.splitext(item.name)[0], "target": item.path, "kind": kind})
+                elif kind == "exe":
+                    if sys.platform == "win32":
+                        if os.path.splitext(lower)[1] in path_exts:
+                            entries.append({"name": os.path.splitext(item.name)[0], "target": item.path, "kind": kind})
+                    elif os.access(item.path, os.X_OK):
+                        entries.append({"name": item.name, "target": item.path, "kind": kind})
+    except OSError:
+        pass
+    return entries, subdirs
+
+
+def _binary_name(command):
+    try:
+        parts = shlex.split(command)
+    except ValueError:
+        return ""
+    if not parts or os.path.basename(parts[0]) in WRAPPERS:
+        return ""
+    return os.path.basename(parts[0])
+
+
+# ---------------- CATALOG ---------------- #
+
+class AppCatalog:
+    """
+    Installed applications from .desktop files, Start Menu shortcuts, app
+    bundles and PATH executables. Scans are cached per directory on disk and
+    only directories whose mtime changed are rescanned.
+    """
+
+    def __init__(self, cache_file="cache/app_catalog.json", sources=None):
+        self.cache_file = cache_file
+        self.sources = sources
+        self._dirs = {}
+        self._index = {}
+        self._keys = []
+        self._listed_keys = []
+        self._words = {}
+        self._refreshed_at = 0.0
+        self._loaded = False
+        self.version = 0
+        self._lock = threading.RLock()
+
+    def load(self):
+        """Reads the disk cache and brings it up to date; returns self."""
+        with self._lock:
+            if not self._loaded:
+                self._read_cache()
+                self._loaded = True
+            self.refresh()
+        return self
+
+    # ---------------- SCANNING ----------------
+
+    def refresh(self, force=False):
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < REFRESH_INTERVAL and self._index:
+                return
+            sources = self.sources if self.sources is not None else _default_sources()
+            todo = [(path, kind, 0) for path, kind in sources]
+            fresh, changed = {}, False
+
+            while todo:
+                path, kind, depth = todo.pop()
+                if path in fresh:
+                    continue
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except OSError:
+                    continue
+                record = self._dirs.get(path)
+                if record is None or record["mtime"] != mtime or record["kind"] != kind:
+                    entries, subdirs = _scan_dir(path, kind)
+                    record = {"mtime": mtime, "kind": kind, "entries": entries, "subdirs": subdirs}
+                    changed = True
+                fresh[path] = record
+                if depth < MAX_DEPTH:
+                    todo.extend((sub, kind, depth + 1) for sub in record["subdirs"])
+
+            if changed or fresh.keys() != self._dirs.keys():
+                self._dirs = fresh
+                self._build_index()
+                self._write_cache()
+            elif not self._index:
+                self._build_index()
+            self._refreshed_at = time.monotonic()
+
+    def _build_index(self):
+        index, words = {}, {}
+        for record in self._dirs.values():
+            for entry in record["entries"]:
+                keys = {normalize(entry["name"])}
+                if entry["kind"] == "desktop":
+                    # "code" for Visual Studio Code, "gnome-terminal" for Terminal
+                    keys.add(normalize(_binary_name(entry["target"])))
+                for key in keys:
+                    if not key:
+                        continue
+                    index.setdefault(key, []).append(entry)
+                    # Loose matches only ever land on listed apps, never a PATH binary
+                    if entry["kind"] in LISTED_KINDS:
+                        for word in key.split():
+                            words.setdefault(word, set()).add(key)
+
+        # Listed sources win over bare executables with the same name
+        for entries in index.values():
+            entries.sort(key=lambda e: e["kind"] not in LISTED_KINDS)
+        self._index = index
+        self._keys = sorted(index)
+        self._listed_keys = [key for key in self._keys if index[key][0]["kind"] in LISTED_KINDS]
+        self._words = words
+        self.version += 1
+
+    # ---------------- DISK CACHE ----------------
+
+    def _read_cache(self):
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print("App catalog cache unreadable, rescanning:", e)
+            return
+        if cached.get("version") == CATALOG_VERSION:
+            self._dirs = cached.get("dirs", {})
+
+    def _write_cache(self):
+        directory = os.path.dirname(self.cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Per process: skill workers may save the catalog at the same time
+        tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump({"version": CATALOG_VERSION, "dirs": self._dirs}, f)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            print("Could not save app catalog:", e)
+
+    # ---------------- LOOKUP ----------------
+
+    def names(self) -> list:
+        """Display names of listed (non-PATH) applications."""
+        self.load()
+        with self._lock:
+            names = {
+                entry["name"]
+                for entries in self._index.values()
+                for entry in entries
+                if entry["kind"] in LISTED_KINDS
+            }
+        return sorted(names, key=str.lower)
+
+    def phrases(self):
+        """(version, normalized names and aliases) known so far, without loading."""
+        with self._lock:
+            return self.version, self._keys + list(ALIASES)
+
+    def resolve(self, spoken: str, rescan=True):
+        """Finds the entry for a spoken app name: exact, prefix, words, then fuzzy.
+        PATH executables only match exactly, so "open power" cannot run poweroff.
+        rescan=False skips the forced refresh on a miss."""
+        self.load()
+        entry = self._lookup(spoken)
+        if entry is None and rescan:
+            # Maybe it was installed since the last refresh
+            self.refresh(force=True)
+            entry = self._lookup(spoken)
+        return entry
+
+    def _lookup(self, spoken):
+        key = normalize(spoken)
+        if not key:
+            return None
+        with self._lock:
+            alias = ALIASES.get(key)
+            if alias in self._index:
+                return self._index[alias][0]
+
+            if key in self._index:
+                return self._index[key][0]
+
+            start = bisect.bisect_left(self._listed_keys, key)
+            prefixed = []
+            for candidate in self._listed_keys[start:]:
+                if not candidate.startswith(key):
+                    break
+                prefixed.append(candidate)
+            if prefixed:
+                return self._index[min(prefixed, key=len)][0]
+
+            word_sets = [self._words.get(word) for word in key.split()]
+            if all(word_sets):
+                matches = set.intersection(*word_sets)
+                if matches:
+                    return self._index[min(matches, key=len)][0]
+
+            close = difflib.get_close_matches(key, self._listed_keys, n=1, cutoff=0.75)
+            if close:
+                return self._index[close[0]][0]
+        return None
+
+    # ---------------- LAUNCH ----------------
+
+    def launch(self, entry):
+        kind, target = entry["kind"], entry["target"]
+        if kind == "desktop":
+            subprocess.Popen(shlex.split(target), stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL, start_new_session=True)
+        elif kind == "bundle":
+            subprocess.Popen(["open", target])
+        elif sys.platform == "win32":
+            os.startfile(target)
+        else:
+            subprocess.Popen([target], stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL, start_new_session=True)
+
+
+# Instantiate the catalog object (scanning happens on first use)
+catalog = AppCatalog()
@@ -1,133 +1,98 @@
 import os
-import subprocess
-import pygetwindow as gw
-import re
 
-# Pre-compiled regex for better performance
-app_name_pattern = re.compile(
-    r'\b(open|close|run|launch|start|terminate|kill|exit|switch to|focus on|move to|activate|bring)\s+(.+)',
-    re.IGNORECASE
-)
+from core.entities import extractor
+from core.streaming import Spoken, batched, summarize
+from skills.app_catalog import catalog
+from skills.process_table import table
 
-def extract_app_name(command: str) -> str | None:
-    """Extracts the application name from a command string using regex."""
-    match = app_name_pattern.search(command)
-    if match:
-        # Return the second group, which is the app name
-        app_name = match.group(2).strip()
-        # Basic standardization
-        return app_name.replace("the ", "").replace("application", "").replace("app", "").strip()
-    return None
 
 def open_app(command: str) -> str:
     """Opens an application based on the command."""
-    app_name = extract_app_name(command)
+    app_name = extractor.app(command)
     if not app_name:
         return "Could not determine which application to open. Please be more specific."
     try:
-        # Use os.startfile for a non-blocking call on Windows
-        os.startfile(f"C:\\Windows\\System32\\{app_name}.exe")
-        return f"Opening {app_name}."
-    except FileNotFoundError:
-        try:
-            # Fallback for apps not in System32
-            subprocess.Popen([app_name])
+        entry = catalog.resolve(app_name)
+        if entry is not None:
+            catalog.launch(entry)
+            return f"Opening {entry['name']}."
+        if os.name == "nt":
+            # Let Windows try registered App Paths the catalog does not scan
+            os.startfile(app_name)
             return f"Opening {app_name}."
-        except (FileNotFoundError, OSError):
-            return f"Sorry, I couldn't find or open the application named '{app_name}'."
+        return f"Sorry, I couldn't find or open the application named '{app_name}'."
+    except (FileNotFoundError, OSError):
+        return f"Sorry, I couldn't find or open the application named '{app_name}'."
     except Exception as e:
         return f"An unexpected error occurred while trying to open {app_name}: {e}"
 
 def close_app(command: str) -> str:
     """Closes a running application."""
-    app_name = extract_app_name(command)
+    app_name = extractor.app(command)
     if not app_name:
         return "Could not determine which application to close. Please be more specific."
 
-    # Standardize to process name (e.g., "Google Chrome" -> "chrome.exe")
-    if not app_name.endswith('.exe'):
-        app_name += '.exe'
-
+    # Process names drop ".exe" in the table, so "notepad.exe" and "notepad" match alike
+    app_name = app_name[:-4] if app_name.lower().endswith(".exe") else app_name
     try:
-        # Forcefully terminate the process. /F for force, /IM for image name.
-        result = subprocess.run(
-            ['taskkill', '/F', '/IM', app_name],
-            capture_output=True, text=True, check=True
-        )
-        if "SUCCESS" in result.stdout:
-            return f"{app_name.replace('.exe', '')} has been closed."
-        else:
-            # This case might happen if taskkill reports success but with a different message
-            return f"Attempted to close {app_name.replace('.exe', '')}."
-    except subprocess.CalledProcessError as e:
-        # CalledProcessError is raised for non-zero exit codes.
-        # This typically means the process wasn't found.
-        if "not found" in e.stderr:
-            return f"Application '{app_name.replace('.exe', '')}' is not currently running."
-        else:
-            return f"Failed to close {app_name.replace('.exe', '')}. Reason: {e.stderr}"
+        if not table.find(app_name):
+            # It may have started since the last background refresh
+            table.refresh()
+        if not table.find(app_name):
+            return f"Application '{app_name}' is not currently running."
+        closed = table.terminate(app_name)
+        if closed:
+            return f"{app_name} has been closed."
+        return f"Attempted to close {app_name}."
     except Exception as e:
-        return f"An error occurred while trying to close {app_name.replace('.exe', '')}: {e}"
+        return f"An error occurred while trying to close {app_name}: {e}"
 
-def list_running_apps() -> str:
-    """Lists all currently running applications visible to the user."""
+def list_running_apps():
+    """Streams all currently running applications visible to the user."""
     try:
-        windows = gw.getAllTitles()
-        running_apps = [win for win in windows if win]  # Filter out empty titles
-        if not running_apps:
-            return "No applications are currently running."
-        return "Running applications:\n" + "\n".join(f"- {app}" for app in running_apps)
+        # Window titles where the platform exposes them, else the user's processes
+        running_apps = table.window_titles() if table.has_windows else table.user_process_names()
     except Exception as e:
         return f"An error occurred while listing running applications: {e}"
+    if not running_apps:
+        return "No applications are currently running."
+    return _stream_list("Running applications:", "running applications", running_apps)
 
-def list_installed_apps() -> str:
-    """Lists installed applications using WMIC."""
+def list_installed_apps():
+    """Streams installed applications from the cached application catalog."""
     try:
-        # WMIC is a powerful command-line tool for system administration.
-        # 'product get name' retrieves the names of installed products.
-        result = subprocess.run(
-            ['wmic', 'product', 'get', 'name'],
-            capture_output=True, text=True, check=True, creationflags=subprocess.CREATE_NO_WINDOW
-        )
-        output = result.stdout.strip()
-        if not output or "Name" not in output:
-            return "Could not retrieve the list of installed applications."
-
-        # Clean up the raw output from WMIC
-        apps = [line.strip() for line in output.split('\n') if line.strip() and line.strip() != "Name"]
-        if not apps:
-            return "No installed applications found."
-
-        return "Installed applications:\n" + "\n".join(f"- {app}" for app in apps)
-    except FileNotFoundError:
-        return "WMIC command not found. This feature is only available on Windows Pro/Enterprise."
-    except subprocess.CalledProcessError as e:
-        return f"Failed to list installed applications. Error: {e.stderr}"
+        apps = catalog.names()
     except Exception as e:
         return f"An unexpected error occurred: {e}"
+    if not apps:
+        return "No installed applications found."
+    return _stream_list("Installed applications:", "installed applications", apps)
+
+def _stream_list(title, noun, items):
+    yield title
+    yield from batched(f"- {item}" for item in items)
+    yield Spoken(summarize(len(items), noun, items))
 
 def switch_to_app(command: str) -> str:
     """Switches focus to a running application window."""
-    app_name = extract_app_name(command)
+    app_name = extractor.app(command)
     if not app_name:
         return "Could not determine which application to switch to. Please be more specific."
+    if not table.has_windows:
+        return "Switching windows is not supported on this platform."
 
     try:
-        # Get all windows that match the app_name (case-insensitive)
-        windows = gw.getWindowsWithTitle(app_name)
-        if not windows:
-            # Try a partial match if no exact match is found
-            all_windows = gw.getAllWindows()
-            target_window = next((win for win in all_windows if app_name.lower() in win.title.lower()), None)
-            if not target_window:
-                return f"No application window with a title containing '{app_name}' is currently open."
-            windows = [target_window]
+        target_window = table.find_window(app_name)
+        if target_window is None:
+            # The window may have opened since the last background refresh
+            table.refresh()
+            target_window = table.find_window(app_name)
+        if target_window is None:
+            return f"No application window with a title containing '{app_name}' is currently open."
 
-        # Activate the first found window
-        target_window = windows[0]
         if target_window.isMinimized:
             target_window.restore()
         target_window.activate()
         return f"Switched to {target_window.title}."
     except Exception as e:
-        return f"An error occurred while switching applications: {e}"
\ No newline at end of file
+        return f"An error occurred while switching applications: {e}"
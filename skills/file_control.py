@@ -1,8 +1,20 @@
+import fnmatch
+import math
 import os
-import shutil
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+from core.streaming import Spoken, batched, summarize
+from skills.trash import trash, TRASH_DIR_NAME, REPLY_ESTIMATE_WAIT
 
 BASE_DIR = os.getcwd()
 
+PAGE_SIZE = 50
+SORT_KEYS = {"name", "size", "mtime"}
+# Directories whose listings are kept in memory
+LISTING_CACHE_SIZE = 16
+
 def set_base_dir(path):
     global BASE_DIR
     BASE_DIR = path
@@ -33,17 +45,177 @@ def create_folder(name):
     return f"Folder '{name}' created in the parent folder {folder_name}"
 
 def delete_folder(name):
+    """Moves the folder to the trash at once; it is purged in the background."""
     path = os.path.join(BASE_DIR, name)
     if not os.path.exists(path):
         return f"Folder '{name}' not found."
-    shutil.rmtree(path)
-    return f"Folder '{name}' deleted."
+    if not os.path.isdir(path):
+        return f"'{name}' is not a folder."
+    try:
+        job = trash.stage(path)
+    except OSError as e:
+        return f"Could not delete folder '{name}': {e}"
+    details = job.describe(timeout=REPLY_ESTIMATE_WAIT)
+    return (f"Folder '{name}' deleted{f' ({details})' if details else ''}. "
+            f"You can undo this for the next {int(trash.undo_window)} seconds.")
+
+def undo_delete(name=None):
+    try:
+        job = trash.undo(name)
+    except OSError as e:
+        return f"Could not restore the folder: {e}"
+    if job is None:
+        return "There is no recent deletion to undo."
+    return f"Folder '{job.name}' has been restored."
+
+def deletion_status():
+    statuses = trash.status()
+    if not statuses:
+        return "No deletions are in progress."
+    return "\n".join(statuses)
+
+# ---------------- DIRECTORY LISTING ----------------
+
+class Entry(NamedTuple):
+    name: str
+    is_dir: bool
+    size: int
+    mtime: float
+
+
+class DirectoryPage(NamedTuple):
+    path: str
+    entries: list
+    page: int
+    pages: int
+    total: int
+    files: int
+    folders: int
+
+    @property
+    def summary(self) -> str:
+        """Short enough to be spoken."""
+        folder_name = os.path.basename(self.path) or self.path
+        if not self.total:
+            return f"No matching items in {folder_name}."
+        text = (f"{self.total} items in {folder_name}: "
+                f"{self.files} files and {self.folders} folders.")
+        if self.pages > 1:
+            text += f" Page {self.page} of {self.pages}."
+        return text
+
+    def text(self) -> str:
+        lines = [f"{e.name}/" if e.is_dir else e.name for e in self.entries]
+        return "\n".join([self.summary] + lines)
+
+
+_listing_cache = OrderedDict()
+_listing_lock = threading.Lock()
+
+
+def iter_entries(path=None):
+    """Streams the entries of a directory lazily with os.scandir."""
+    with os.scandir(path or BASE_DIR) as it:
+        for item in it:
+            if item.name == TRASH_DIR_NAME:
+                continue
+            try:
+                is_dir = item.is_dir()
+                stat = item.stat()
+            except OSError:
+                continue
+            yield Entry(item.name, is_dir, 0 if is_dir else stat.st_size, stat.st_mtime)
+
+
+def _fresh_entries(path):
+    """The cached listing of a directory if it has not changed since, else None."""
+    mtime = os.stat(path).st_mtime_ns
+    with _listing_lock:
+        cached = _listing_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            _listing_cache.move_to_end(path)
+            return cached[1]
+    return None
+
+
+def _scan(path):
+    """Yields the entries of a directory as they are read, caching the full listing."""
+    mtime = os.stat(path).st_mtime_ns
+    entries = []
+    for entry in iter_entries(path):
+        entries.append(entry)
+        yield entry
+    with _listing_lock:
+        _listing_cache[path] = (mtime, entries)
+        _listing_cache.move_to_end(path)
+        while len(_listing_cache) > LISTING_CACHE_SIZE:
+            _listing_cache.popitem(last=False)
+
+
+def _cached_entries(path):
+    """Full listing of a directory, rescanned only when its mtime changes."""
+    entries = _fresh_entries(path)
+    if entries is None:
+        entries = list(_scan(path))
+    return entries
+
+
+def entry_names(path=None):
+    """(path, mtime, names, folder names) of a directory, served from the listing cache."""
+    path = path or BASE_DIR
+    mtime = os.stat(path).st_mtime_ns
+    entries = _cached_entries(path)
+    return path, mtime, [e.name for e in entries], {e.name for e in entries if e.is_dir}
+
+
+def list_directory(page=1, page_size=PAGE_SIZE, sort="name", descending=False,
+                   kind=None, pattern=None, path=None) -> DirectoryPage:
+    """
+    One page of a directory listing.
+    kind: "file" or "folder"; pattern: glob such as "*.py"; sort: name, size or mtime.
+    """
+    path = path or BASE_DIR
+    if sort not in SORT_KEYS:
+        raise ValueError(f"sort must be one of {sorted(SORT_KEYS)}")
+
+    entries = _cached_entries(path)
+    if kind is not None:
+        entries = [e for e in entries if e.is_dir == (kind == "folder")]
+    if pattern:
+        entries = [e for e in entries if fnmatch.fnmatch(e.name.lower(), pattern.lower())]
+
+    if sort == "name":
+        key = lambda e: e.name.lower()
+    else:
+        key = lambda e: getattr(e, sort)
+    entries = sorted(entries, key=key, reverse=descending)
+
+    pages = max(1, math.ceil(len(entries) / page_size))
+    page = min(max(1, page), pages)
+    start = (page - 1) * page_size
+    folders = sum(1 for e in entries if e.is_dir)
+    return DirectoryPage(path, entries[start:start + page_size], page, pages,
+                         len(entries), len(entries) - folders, folders)
+
+
+def _matches(entry, kind, pattern):
+    return (kind is None or entry.is_dir == (kind == "folder")) and \
+        (not pattern or fnmatch.fnmatch(entry.name.lower(), pattern.lower()))
+
+
+def list_items(page=1, sort="name", kind=None, pattern=None):
+    """
+    Streams a listing: on a directory that is not cached yet, entries are
+    shown in the order they are read while the scan runs. The final text
+    is the sorted page, and only a summary is spoken.
+    """
+    if _fresh_entries(BASE_DIR) is None:
+        found = (f"{e.name}/" if e.is_dir else e.name for e in _scan(BASE_DIR) if _matches(e, kind, pattern))
+        yield from batched(found)
 
-def list_items():
-    items = os.listdir(BASE_DIR)
-    if not items:
+    listing = list_directory(page=page, sort=sort, kind=kind, pattern=pattern)
+    if not listing.total and kind is None and pattern is None:
         return "The selected folder is empty."
-    return (
-        f"Here are all the files and folders in the directory {BASE_DIR}:\n"
-        + ", ".join(items)
-    )
+    noun = {"file": "files", "folder": "folders"}.get(kind, "items")
+    yield Spoken(summarize(listing.total, noun, [e.name for e in listing.entries]))
+    return listing.text()
@@ -0,0 +1,241 @@
+import getpass
+import os
+import threading
+
+# Background refresh period in seconds
+REFRESH_INTERVAL = 2.0
+TERMINATE_TIMEOUT = 3.0
+
+
+def normalize(name: str) -> str:
+    name = (name or "").lower().strip()
+    return name[:-4] if name.endswith(".exe") else name
+
+
+# ---------------- BACKENDS ---------------- #
+
+class PsutilBackend:
+    """The real process table (psutil) and window list (pygetwindow, if available)."""
+
+    def __init__(self):
+        import psutil
+
+        self.psutil = psutil
+        try:
+            import pygetwindow as gw
+        except (ImportError, NotImplementedError):
+            gw = None
+        self.gw = gw
+        self.supports_windows = gw is not None
+
+    def pids(self) -> set:
+        return set(self.psutil.pids())
+
+    def info(self, pid):
+        try:
+            p = self.psutil.Process(pid)
+            with p.oneshot():
+                info = {"pid": pid, "name": p.name(), "create_time": p.create_time()}
+                try:
+                    # "DOMAIN\\user" on Windows
+                    info["username"] = p.username().split("\\")[-1]
+                except self.psutil.AccessDenied:
+                    info["username"] = None
+                return info
+        except (self.psutil.NoSuchProcess, self.psutil.AccessDenied, self.psutil.ZombieProcess):
+            return None
+
+    def terminate(self, processes, timeout=TERMINATE_TIMEOUT) -> int:
+        """Terminates (then kills) processes; returns how many are gone."""
+        targets = []
+        for info in processes:
+            try:
+                p = self.psutil.Process(info["pid"])
+                # Skip pids that were reused since the last refresh
+                if p.create_time() == info["create_time"]:
+                    p.terminate()
+                    targets.append(p)
+            except (self.psutil.NoSuchProcess, self.psutil.AccessDenied):
+                continue
+        gone, alive = self.psutil.wait_procs(targets, timeout=timeout)
+        for p in alive:
+            try:
+                p.kill()
+            except (self.psutil.NoSuchProcess, self.psutil.AccessDenied):
+                continue
+        gone_after_kill, _ = self.psutil.wait_procs(alive, timeout=timeout)
+        return len(gone) + len(gone_after_kill)
+
+    def windows(self) -> list:
+        if self.gw is None:
+            return []
+        return [w for w in self.gw.getAllWindows() if w.title]
+
+
+class FakeBackend:
+    """In-memory process table for tests: {pid: {"name": ..., ...}} and window titles."""
+
+    supports_windows = True
+
+    def __init__(self, processes=None, windows=None):
+        self.processes = dict(processes or {})
+        self.window_list = list(windows or [])
+        self.terminated = []
+
+    def pids(self) -> set:
+        return set(self.processes)
+
+    def info(self, pid):
+        proc = self.processes.get(pid)
+        if proc is None:
+            return None
+        return {"pid": pid, "create_time": 0.0, "username": getpass.getuser(), **proc}
+
+    def terminate(self, processes, timeout=TERMINATE_TIMEOUT) -> int:
+        closed = 0
+        for info in processes:
+            if self.processes.pop(info["pid"], None) is not None:
+                self.terminated.append(info["pid"])
+                closed += 1
+        return closed
+
+    def windows(self) -> list:
+        return list(self.window_list)
+
+
+# ---------------- PROCESS TABLE ---------------- #
+
+class ProcessTable:
+    """
+    Snapshot of running processes and windows, refreshed incrementally in
+    the background: only pids that appeared since the last pass are queried.
+    """
+
+    def __init__(self, backend=None, interval=REFRESH_INTERVAL):
+        self._backend = backend
+        self.interval = interval
+        self._procs = {}
+        self._by_name = {}
+        self._windows = []
+        self._lock = threading.Lock()
+        # One refresh at a time: the background thread and a skill may both ask
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = PsutilBackend()
+        return self._backend
+
+    # ---------------- REFRESH ----------------
+
+    def refresh(self):
+        with self._refresh_lock:
+            pids = self.backend.pids()
+            with self._lock:
+                known = set(self._procs)
+            new_infos = [info for info in map(self.backend.info, pids - known) if info]
+            windows = self.backend.windows()
+
+            with self._lock:
+                for pid in known - pids:
+                    self._unindex(self._procs.pop(pid))
+                for info in new_infos:
+                    self._procs[info["pid"]] = info
+                    self._by_name.setdefault(normalize(info["name"]), set()).add(info["pid"])
+                self._windows = [(w.title.lower(), w) for w in windows]
+
+    def _unindex(self, info):
+        key = normalize(info["name"])
+        pids = self._by_name.get(key)
+        if pids is not None:
+            pids.discard(info["pid"])
+            if not pids:
+                del self._by_name[key]
+
+    def start(self):
+        """Takes a first snapshot and keeps it fresh on a daemon thread; returns self."""
+        with self._start_lock:
+            if self._thread is None:
+                self.refresh()
+                self._thread = threading.Thread(target=self._run, name="process-table", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print("Process table refresh failed:", e)
+
+    # ---------------- LOOKUP ----------------
+
+    def find(self, name: str) -> list:
+        """Processes for an app name: exact name first, else the shortest
+        name extending it after a separator ("firefox" -> "firefox-bin")."""
+        self.start()
+        key = normalize(name)
+        if not key:
+            return []
+        with self._lock:
+            pids = self._by_name.get(key)
+            if not pids:
+                prefixed = [
+                    k for k in self._by_name
+                    if k.startswith(key) and len(k) > len(key) and k[len(key)] in " -_."
+                ]
+                pids = self._by_name[min(prefixed, key=len)] if prefixed else set()
+            return [self._procs[pid] for pid in pids]
+
+    def find_window(self, text: str):
+        """Window whose title equals, else contains, the text (case-insensitive)."""
+        self.start()
+        needle = text.lower()
+        with self._lock:
+            exact = next((w for title, w in self._windows if title == needle), None)
+            if exact is not None:
+                return exact
+            return next((w for title, w in self._windows if needle in title), None)
+
+    def window_titles(self) -> list:
+        self.start()
+        with self._lock:
+            return [w.title for _, w in self._windows]
+
+    def user_process_names(self) -> list:
+        self.start()
+        user = getpass.getuser()
+        with self._lock:
+            names = {info["name"] for info in self._procs.values() if info.get("username") == user}
+        return sorted(names, key=str.lower)
+
+    @property
+    def has_windows(self) -> bool:
+        return self.backend.supports_windows
+
+    # ---------------- ACTIONS ----------------
+
+    def terminate(self, name: str) -> int:
+        """Terminates every process of the named app, except this one and the
+        process that started it ("close python"); returns how many closed."""
+        protected = {os.getpid(), os.getppid()}
+        processes = [info for info in self.find(name) if info["pid"] not in protected]
+        if not processes:
+            return 0
+        closed = self.backend.terminate(processes)
+        with self._lock:
+            for info in processes:
+                if self._procs.pop(info["pid"], None) is not None:
+                    self._unindex(info)
+        return closed
+
+
+# Instantiate the shared table (the first lookup starts the background refresh)
+table = ProcessTable()
@@ -0,0 +1,264 @@
+import itertools
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TRASH_DIR_NAME = ".orbitos-trash"
+# Seconds a deleted folder can still be restored
+UNDO_WINDOW = 30.0
+PURGE_WORKERS = 2
+# The estimate stops after this many entries
+ESTIMATE_LIMIT = 5000
+# Seconds the delete reply waits for the estimate, which runs after the rename
+REPLY_ESTIMATE_WAIT = 0.2
+PROGRESS_EVERY = 500
+# Finished jobs kept for status; older ones are dropped
+KEEP_FINISHED = 20
+# Untracked staged folders are purged only once this much older than the undo
+# window, so another OrbitOS instance (GUI next to the headless server) can still undo
+LEFTOVER_GRACE = 60.0
+
+
+def estimate(path, limit=ESTIMATE_LIMIT):
+    """Counts entries and bytes under path, giving up after `limit` entries.
+    Returns (entries, bytes, exact)."""
+    entries, size = 0, 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for item in it:
+                    entries += 1
+                    try:
+                        if item.is_dir(follow_symlinks=False):
+                            stack.append(item.path)
+                        else:
+                            size += item.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        pass
+                    if entries >= limit:
+                        return entries, size, False
+        except OSError:
+            continue
+    return entries, size, True
+
+
+def format_size(size) -> str:
+    for unit in ("bytes", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "bytes" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def _staged_at(staged) -> float:
+    """When a folder was staged: the millisecond stamp stage() puts in its name."""
+    stamp = os.path.basename(staged).split("-", 1)[0]
+    if stamp.isdigit():
+        return int(stamp) / 1000
+    try:
+        return os.stat(staged).st_ctime
+    except OSError:
+        return time.time()
+
+
+class TrashJob:
+    _ids = itertools.count(1)
+
+    def __init__(self, name, original, staged):
+        self.id = next(self._ids)
+        self.name = name
+        self.original = original
+        self.staged = staged
+        self.entries = None     # set by the estimate, in the background
+        self.size = None
+        self.exact = False
+        self.estimated = threading.Event()
+        self.state = "pending"      # pending -> purging -> done | failed, or restored
+        self.removed = 0
+        self.error = None
+        self.timer = None
+
+    def describe(self, timeout=0.0):
+        """Item count and size, or None when the estimate is not done within `timeout`."""
+        if not self.estimated.wait(timeout):
+            return None
+        about = "" if self.exact else "at least "
+        return f"{about}{self.entries} items, {about}{format_size(self.size)}"
+
+    def status(self) -> str:
+        if self.state == "pending":
+            return f"'{self.name}' is in the trash and can still be restored."
+        if self.state == "purging":
+            if self.entries is None:
+                total = "?"
+            else:
+                total = self.entries if self.exact else f"~{self.entries}+"
+            return f"Deleting '{self.name}': {self.removed} of {total} items removed."
+        if self.state == "failed":
+            return f"Deleting '{self.name}' failed: {self.error}"
+        return f"'{self.name}' was {'restored' if self.state == 'restored' else 'deleted'}."
+
+
+class Trash:
+    """
+    Deletes folders by an O(1) rename into a trash folder next to them, then
+    purges in a background pool once the undo window has passed.
+    """
+
+    def __init__(self, undo_window=UNDO_WINDOW, workers=PURGE_WORKERS):
+        self.undo_window = undo_window
+        self.jobs = []
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="trash")
+
+    def add_listener(self, callback):
+        """callback(job) runs on state changes and periodically while purging."""
+        self._listeners.append(callback)
+
+    def _notify(self, job):
+        for callback in self._listeners:
+            try:
+                callback(job)
+            except Exception as e:
+                print("Trash listener failed:", e)
+
+    # ---------------- DELETE / UNDO ----------------
+
+    def stage(self, path) -> TrashJob:
+        """Moves path into the trash and schedules its purge; its size is
+        estimated afterwards, so a large folder does not delay the rename."""
+        path = os.path.abspath(path)
+        name = os.path.basename(path)
+        trash_dir = os.path.join(os.path.dirname(path), TRASH_DIR_NAME)
+        staged = os.path.join(trash_dir, f"{int(time.time() * 1000)}-{name}")
+
+        with self._lock:
+            os.makedirs(trash_dir, exist_ok=True)
+            # Same parent, same filesystem: the rename is atomic whatever the size
+            os.rename(path, staged)
+            job = TrashJob(name, path, staged)
+            self.jobs.append(job)
+        self._pool.submit(self._estimate, job)
+        self._sweep_leftovers(trash_dir)
+        self._schedule(job)
+        self._notify(job)
+        return job
+
+    def _estimate(self, job):
+        job.entries, job.size, job.exact = estimate(job.staged)
+        job.estimated.set()
+        self._notify(job)
+
+    def _schedule(self, job):
+        job.timer = threading.Timer(self.undo_window, self._submit, args=(job,))
+        job.timer.daemon = True
+        job.timer.start()
+
+    def undo(self, name=None):
+        """Restores the most recent pending deletion (of `name`, if given)."""
+        with self._lock:
+            candidates = [
+                j for j in reversed(self.jobs)
+                if j.state == "pending" and (name is None or j.name == name)
+            ]
+            if not candidates:
+                return None
+            job = candidates[0]
+            job.timer.cancel()
+            job.state = "restoring"
+
+        if os.path.exists(job.original):
+            job.state = "pending"
+            self._schedule(job)
+            raise FileExistsError(f"'{job.name}' exists again, so the deleted copy cannot be restored")
+        try:
+            os.rename(job.staged, job.original)
+        except OSError:
+            # Still in the trash: it can be restored again until the purge
+            with self._lock:
+                job.state = "pending"
+            self._schedule(job)
+            raise
+        with self._lock:
+            job.state = "restored"
+            self._prune()
+        self._notify(job)
+        return job
+
+    # ---------------- PURGE ----------------
+
+    def _submit(self, job):
+        with self._lock:
+            if job.state != "pending":
+                return
+            job.state = "purging"
+        self._pool.submit(self._purge, job)
+
+    def _purge(self, job):
+        self._notify(job)
+        try:
+            for root, dirs, files in os.walk(job.staged, topdown=False):
+                for name in files:
+                    os.remove(os.path.join(root, name))
+                    self._tick(job)
+                for name in dirs:
+                    full = os.path.join(root, name)
+                    if os.path.islink(full):
+                        os.remove(full)
+                    else:
+                        os.rmdir(full)
+                    self._tick(job)
+            os.rmdir(job.staged)
+            job.state = "done"
+        except OSError as e:
+            # Fall back to rmtree for anything the walk could not remove
+            shutil.rmtree(job.staged, ignore_errors=True)
+            job.state = "done" if not os.path.exists(job.staged) else "failed"
+            job.error = e
+        self._remove_if_empty(os.path.dirname(job.staged))
+        with self._lock:
+            self._prune()
+        self._notify(job)
+
+    def _tick(self, job):
+        job.removed += 1
+        if job.removed % PROGRESS_EVERY == 0:
+            self._notify(job)
+
+    def _sweep_leftovers(self, trash_dir):
+        """Purges staged folders left behind by a previous run or another instance,
+        once their undo window is long over."""
+        with self._lock:
+            tracked = {j.staged for j in self.jobs}
+        cutoff = time.time() - self.undo_window - LEFTOVER_GRACE
+        for name in os.listdir(trash_dir):
+            staged = os.path.join(trash_dir, name)
+            if staged not in tracked and _staged_at(staged) < cutoff:
+                self._pool.submit(shutil.rmtree, staged, True)
+
+    def _prune(self):
+        """Drops all but the last KEEP_FINISHED finished jobs (caller holds the lock)."""
+        finished = [j for j in self.jobs if j.state in ("done", "failed", "restored")]
+        if len(finished) > KEEP_FINISHED:
+            dropped = set(map(id, finished[:len(finished) - KEEP_FINISHED]))
+            self.jobs = [j for j in self.jobs if id(j) not in dropped]
+
+    def _remove_if_empty(self, path):
+        with self._lock:
+            try:
+                os.rmdir(path)
+            except OSError:
+                pass
+
+    # ---------------- STATUS ----------------
+
+    def status(self) -> list:
+        with self._lock:
+            return [j.status() for j in self.jobs if j.state in ("pending", "purging", "failed")]
+
+
+# Instantiate the shared trash
+trash = Trash()
@@ -0,0 +1,9 @@
+import joblib
+
+from core.intent_artifact import check_parity, dataset_sentences, load_artifact
+
+
+def test_artifact_scores_like_the_pickle():
+    parity = check_parity(joblib.load("core/intent_model.pkl"), load_artifact(), dataset_sentences())
+    assert parity["texts"] > 0
+    assert parity["ok"], parity["mismatched"]
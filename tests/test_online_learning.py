@@ -0,0 +1,46 @@
+import json
+import time
+
+import pytest
+
+from core import command_engine, online_learning
+from core.registry import components
+
+TEXT = "apps ki list dikhao"     # "show apps list"
+
+
+@pytest.fixture
+def learner(monkeypatch, tmp_path):
+    router = components.get("router")
+    shipped = (components.get("intent_engine"), router.local_margin, router.local_floor)
+    learner = online_learning.OnlineLearner(
+        command_engine._install_intent_pipeline, lambda: components.get("intent_engine"),
+        command_engine._router_thresholds, corrections_file=str(tmp_path / "corrections.jsonl"),
+        update_delay=0.05,
+    )
+    monkeypatch.setattr(online_learning, "ENABLED", True)
+    components.register("learner", learner.start)
+    yield learner
+    components.replace("intent_engine", shipped[0])
+    router.engine, router.local_margin, router.local_floor = shipped
+
+
+def wait_for(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+def test_multilingual_correction_reaches_the_router(learner):
+    router = components.get("router")
+    components.get("learner")
+    wait_for(lambda: learner.installed)
+    assert router.classify_local(TEXT)["intent"] != "LIST_INSTALLED_APPLICATIONS"
+
+    command_engine.correct(TEXT, "LIST_INSTALLED_APPLICATIONS")
+    wait_for(lambda: learner.stats()["accepted"] == 1)
+
+    assert router.classify_local(TEXT)["intent"] == "LIST_INSTALLED_APPLICATIONS"
+    with open(learner.corrections_file, encoding="utf-8") as f:
+        assert json.loads(f.readline())["text"] == "show apps list"
@@ -0,0 +1,33 @@
+import pytest
+
+from core.intent_artifact import ARTIFACT_DIR, load_artifact
+from core.intent_engine import IntentEngine
+from core.router import CascadeRouter
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return IntentEngine(load_artifact(ARTIFACT_DIR))
+
+
+@pytest.mark.parametrize("text, action", [
+    # The local model is confident, but "it" is the last app, which only Gemini resolves
+    ("close it", "close_app"),
+    # No local label covers searching; its best guess is SWITCH_APPLICATION
+    ("search chrome extensions", "search"),
+])
+def test_escalates_what_the_local_model_cannot_resolve(engine, text, action):
+    asked = []
+
+    def agent(text):
+        asked.append(text)
+        return {"action": action, "confidence": 0.9}
+
+    decision = CascadeRouter(engine, agent).route(text)
+    assert asked == [text]
+    assert decision["source"] == "agent" and decision["action"] == action
+
+
+def test_clear_local_commands_skip_the_agent(engine):
+    router = CascadeRouter(engine, lambda text: pytest.fail("Gemini was asked"))
+    assert router.route("open notepad")["source"] == "local"
@@ -0,0 +1,465 @@
+import json
+import os
+import threading
+import time
+from array import array
+from typing import NamedTuple
+
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize, QTimer, Signal
+from PySide6.QtGui import QColor, QFont, QFontMetrics, QGuiApplication
+from PySide6.QtWidgets import QAbstractItemView, QListView, QMenu, QStyledItemDelegate
+
+# Every message of the session, one JSON line each; only a window is in memory
+CHAT_LOG_FILE = "cache/chat_log.jsonl"
+# Messages kept in the model, and how many load at once when scrolling past either end
+WINDOW = 400
+PAGE = 100
+# Longer messages show this many lines until expanded
+COLLAPSED_LINES = 8
+# Longest line kept in a collapsed preview
+MAX_LINE_CHARS = 400
+# An expanded message shows at most this many lines (Qt rows stop at 32767 px)
+EXPANDED_LINES = 1000
+
+COLORS = {"user": "#00aaff", "agent": "#00ff88"}
+LABELS = {"user": "You", "agent": "Agent"}
+PADDING = 6
+
+
+# ---------------- STORE ---------------- #
+
+class ChatStore:
+    """Append-only JSONL file with an in-memory offset per message, so any
+    message can be read back without keeping its text around. Updating a
+    message appends its new version and repoints the offset."""
+
+    def __init__(self, path=CHAT_LOG_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # A new session starts a new log
+        self._writer = open(path, "w", encoding="utf-8")
+        self._reader = open(path, "rb")
+        self._offsets = array("q")
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def append(self, role: str, text: str) -> int:
+        with self._lock:
+            self._offsets.append(self._write(role, text))
+            return len(self._offsets) - 1
+
+    def update(self, index: int, role: str, text: str):
+        with self._lock:
+            self._offsets[index] = self._write(role, text)
+
+    def _write(self, role, text) -> int:
+        offset = self._writer.tell()
+        self._writer.write(json.dumps({"role": role, "text": text, "at": time.time()}, ensure_ascii=False) + "\n")
+        self._writer.flush()
+        return offset
+
+    def read(self, index: int) -> dict:
+        return self.read_range(index, index + 1)[0]
+
+    def read_range(self, start: int, stop: int) -> list:
+        with self._lock:
+            if start >= stop:
+                return []
+            records = []
+            for index in range(start, stop):
+                offset = self._offsets[index]
+                # Consecutive messages are usually consecutive lines
+                if index == start or offset != self._reader.tell():
+                    self._reader.seek(offset)
+                records.append(json.loads(self._reader.readline()))
+            return records
+
+    def close(self):
+        with self._lock:
+            self._writer.close()
+            self._reader.close()
+
+
+# ---------------- MODEL ---------------- #
+
+class ChatMessage(NamedTuple):
+    index: int          # position in the store
+    role: str
+    preview: str        # what a collapsed row shows
+    hidden_lines: int   # lines left out of the preview
+    collapsible: bool
+
+
+def _preview(text: str) -> tuple:
+    """(preview, hidden lines, collapsible) for a message."""
+    lines = text.split("\n")
+    shown = lines[:COLLAPSED_LINES]
+    clipped = [line if len(line) <= MAX_LINE_CHARS else line[:MAX_LINE_CHARS - 1] + "…" for line in shown]
+    return "\n".join(clipped), len(lines) - len(shown), len(lines) > len(shown) or clipped != shown
+
+
+class ChatLogModel(QAbstractListModel):
+    """
+    A window of at most WINDOW messages over the ChatStore. Rows hold
+    previews only; expanded rows get their full text from the store.
+    """
+
+    RoleRole = Qt.UserRole + 1
+    HiddenLinesRole = Qt.UserRole + 2
+    CollapsibleRole = Qt.UserRole + 3
+    ExpandedRole = Qt.UserRole + 4
+
+    def __init__(self, store, window=WINDOW, page=PAGE, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.window = window
+        self.page = page
+        self._rows = []
+        self._expanded = {}     # store index -> (shown text, lines still hidden)
+
+    # ---------------- QT MODEL ----------------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        message = self._rows[index.row()]
+        expanded = self._expanded.get(message.index)
+        if role == Qt.DisplayRole:
+            return expanded[0] if expanded else message.preview
+        if role == self.RoleRole:
+            return message.role
+        if role == self.HiddenLinesRole:
+            return expanded[1] if expanded else message.hidden_lines
+        if role == self.CollapsibleRole:
+            return message.collapsible
+        if role == self.ExpandedRole:
+            return message.index in self._expanded
+        return None
+
+    # ---------------- WINDOW ----------------
+
+    @property
+    def first(self) -> int:
+        """Store index of the first loaded row."""
+        return self._rows[0].index if self._rows else len(self.store)
+
+    @property
+    def at_tail(self) -> bool:
+        return not self._rows or self._rows[-1].index == len(self.store) - 1
+
+    def message(self, row) -> ChatMessage:
+        return self._rows[row]
+
+    def full_text(self, row) -> str:
+        return self.store.read(self._rows[row].index)["text"]
+
+    def append(self, role: str, text: str) -> int:
+        """Stores the message and shows it when the window is at the newest
+        messages; returns its store index."""
+        at_tail = self.at_tail
+        index = self.store.append(role, text)
+        if at_tail:
+            row = len(self._rows)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._rows.append(ChatMessage(index, role, *_preview(text)))
+            self.endInsertRows()
+        return index
+
+    def update(self, index: int, text: str):
+        """Replaces the text of the message at store index `index` (a reply
+        still streaming in); returns its model index if it is loaded."""
+        first = self.first
+        loaded = first <= index < first + len(self._rows)
+        role = self._rows[index - first].role if loaded else self.store.read(index)["role"]
+        self.store.update(index, role, text)
+        if not loaded:
+            return None
+        row = index - first
+        self._rows[row] = ChatMessage(index, role, *_preview(text))
+        if index in self._expanded:
+            self._expanded[index] = ("\n".join(text.split("\n")[:EXPANDED_LINES]),
+                                     max(0, text.count("\n") + 1 - EXPANDED_LINES))
+        model_index = self.index(row)
+        self.dataChanged.emit(model_index, model_index)
+        return model_index
+
+    def trim_head(self):
+        """Drops the oldest rows past the window size."""
+        excess = len(self._rows) - self.window
+        if excess > 0:
+            self._remove(0, excess)
+
+    def trim_tail(self):
+        excess = len(self._rows) - self.window
+        if excess > 0:
+            self._remove(len(self._rows) - excess, len(self._rows))
+
+    def load_older(self) -> int:
+        """Prepends up to a page of older messages; returns how many."""
+        stop = self.first
+        start = max(0, stop - self.page)
+        if start == stop:
+            return 0
+        rows = [self._row(start + i, record) for i, record in enumerate(self.store.read_range(start, stop))]
+        self.beginInsertRows(QModelIndex(), 0, len(rows) - 1)
+        self._rows[:0] = rows
+        self.endInsertRows()
+        return len(rows)
+
+    def load_newer(self) -> int:
+        """Appends up to a page of the messages after the window; returns how many."""
+        start = self._rows[-1].index + 1 if self._rows else 0
+        stop = min(len(self.store), start + self.page)
+        if start >= stop:
+            return 0
+        rows = [self._row(start + i, record) for i, record in enumerate(self.store.read_range(start, stop))]
+        self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+        return len(rows)
+
+    def reset_to_tail(self):
+        """Reloads the window as the newest messages (after paging back)."""
+        if self.at_tail:
+            return
+        self.beginResetModel()
+        start = max(0, len(self.store) - self.page)
+        self._rows = [
+            self._row(start + i, record) for i, record in enumerate(self.store.read_range(start, len(self.store)))
+        ]
+        self._expanded.clear()
+        self.endResetModel()
+
+    def toggle(self, row):
+        message = self._rows[row]
+        if not message.collapsible:
+            return
+        if message.index in self._expanded:
+            del self._expanded[message.index]
+        else:
+            lines = self.full_text(row).split("\n")
+            self._expanded[message.index] = ("\n".join(lines[:EXPANDED_LINES]), max(0, len(lines) - EXPANDED_LINES))
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    @staticmethod
+    def _row(index, record) -> ChatMessage:
+        return ChatMessage(index, record["role"], *_preview(record["text"]))
+
+    def _remove(self, start, stop):
+        self.beginRemoveRows(QModelIndex(), start, stop - 1)
+        for message in self._rows[start:stop]:
+            self._expanded.pop(message.index, None)
+        del self._rows[start:stop]
+        self.endRemoveRows()
+
+
+# ---------------- DELEGATE ---------------- #
+
+class ChatDelegate(QStyledItemDelegate):
+    """Paints a message as a bold speaker line, the (possibly collapsed)
+    text and a fold toggle. Heights are cached per message and width."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._sizes = {}
+
+    def _width(self, option):
+        view = self.parent()
+        return max(view.viewport().width() if view is not None else option.rect.width(), 100)
+
+    def _fonts(self, option):
+        bold = QFont(option.font)
+        bold.setBold(True)
+        return bold, option.font
+
+    def _layout(self, option, index):
+        """(header height, body rect size, footer text) for the row."""
+        bold, body_font = self._fonts(option)
+        width = self._width(option) - 2 * PADDING
+        text = index.data(Qt.DisplayRole)
+        body = QFontMetrics(body_font).boundingRect(QRect(0, 0, width, 10 ** 6), Qt.TextWordWrap, text)
+
+        footer = None
+        if index.data(ChatLogModel.CollapsibleRole):
+            hidden = index.data(ChatLogModel.HiddenLinesRole)
+            if index.data(ChatLogModel.ExpandedRole):
+                footer = f"▾ collapse ({hidden} more lines, right-click to copy all)" if hidden else "▾ collapse"
+            else:
+                footer = f"▸ {hidden} more lines, click to expand" if hidden else "▸ click to expand"
+        return QFontMetrics(bold).height(), QSize(width, body.height()), footer
+
+    def sizeHint(self, option, index):
+        width = self._width(option)
+        # Streaming replies change text under the same index
+        key = (index.model().message(index.row()).index, index.data(ChatLogModel.ExpandedRole), width,
+               len(index.data(Qt.DisplayRole)), index.data(ChatLogModel.HiddenLinesRole))
+        size = self._sizes.get(key)
+        if size is None:
+            header, body, footer = self._layout(option, index)
+            footer_height = QFontMetrics(option.font).height() if footer else 0
+            size = QSize(width, header + body.height() + footer_height + 3 * PADDING)
+            if len(self._sizes) > 4 * WINDOW:
+                self._sizes.clear()
+            self._sizes[key] = size
+        return size
+
+    def paint(self, painter, option, index):
+        header, body, footer = self._layout(option, index)
+        bold, body_font = self._fonts(option)
+        role = index.data(ChatLogModel.RoleRole)
+        color = QColor(COLORS.get(role, "#ddd"))
+        left, top = option.rect.left() + PADDING, option.rect.top() + PADDING
+
+        painter.save()
+        painter.setPen(color)
+        painter.setFont(bold)
+        painter.drawText(QRect(left, top, body.width(), header), Qt.AlignLeft, f"{LABELS.get(role, role)}:")
+        painter.setFont(body_font)
+        top += header
+        painter.drawText(QRect(left, top, body.width(), body.height()), Qt.TextWordWrap, index.data(Qt.DisplayRole))
+        if footer:
+            painter.setPen(QColor("#888"))
+            top += body.height()
+            painter.drawText(QRect(left, top, body.width(), QFontMetrics(body_font).height()), Qt.AlignLeft, footer)
+        painter.restore()
+
+
+# ---------------- VIEW ---------------- #
+
+class ChatLogView(QListView):
+    """
+    The console: follows new messages while scrolled to the bottom, pages
+    older ones in from disk at the top and newer ones back at the bottom.
+    Clicking a long message expands or collapses it. With `intents` set, a
+    command's context menu can say which intent it should have had.
+    """
+
+    correction_requested = Signal(str, str)     # command text, intent
+
+    def __init__(self, store=None, parent=None):
+        super().__init__(parent)
+        self.intents = []
+        self.chat_model = ChatLogModel(store or ChatStore(), parent=self)
+        self.setModel(self.chat_model)
+        self.setItemDelegate(ChatDelegate(self))
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setFocusPolicy(Qt.NoFocus)
+        self.setResizeMode(QListView.Adjust)
+        self.setWordWrap(True)
+        self.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.show_menu)
+        self.clicked.connect(self.toggle)
+
+        self._follow = True
+        self._paging = False
+        self.verticalScrollBar().valueChanged.connect(self.on_scrolled)
+        self.verticalScrollBar().rangeChanged.connect(self.on_range_changed)
+
+    def append_user(self, text):
+        # A new command brings the view back to the conversation's end
+        self.chat_model.reset_to_tail()
+        self._follow = True
+        self.chat_model.append("user", text)
+
+    def append_agent(self, text) -> int:
+        return self.chat_model.append("agent", text)
+
+    def update_message(self, index, text):
+        model_index = self.chat_model.update(index, text)
+        if model_index is not None:
+            self.itemDelegate().sizeHintChanged.emit(model_index)
+
+    def toggle(self, index):
+        self.chat_model.toggle(index.row())
+        # The row's height changed with it
+        self.itemDelegate().sizeHintChanged.emit(index)
+
+    # ---------------- SCROLLING ----------------
+
+    def on_range_changed(self, _minimum, maximum):
+        if self._follow and not self._paging:
+            self.verticalScrollBar().setValue(maximum)
+
+    def on_scrolled(self, value):
+        if self._paging:
+            return
+        bar = self.verticalScrollBar()
+        self._follow = value >= bar.maximum() and self.chat_model.at_tail
+        if self._follow:
+            # Only the newest WINDOW messages are kept while following
+            if self.chat_model.rowCount() > self.chat_model.window:
+                QTimer.singleShot(0, self._trim_following)
+        elif value <= bar.minimum() and self.chat_model.first > 0:
+            QTimer.singleShot(0, self._page_older)
+        elif value >= bar.maximum() and not self.chat_model.at_tail:
+            QTimer.singleShot(0, self._page_newer)
+
+    def _page_older(self):
+        bar = self.verticalScrollBar()
+        if bar.value() > bar.minimum():
+            return
+        self._paging = True
+        try:
+            before = bar.maximum()
+            if self.chat_model.load_older():
+                self.doItemsLayout()
+                # Keep the message that was at the top where it was
+                bar.setValue(bar.value() + bar.maximum() - before)
+                self._trim(self.chat_model.trim_tail)
+        finally:
+            self._paging = False
+
+    def _page_newer(self):
+        self._paging = True
+        try:
+            if self.chat_model.load_newer():
+                self.doItemsLayout()
+                bar = self.verticalScrollBar()
+                before, value = bar.maximum(), bar.value()
+                # Dropping rows above the viewport must not move what is shown
+                self.chat_model.trim_head()
+                self.doItemsLayout()
+                bar.setValue(value - (before - bar.maximum()))
+        finally:
+            self._paging = False
+
+    def _trim_following(self):
+        if not self._follow:
+            return
+        self._trim(self.chat_model.trim_head)
+        self.scrollToBottom()
+
+    def _trim(self, trim):
+        self._paging = True
+        try:
+            trim()
+            self.doItemsLayout()
+        finally:
+            self._paging = False
+
+    # ---------------- CONTEXT MENU ----------------
+
+    def show_menu(self, pos):
+        index = self.indexAt(pos)
+        if not index.isValid():
+            return
+        row = index.row()
+        menu = QMenu(self)
+        copy = menu.addAction("Copy message")
+        corrections = {}
+        if self.intents and self.chat_model.message(row).role == "user":
+            meant = menu.addMenu("I meant")
+            for intent in self.intents:
+                corrections[meant.addAction(intent.replace("_", " ").capitalize())] = intent
+        chosen = menu.exec(self.viewport().mapToGlobal(pos))
+        if chosen == copy:
+            QGuiApplication.clipboard().setText(self.chat_model.full_text(row))
+        elif chosen in corrections:
+            self.correction_requested.emit(self.chat_model.full_text(row), corrections[chosen])
@@ -1,39 +1,47 @@
 import sys
 import os
+import threading
 
 from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QTextEdit, QLineEdit, QLabel, QFileDialog
+    QPushButton, QLineEdit, QLabel, QFileDialog, QToolButton, QPlainTextEdit
 )
-from PySide6.QtCore import Qt, QThread, Signal
+from PySide6.QtCore import Qt, QThread, QTimer, Signal
 
-from core.command_engine import process_command
+from core.command_engine import process_command, resource_key, correct
+from core.router import INTENT_ACTIONS
+from core.scheduler import CommandScheduler
 from core.voice_engine import listen_once
-from core.speech_engine import speak
+from core.speech_engine import speak, cancel as cancel_speech
+from core.registry import components
+from core.online_learning import ENABLED as ONLINE_LEARNING
+from core.skill_pool import ENABLED as SKILL_PROCESSES
+from core.tracing import tracer, breakdown, STAGE_COLUMNS
+from core.streaming import spoken
 from skills.file_control import set_base_dir
+from skills.trash import trash
+from ui.chat_log import ChatLogView
 
+# Streamed reply chunks are shown in batches at most this often (ms)
+STREAM_FLUSH_MS = 100
 
-# ---------------- WORKER THREADS ---------------- #
-
-class CommandWorker(QThread):
-    finished = Signal(str)
+# Engines warmed in the background, most commonly needed first
+WARM_UP_ORDER = ["intent_model", "intent_engine", "router", "speech", "app_catalog", "process_table",
+                 "gemini_client", "gemini_transport"]
+if ONLINE_LEARNING:
+    WARM_UP_ORDER.append("learner")
+if SKILL_PROCESSES:
+    WARM_UP_ORDER.append("skill_pool")
 
-    def __init__(self, command):
-        super().__init__()
-        self.command = command
-
-    def run(self):
-        try:
-            result = process_command(self.command)
-        except Exception as e:
-            result = f"Error: {e}"
-        self.finished.emit(result)
 
+# ---------------- WORKER THREADS ---------------- #
 
 class VoiceWorker(QThread):
     finished = Signal(str)
 
     def run(self):
+        # Recognition time is recorded in this trace and carried into the command
+        self.trace = tracer.start()
         try:
             text = listen_once()
         except Exception:
@@ -41,15 +49,66 @@ class VoiceWorker(QThread):
         self.finished.emit(text or "")
 
 
+class HandsFreeWorker(QThread):
+    heard = Signal(str, object)
+
+    def __init__(self):
+        super().__init__()
+        self.stop_event = threading.Event()
+
+    def run(self):
+        tracer.start()
+
+        def on_text(text):
+            self.heard.emit(text, tracer.current())
+            tracer.start()
+
+        try:
+            components.get("voice").run_hands_free(on_text, self.stop_event)
+        except Exception as e:
+            print("Hands-free mode stopped:", e)
+
+    def stop(self):
+        self.stop_event.set()
+
+
 # ---------------- MAIN UI ---------------- #
 
 class OrbitOS(QWidget):
+    component_ready = Signal(str, bool)
+    deletion_progress = Signal(str)
+    command_done = Signal(object)
+    command_chunk = Signal(object, str)
+    trace_updated = Signal(object)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("OrbitOS – Conversational AI Agent")
         self.resize(900, 600)
         self.setup_ui()
 
+        self.warming = set(WARM_UP_ORDER)
+        self.component_ready.connect(self.on_component_ready)
+        components.add_listener(self.component_ready.emit)
+
+        self.deletion_progress.connect(self.on_deletion_progress)
+        trash.add_listener(lambda job: self.deletion_progress.emit(job.status()))
+
+        # Independent commands overlap; ones on the same app/file run in order
+        self.scheduler = CommandScheduler(process_command, key_fn=resource_key)
+        self.command_done.connect(self.on_result)
+
+        # Replies still streaming in: ticket id -> [chat log index, chunks]
+        self.streams = {}
+        self.command_chunk.connect(self.on_chunk)
+        self.stream_timer = QTimer(self)
+        self.stream_timer.setSingleShot(True)
+        self.stream_timer.setInterval(STREAM_FLUSH_MS)
+        self.stream_timer.timeout.connect(self.flush_streams)
+
+        self.trace_updated.connect(self.on_trace_updated)
+        tracer.add_listener(self.trace_updated.emit)
+
     def setup_ui(self):
         main_layout = QVBoxLayout(self)
         main_layout.setSpacing(10)
@@ -61,7 +120,7 @@ class OrbitOS(QWidget):
         main_layout.addWidget(title)
 
         # Status
-        self.status_label = QLabel("Status: Idle")
+        self.status_label = QLabel("Status: Starting up...")
         self.status_label.setAlignment(Qt.AlignCenter)
         self.status_label.setStyleSheet("color: #888;")
         main_layout.addWidget(self.status_label)
@@ -79,9 +138,15 @@ class OrbitOS(QWidget):
         self.voice_btn = QPushButton("🎤 Voice")
         self.voice_btn.clicked.connect(self.start_voice)
 
+        self.hands_free_btn = QPushButton("Hands-free")
+        self.hands_free_btn.setCheckable(True)
+        self.hands_free_btn.toggled.connect(self.toggle_hands_free)
+        self.hands_free_worker = None
+
         input_layout.addWidget(self.command_input, stretch=6)
         input_layout.addWidget(self.run_btn, stretch=1)
         input_layout.addWidget(self.voice_btn, stretch=1)
+        input_layout.addWidget(self.hands_free_btn, stretch=1)
 
         main_layout.addLayout(input_layout)
 
@@ -99,15 +164,45 @@ class OrbitOS(QWidget):
 
         main_layout.addLayout(dir_layout)
 
-        # Console (Chat)
-        self.console = QTextEdit()
-        self.console.setReadOnly(True)
+        # Background deletions
+        self.trash_label = QLabel("")
+        self.trash_label.setStyleSheet("color: #888;")
+        self.trash_label.hide()
+        main_layout.addWidget(self.trash_label)
+
+        # Console (Chat): a bounded window over the session log on disk
+        self.console = ChatLogView()
         self.console.setStyleSheet(
             "font-family: Consolas; font-size: 13px; background:#111; color:#ddd;"
         )
 
+        if ONLINE_LEARNING:
+            # Right-click a command to teach the classifier what it meant
+            self.console.intents = sorted(INTENT_ACTIONS)
+            self.console.correction_requested.connect(self.on_correction)
         main_layout.addWidget(self.console, stretch=1)
 
+        # Latency panel (collapsed until opened)
+        self.latency_btn = QToolButton()
+        self.latency_btn.setText("Latency")
+        self.latency_btn.setCheckable(True)
+        self.latency_btn.setArrowType(Qt.RightArrow)
+        self.latency_btn.setToolButtonStyle(Qt.ToolButtonTextBesideIcon)
+        self.latency_btn.setStyleSheet("border: none; color: #888;")
+        self.latency_btn.toggled.connect(self.toggle_latency_panel)
+
+        self.latency_panel = QPlainTextEdit()
+        self.latency_panel.setReadOnly(True)
+        self.latency_panel.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.latency_panel.setMaximumHeight(180)
+        self.latency_panel.setStyleSheet(
+            "font-family: Consolas; font-size: 12px; background:#111; color:#aaa;"
+        )
+        self.latency_panel.hide()
+
+        main_layout.addWidget(self.latency_btn)
+        main_layout.addWidget(self.latency_panel)
+
     # ---------------- TEXT COMMAND ---------------- #
 
     def run_command(self):
@@ -116,20 +211,22 @@ class OrbitOS(QWidget):
             return
 
         self.command_input.clear()
+        cancel_speech()
         self.append_user(cmd)
+        self.submit(cmd)
 
-        self.set_busy("Thinking...")
-        self.disable_inputs()
-
-        self.worker = CommandWorker(cmd)
-        self.worker.finished.connect(self.on_result)
-        self.worker.start()
+    def submit(self, text, trace=None):
+        self.scheduler.submit(text, on_done=self.command_done.emit, trace=trace,
+                              on_chunk=self.command_chunk.emit)
+        self.update_status()
 
     # ---------------- VOICE COMMAND ---------------- #
 
     def start_voice(self):
+        cancel_speech()
         self.set_busy("Listening...")
-        self.disable_inputs()
+        # Typed commands stay available while the microphone is busy
+        self.voice_btn.setEnabled(False)
 
         self.voice_worker = VoiceWorker()
         self.voice_worker.finished.connect(self.on_voice_result)
@@ -138,37 +235,150 @@ class OrbitOS(QWidget):
     def on_voice_result(self, text):
         if not text:
             self.append_agent("Sorry, I could not understand.")
-            speak("Sorry, I could not understand.")
-            self.set_idle()
+            self.say("Sorry, I could not understand.")
+            self.update_status()
             self.enable_inputs()
             return
 
         self.append_user(text)
-
-        self.set_busy("Thinking...")
-        self.worker = CommandWorker(text)
-        self.worker.finished.connect(self.on_result)
-        self.worker.start()
+        self.enable_inputs()
+        self.submit(text, self.voice_worker.trace)
+
+    # ---------------- HANDS-FREE MODE ---------------- #
+
+    def toggle_hands_free(self, enabled):
+        if enabled:
+            self.voice_btn.setEnabled(False)
+            self.set_busy("Hands-free listening...")
+            self.hands_free_worker = HandsFreeWorker()
+            self.hands_free_worker.heard.connect(self.on_hands_free_text)
+            self.hands_free_worker.start()
+        elif self.hands_free_worker is not None:
+            self.hands_free_worker.stop()
+            self.hands_free_worker.wait()
+            self.hands_free_worker = None
+            self.voice_btn.setEnabled(True)
+            self.update_status()
+
+    def on_hands_free_text(self, text, trace):
+        cancel_speech()
+        self.append_user(text)
+        self.submit(text, trace)
 
     # ---------------- RESULT HANDLER ---------------- #
 
-    def on_result(self, result):
-        self.append_agent(result)
-        speak(result)
-        self.set_idle()
-        self.enable_inputs()
+    def on_chunk(self, ticket, chunk):
+        stream = self.streams.get(ticket.id)
+        if stream is None:
+            self.streams[ticket.id] = [self.append_agent(chunk), [chunk]]
+            return
+        stream[1].append(chunk)
+        if not self.stream_timer.isActive():
+            self.stream_timer.start()
+
+    def flush_streams(self):
+        for index, chunks in self.streams.values():
+            self.console.update_message(index, "\n".join(chunks))
+
+    def on_result(self, ticket):
+        stream = self.streams.pop(ticket.id, None)
+        if stream is None:
+            self.append_agent(ticket.result)
+        else:
+            # The final text replaces what was streamed (e.g. the sorted page)
+            self.console.update_message(stream[0], ticket.result)
+        # Long results are summarized rather than read out
+        self.say(spoken(ticket.result), ticket.trace)
+        self.update_status()
+
+    # ---------------- WARM-UP ---------------- #
+
+    def start_warm_up(self):
+        components.warm_up(WARM_UP_ORDER)
+
+    def on_component_ready(self, name, ok):
+        if name not in self.warming:
+            return
+        self.warming.discard(name)
+        if not ok:
+            print(f"Component '{name}' failed to load, see the startup report.")
+        if self.warming:
+            return
+
+        components.mark("engines ready")
+        if self.status_label.text() == "Status: Starting up...":
+            self.set_idle()
+        print(components.report())
+
+    # ---------------- LATENCY PANEL ---------------- #
+
+    def toggle_latency_panel(self, expanded):
+        self.latency_btn.setArrowType(Qt.DownArrow if expanded else Qt.RightArrow)
+        self.latency_panel.setVisible(expanded)
+        if expanded:
+            self.refresh_latency_panel()
+
+    def on_trace_updated(self, trace):
+        if self.latency_btn.isChecked():
+            self.refresh_latency_panel()
+
+    def refresh_latency_panel(self):
+        def cell(ms):
+            return f"{'-' if ms is None else f'{ms:.0f}':>8}"
+
+        columns = [name for name, _ in STAGE_COLUMNS]
+        lines = [f"{'command (ms)':<32}" + "".join(f"{c:>8}" for c in columns) + f"{'total':>8}"]
+        for trace in reversed(tracer.recent_traces()):
+            stages = breakdown(trace)
+            text = trace.text if len(trace.text) <= 30 else trace.text[:29] + "…"
+            lines.append(f"{text:<32}" + "".join(cell(stages[c]) for c in columns) + cell(trace.total_ms))
+
+        histograms = tracer.histograms()
+        if histograms:
+            lines.append("")
+            lines.append("p50 / p95: " + "   ".join(
+                f"{name} {h['p50_ms']:.0f}/{h['p95_ms']:.0f}" for name, h in sorted(histograms.items())
+            ))
+        self.latency_panel.setPlainText("\n".join(lines))
+
+    # ---------------- CORRECTIONS ---------------- #
+
+    def on_correction(self, text, intent):
+        correct(text, intent)
+        self.append_agent(f"Noted: \"{text}\" means {intent.replace('_', ' ').lower()}.")
+
+    # ---------------- DELETIONS ---------------- #
+
+    def on_deletion_progress(self, status):
+        self.trash_label.setText(status)
+        self.trash_label.show()
+        # Finished jobs stay visible briefly
+        if not trash.status():
+            QTimer.singleShot(5000, lambda: trash.status() or self.trash_label.hide())
 
     # ---------------- UI HELPERS ---------------- #
 
     def append_user(self, text):
-        self.console.append(
-            f"<p style='color:#00aaff;'><b>You:</b> {text}</p>"
-        )
+        self.console.append_user(text)
 
     def append_agent(self, text):
-        self.console.append(
-            f"<p style='color:#00ff88;'><b>Agent:</b> {text}</p><br>"
-        )
+        return self.console.append_agent(text)
+
+    def say(self, text, trace=None):
+        try:
+            speak(text, trace)
+        except Exception as e:
+            print("Speech engine unavailable:", e)
+
+    def update_status(self):
+        stats = self.scheduler.stats()
+        pending = stats["running"] + stats["queued"]
+        if pending:
+            self.set_busy(f"Thinking... ({pending} running, p95 {stats['run_p95_ms']:.0f} ms)")
+        elif self.hands_free_btn.isChecked():
+            self.set_busy("Hands-free listening...")
+        else:
+            self.set_idle()
 
     def set_busy(self, state):
         self.status_label.setText(f"Status: {state}")
@@ -176,13 +386,10 @@ class OrbitOS(QWidget):
     def set_idle(self):
         self.status_label.setText("Status: Idle")
 
-    def disable_inputs(self):
-        self.run_btn.setEnabled(False)
-        self.voice_btn.setEnabled(False)
-
     def enable_inputs(self):
         self.run_btn.setEnabled(True)
-        self.voice_btn.setEnabled(True)
+        # The microphone is already in use while hands-free mode is on
+        self.voice_btn.setEnabled(not self.hands_free_btn.isChecked())
 
     # ---------------- DIRECTORY ---------------- #
 
@@ -197,4 +404,7 @@ def launch_ui():
     app = QApplication(sys.argv)
     window = OrbitOS()
     window.show()
+    components.mark("window shown")
+    # Start warming only once the event loop has painted the window
+    QTimer.singleShot(0, window.start_warm_up)
     sys.exit(app.exec())